@@ -0,0 +1,62 @@
+"""
+Бенчмарк: стоимость соединения с БД на каждый запрос против постоянного соединения.
+
+Имитирует цикл запроса Django (request_started -> запрос -> request_finished)
+сначала с CONN_MAX_AGE=0 (новое соединение на каждый запрос), затем с постоянным
+соединением, и выводит среднее время на запрос и экономию.
+
+Запуск (нужна настроенная БД из .env):
+    python benchmarks/db_connections.py --requests 500
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'eigth_module.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.signals import request_finished, request_started  # noqa: E402
+from django.db import connection  # noqa: E402
+
+
+def run(requests: int, conn_max_age: int) -> float:
+    """Возвращает среднее время одного запроса в миллисекундах"""
+    connection.close()
+    connection.settings_dict['CONN_MAX_AGE'] = conn_max_age
+    started = time.perf_counter()
+    for _ in range(requests):
+        request_started.send(sender=None)
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+        request_finished.send(sender=None)
+    elapsed = time.perf_counter() - started
+    connection.close()
+    return elapsed / requests * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=200, help='Количество имитируемых запросов')
+    args = parser.parse_args()
+
+    if connection.settings_dict['OPTIONS'].get('pool'):
+        print('Включен пул соединений (DB_POOL=1): замер покажет время получения соединения из пула')
+
+    new_connection_ms = run(args.requests, conn_max_age=0)
+    persistent_ms = run(args.requests, conn_max_age=60)
+
+    print(f'Новое соединение на запрос: {new_connection_ms:.3f} мс/запрос')
+    print(f'Постоянное соединение:      {persistent_ms:.3f} мс/запрос')
+    print(f'Экономия:                   {new_connection_ms - persistent_ms:.3f} мс/запрос '
+          f'({new_connection_ms / persistent_ms:.1f}x)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Бенчмарк: регистраций в секунду при разной стоимости хеширования паролей.
+
+Отправляет POST /api/register/ через тестовый клиент DRF из нескольких
+потоков (как воркер с потоками или ASGI) для каждого числа итераций PBKDF2
+и выводит регистрации в секунду. Созданные пользователи удаляются.
+
+Запуск (нужна настроенная БД из .env):
+    python benchmarks/registration.py --users 200 --threads 8 --iterations 1000000 600000 100000
+"""
+import argparse
+import os
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'eigth_module.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.db import connection  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+
+from users.models import User  # noqa: E402
+
+PASSWORD = 'Benchmark-password-42'
+
+
+def register(email: str) -> int:
+    try:
+        response = APIClient().post('/api/register/', {
+            'email': email,
+            'password': PASSWORD,
+            'password_confirm': PASSWORD,
+        }, format='json')
+        return response.status_code
+    finally:
+        connection.close()
+
+
+def run(users: int, threads: int, prefix: str) -> float:
+    """Возвращает число регистраций в секунду"""
+    emails = [f'{prefix}-{i}@benchmark.local' for i in range(users)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        codes = list(pool.map(register, emails))
+    elapsed = time.perf_counter() - started
+    failed = sum(1 for code in codes if code != 201)
+    if failed:
+        print(f'  ошибок регистрации: {failed}')
+    return users / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=100, help='Регистраций на каждый замер')
+    parser.add_argument('--threads', type=int, default=8, help='Одновременных запросов')
+    parser.add_argument('--iterations', type=int, nargs='+', default=[settings.PASSWORD_PBKDF2_ITERATIONS],
+                        help='Числа итераций PBKDF2 для сравнения')
+    args = parser.parse_args()
+
+    settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, 'testserver']
+    print(f'Потоков запросов: {args.threads}')
+    prefix = f'bench-{uuid.uuid4().hex[:8]}'
+    try:
+        for iterations in args.iterations:
+            settings.PASSWORD_PBKDF2_ITERATIONS = iterations
+            rate = run(args.users, args.threads, f'{prefix}-{iterations}')
+            print(f'PBKDF2 {iterations:>9} итераций: {rate:8.1f} регистраций/с')
+    finally:
+        User.objects.filter(email__startswith=prefix).delete()
+
+
+if __name__ == '__main__':
+    main()
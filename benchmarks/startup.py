@@ -0,0 +1,85 @@
+"""
+Бенчмарк: время холодного старта воркера (django.setup() и загрузка URLconf).
+
+Каждый замер выполняется в отдельном интерпретаторе, как при запуске нового
+воркера gunicorn или management-команды. Выводит медиану по запускам и самые
+тяжелые импорты по профилю `python -X importtime`.
+
+Запуск (нужен .env с настройками проекта):
+    python benchmarks/startup.py --runs 5 --top 15
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+MEASURE_SCRIPT = '''
+import json, time
+started = time.perf_counter()
+import django
+django.setup()
+setup_done = time.perf_counter()
+from django.urls import get_resolver
+get_resolver().url_patterns
+urls_done = time.perf_counter()
+print(json.dumps({
+    'setup_ms': (setup_done - started) * 1000,
+    'urls_ms': (urls_done - setup_done) * 1000,
+    'total_ms': (urls_done - started) * 1000,
+}))
+'''
+
+
+def run_python(*args) -> subprocess.CompletedProcess:
+    env = dict(os.environ)
+    env.setdefault('DJANGO_SETTINGS_MODULE', 'eigth_module.settings')
+    return subprocess.run(
+        [sys.executable, *args, '-c', MEASURE_SCRIPT],
+        cwd=BASE_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+
+
+def measure(runs: int) -> dict:
+    """Медианы времени старта по нескольким запускам, в миллисекундах"""
+    samples = [json.loads(run_python().stdout) for _ in range(runs)]
+    return {key: statistics.median(sample[key] for sample in samples) for key in samples[0]}
+
+
+def heaviest_imports(top: int) -> list:
+    """Модули верхнего уровня с наибольшим суммарным временем импорта (мкс)"""
+    stderr = run_python('-X', 'importtime').stderr
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Отступ имени показывает вложенность; берем импорты верхнего уровня
+        if name.startswith('  '):
+            continue
+        imports.append((int(cumulative), name.strip()))
+    return sorted(imports, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5, help='Количество запусков интерпретатора')
+    parser.add_argument('--top', type=int, default=15, help='Сколько самых тяжелых импортов показать')
+    args = parser.parse_args()
+
+    result = measure(args.runs)
+    print(f"django.setup():   {result['setup_ms']:.1f} мс")
+    print(f"Загрузка URLconf: {result['urls_ms']:.1f} мс")
+    print(f"Всего:            {result['total_ms']:.1f} мс (медиана по {args.runs} запускам)")
+
+    print('\nСамые тяжелые импорты (суммарно, мс):')
+    for cumulative, name in heaviest_imports(args.top):
+        print(f'{cumulative / 1000:8.1f}  {name}')
+
+
+if __name__ == '__main__':
+    main()
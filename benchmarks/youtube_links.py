@@ -0,0 +1,72 @@
+"""
+Бенчмарк: разбор ссылок на видео YouTube при массовом импорте уроков.
+
+Сравнивает прежнюю проверку (urlparse + проверка домена, без ID видео),
+разбор по одной ссылке скомпилированным шаблоном и пакетный
+extract_youtube_video_ids на наборе ссылок разных форматов.
+
+Запуск (БД не нужна):
+    python benchmarks/youtube_links.py --urls 1000000
+"""
+import argparse
+import random
+import string
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urlparse
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from lms.validators import extract_youtube_video_id, extract_youtube_video_ids  # noqa: E402
+
+ALLOWED_YOUTUBE_DOMAINS = {'youtube.com', 'www.youtube.com', 'm.youtube.com'}
+TEMPLATES = (
+    'https://www.youtube.com/watch?v={}',
+    'https://youtube.com/watch?feature=share&v={}&t=42',
+    'https://youtu.be/{}?si=abcdef',
+    'https://www.youtube.com/embed/{}?rel=0',
+    'https://www.youtube.com/shorts/{}',
+    'https://vimeo.com/{}',
+)
+ID_ALPHABET = string.ascii_letters + string.digits + '-_'
+
+
+def make_urls(count: int, unique_ids: int) -> list:
+    """Ссылки разных форматов; число разных видео ограничено, как в реальных выгрузках"""
+    rng = random.Random(42)
+    ids = [''.join(rng.choices(ID_ALPHABET, k=11)) for _ in range(unique_ids)]
+    return [rng.choice(TEMPLATES).format(rng.choice(ids)) for _ in range(count)]
+
+
+def legacy_check(value):
+    return urlparse(value).netloc.lower() in ALLOWED_YOUTUBE_DOMAINS
+
+
+def timed(label: str, func, urls: list):
+    started = time.perf_counter()
+    result = func(urls)
+    elapsed = time.perf_counter() - started
+    print(f'{label:<36} {elapsed:7.3f} с  ({elapsed / len(urls) * 1e9:6.0f} нс/ссылка)')
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--urls', type=int, default=1_000_000, help='Количество ссылок')
+    parser.add_argument('--unique', type=int, default=200_000, help='Количество разных видео')
+    args = parser.parse_args()
+
+    urls = make_urls(args.urls, args.unique)
+    print(f'Ссылок: {len(urls)}, разных видео: {args.unique}')
+
+    timed('urlparse + домен (прежняя проверка)', lambda items: [legacy_check(url) for url in items], urls)
+    single = timed('шаблон, по одной ссылке', lambda items: [extract_youtube_video_id(url) for url in items], urls)
+    batch = timed('extract_youtube_video_ids (пакет)', extract_youtube_video_ids, urls)
+
+    assert single == batch
+    print(f'Ссылок на видео YouTube: {sum(1 for video_id in batch if video_id)}')
+
+
+if __name__ == '__main__':
+    main()
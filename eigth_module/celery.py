@@ -2,8 +2,12 @@
 Настройка Celery для проекта
 """
 import os
-from celery import Celery
+from celery import Celery, signals
 from celery.schedules import crontab
+from kombu import Exchange, Queue
+
+# Обработчики сигналов метрик подключаются при импорте модуля
+from .task_metrics import start_metrics_server
 
 # Устанавливаем переменную окружения для Django
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'eigth_module.settings')
@@ -17,24 +21,97 @@ app.config_from_object('django.conf:settings', namespace='CELERY')
 # Автоматически находим задачи в приложениях Django
 app.autodiscover_tasks()
 
+# Очереди: рассылки не должны задерживать платежи и обслуживание.
+# Каждую очередь обслуживает свой пул воркеров (см. docker-compose.yml):
+#   celery -A eigth_module worker -Q notifications -c 4 --prefetch-multiplier 4
+#   celery -A eigth_module worker -Q payments,default -c 2 --prefetch-multiplier 1
+#   celery -A eigth_module worker -Q media,maintenance -c 2 --prefetch-multiplier 1
+default_exchange = Exchange('default', type='direct')
+app.conf.task_queues = (
+    Queue('default', default_exchange, routing_key='default'),
+    Queue('notifications', default_exchange, routing_key='notifications'),
+    Queue('payments', default_exchange, routing_key='payments'),
+    Queue('maintenance', default_exchange, routing_key='maintenance'),
+    Queue('media', default_exchange, routing_key='media'),
+)
+app.conf.task_default_queue = 'default'
+app.conf.task_default_exchange = 'default'
+app.conf.task_default_routing_key = 'default'
+
+app.conf.task_routes = {
+    'lms.tasks.prune_notification_outbox': {'queue': 'maintenance', 'routing_key': 'maintenance'},
+    'lms.tasks.rebuild_course_recommendations': {'queue': 'maintenance', 'routing_key': 'maintenance'},
+    'lms.tasks.generate_preview_thumbnail': {'queue': 'media', 'routing_key': 'media'},
+    'lms.tasks.*': {'queue': 'notifications', 'routing_key': 'notifications'},
+    'users.tasks.create_stripe_checkout_task': {'queue': 'payments', 'routing_key': 'payments', 'priority': 0},
+    'users.tasks.block_inactive_users': {'queue': 'maintenance', 'routing_key': 'maintenance'},
+    'users.tasks.maintain_payment_partitions': {'queue': 'maintenance', 'routing_key': 'maintenance'},
+    'users.tasks.generate_avatar_thumbnail': {'queue': 'media', 'routing_key': 'media'},
+}
+
+# Приоритеты 0-9 для брокера Redis: очередь разбивается на уровни priority_steps,
+# которые воркер опрашивает по возрастанию, поэтому 0 - самый высокий приоритет
+# (на RabbitMQ с x-max-priority порядок обратный)
+app.conf.task_queue_max_priority = 10
+app.conf.task_default_priority = 5
+app.conf.broker_transport_options = {
+    'queue_order_strategy': 'priority',
+    'priority_steps': list(range(10)),
+}
+
+# Воркер берет задачи по одной, чтобы длинная рассылка не держала чужие задачи в prefetch.
+# Для очереди уведомлений множитель увеличивается флагом --prefetch-multiplier
+app.conf.worker_prefetch_multiplier = 1
+# Идемпотентные задачи объявлены с acks_late=True: при падении воркера они вернутся в очередь
+app.conf.task_reject_on_worker_lost = True
+
 # Настройка расписания для celery-beat
 app.conf.beat_schedule = {
     'block-inactive-users': {
         'task': 'users.tasks.block_inactive_users',
         'schedule': crontab(hour=0, minute=0),  # Каждый день в полночь
     },
+    'relay-notification-outbox': {
+        'task': 'lms.tasks.relay_notification_outbox',
+        'schedule': 60.0,  # Каждую минуту
+    },
+    'send-notification-digests': {
+        'task': 'lms.tasks.send_notification_digests',
+        'schedule': crontab(hour=8, minute=0),  # Каждый день в 8:00
+    },
+    'prune-notification-outbox': {
+        'task': 'lms.tasks.prune_notification_outbox',
+        'schedule': crontab(hour=3, minute=0),  # Каждый день в 3:00
+    },
+    'rebuild-course-recommendations': {
+        'task': 'lms.tasks.rebuild_course_recommendations',
+        'schedule': crontab(hour=4, minute=0),  # Каждый день в 4:00
+    },
+    'maintain-payment-partitions': {
+        'task': 'users.tasks.maintain_payment_partitions',
+        'schedule': crontab(hour=2, minute=30),  # Каждый день в 2:30
+    },
 }
 
 app.conf.timezone = 'UTC'
 
-import os
-
-from celery import Celery
 
+@signals.worker_ready.connect
+def start_worker_metrics_server(sender=None, **kwargs):
+    """Запускает эндпоинт /metrics в главном процессе воркера, если задан CELERY_METRICS_PORT"""
+    from django.conf import settings
+    if settings.CELERY_METRICS_PORT:
+        start_metrics_server(app, int(settings.CELERY_METRICS_PORT))
 
-os.environ.setdefault("DJANGO_SETTINGS_MODULE", "eigth_module.settings")
-
-app = Celery("eigth_module")
-app.config_from_object("django.conf:settings", namespace="CELERY")
-app.autodiscover_tasks()
 
+@signals.task_prerun.connect
+@signals.task_postrun.connect
+def close_stale_db_connections(sender=None, **kwargs):
+    """
+    Закрывает только устаревшие (старше CONN_MAX_AGE) и сломанные соединения,
+    остальные переиспользуются следующими задачами воркера
+    """
+    if sender is not None and getattr(sender.request, 'is_eager', False):
+        return
+    from django.db import close_old_connections
+    close_old_connections()
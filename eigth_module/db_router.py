@@ -0,0 +1,140 @@
+"""
+Маршрутизация чтения на реплики БД.
+
+Чтение уходит на реплику только внутри use_replica() (или в представлениях
+с ReplicaReadMixin для безопасных запросов), все остальное - на основную БД.
+После записи пользователь на REPLICA_STICKY_SECONDS закрепляется за основной БД,
+чтобы сразу видеть свои изменения. Реплика с отставанием больше REPLICA_MAX_LAG
+секунд временно не используется.
+"""
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connections
+from rest_framework import permissions
+
+
+_replica_reads = ContextVar('replica_reads', default=False)
+# alias -> (время проверки, отставание в секундах)
+_lag_cache = {}
+
+
+def get_replica_lag(alias) -> float:
+    """Отставание реплики в секундах; недоступная реплика считается бесконечно отстающей"""
+    checked_at, lag = _lag_cache.get(alias, (0.0, None))
+    if lag is not None and time.monotonic() - checked_at < settings.REPLICA_LAG_CHECK_INTERVAL:
+        return lag
+
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        lag = 0.0
+    else:
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 '
+                    'ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END'
+                )
+                lag = float(cursor.fetchone()[0] or 0)
+        except DatabaseError:
+            lag = float('inf')
+    _lag_cache[alias] = (time.monotonic(), lag)
+    return lag
+
+
+def choose_replica_alias() -> str:
+    """Случайная реплика без большого отставания, иначе основная БД"""
+    fresh = [
+        alias for alias in settings.REPLICA_DATABASES
+        if get_replica_lag(alias) <= settings.REPLICA_MAX_LAG
+    ]
+    return random.choice(fresh) if fresh else 'default'
+
+
+@contextmanager
+def use_replica(enabled=True):
+    """Разрешает чтение с реплики внутри блока (отчеты, выгрузки, списки)"""
+    token = _replica_reads.set(enabled)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def _sticky_cache_key(user_id) -> str:
+    return f'db:sticky:{user_id}'
+
+
+def mark_primary_sticky(user_id):
+    """Закрепляет чтение пользователя за основной БД после записи"""
+    cache.set(_sticky_cache_key(user_id), True, settings.REPLICA_STICKY_SECONDS)
+
+
+def is_primary_sticky(user_id) -> bool:
+    return bool(cache.get(_sticky_cache_key(user_id)))
+
+
+class PrimaryReplicaRouter:
+    """Роутер: запись и миграции - основная БД, разрешенное чтение - реплики"""
+
+    def db_for_read(self, model, **hints):
+        if settings.REPLICA_DATABASES and _replica_reads.get():
+            return choose_replica_alias()
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же данные, что и основная БД
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
+
+
+class ReplicaReadMixin:
+    """
+    Миксин DRF-представления: безопасные запросы читают с реплики,
+    если пользователь недавно ничего не записывал
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        user = request.user
+        if request.method in permissions.SAFE_METHODS and not (
+            user.is_authenticated and is_primary_sticky(user.id)
+        ):
+            self._replica_token = _replica_reads.set(True)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, '_replica_token', None)
+        if token is not None:
+            _replica_reads.reset(token)
+            self._replica_token = None
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class ReplicaStickinessMiddleware:
+    """После успешного изменяющего запроса закрепляет пользователя за основной БД"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        # DRF переносит пользователя, аутентифицированного по JWT, в исходный запрос
+        user = getattr(request, 'user', None)
+        if (
+            settings.REPLICA_DATABASES
+            and request.method not in permissions.SAFE_METHODS
+            and response.status_code < 400
+            and user is not None
+            and user.is_authenticated
+        ):
+            mark_primary_sticky(user.id)
+        return response
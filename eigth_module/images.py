@@ -0,0 +1,127 @@
+"""
+Обработка загружаемых изображений (превью курсов и уроков, аватарки).
+
+Загрузки пишутся во временный файл на диске (FILE_UPLOAD_HANDLERS), размер
+и разрешение проверяются по заголовку файла без декодирования картинки.
+Уменьшенные копии фиксированного размера в WebP строятся задачей Celery после
+коммита и сохраняются рядом с оригиналом: courses/a.jpg -> courses/thumbs/a.webp.
+Списки отдают уменьшенную копию вместо оригинала.
+"""
+from io import BytesIO
+from pathlib import PurePosixPath
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models.fields.files import FieldFile
+from rest_framework import serializers
+
+
+def validate_image_upload(value):
+    """Проверяет размер файла и разрешение загружаемого изображения"""
+    if isinstance(value, FieldFile) and value._committed:
+        # Уже сохраненный файл проверялся при загрузке
+        return
+
+    max_size = settings.IMAGE_UPLOAD_MAX_SIZE
+    if value.size > max_size:
+        raise ValidationError(f'Размер изображения не должен превышать {max_size // (1024 * 1024)} МБ')
+
+    from PIL import Image, UnidentifiedImageError
+
+    value.seek(0)
+    try:
+        # Pillow читает только заголовок, пиксели не декодируются
+        with Image.open(value) as image:
+            width, height = image.size
+    except (UnidentifiedImageError, OSError):
+        raise ValidationError('Файл не является изображением')
+    finally:
+        value.seek(0)
+
+    max_side = settings.IMAGE_MAX_DIMENSION
+    if width > max_side or height > max_side:
+        raise ValidationError(f'Разрешение изображения не должно превышать {max_side}x{max_side}')
+
+
+def thumbnail_name(source_name: str) -> str:
+    """Имя уменьшенной копии: каталог оригинала/thumbs/имя.webp"""
+    path = PurePosixPath(source_name)
+    return str(path.parent / 'thumbs' / f'{path.stem}.webp')
+
+
+def render_thumbnail(source, size) -> ContentFile:
+    """Обрезает изображение по центру до size и кодирует в WebP"""
+    from PIL import Image, ImageOps
+
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+        thumbnail = ImageOps.fit(image, tuple(size), Image.LANCZOS)
+    buffer = BytesIO()
+    thumbnail.save(buffer, 'WEBP', quality=settings.IMAGE_THUMBNAIL_QUALITY, method=4)
+    return ContentFile(buffer.getvalue())
+
+
+def update_thumbnail(model, object_id, source_field: str, thumbnail_field: str, size):
+    """
+    Строит уменьшенную копию изображения объекта или удаляет устаревшую
+
+    Поле копии обновляется через QuerySet.update, чтобы не менять updated_at
+    и не вызывать сигналы сохранения повторно.
+
+    Returns:
+        str | None: Имя файла уменьшенной копии
+    """
+    instance = model.objects.filter(pk=object_id).only('pk', source_field, thumbnail_field).first()
+    if instance is None:
+        return None
+    source = getattr(instance, source_field)
+    thumbnail = getattr(instance, thumbnail_field)
+    storage = thumbnail.storage
+    previous_name = thumbnail.name
+
+    if not source:
+        name = None
+    else:
+        name = thumbnail_name(source.name)
+        if previous_name == name and storage.exists(name):
+            return name
+        with source.open('rb') as source_file:
+            content = render_thumbnail(source_file, size)
+        if storage.exists(name):
+            storage.delete(name)
+        name = storage.save(name, content)
+
+    model.objects.filter(pk=object_id).update(**{thumbnail_field: name})
+    if previous_name and previous_name != name:
+        storage.delete(previous_name)
+    return name
+
+
+def schedule_thumbnail(instance, source_field: str, thumbnail_field: str, task, *args):
+    """После коммита ставит задачу, если копия не соответствует текущему изображению"""
+    source = getattr(instance, source_field)
+    expected = thumbnail_name(source.name) if source else ''
+    if (getattr(instance, thumbnail_field).name or '') != expected:
+        transaction.on_commit(lambda: task.delay(*args))
+
+
+class ThumbnailField(serializers.ImageField):
+    """
+    URL уменьшенной копии изображения для списков; пока копия строится,
+    отдается оригинал
+    """
+
+    def __init__(self, source_field: str, thumbnail_field: str, **kwargs):
+        self.source_field = source_field
+        self.thumbnail_field = thumbnail_field
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        image = getattr(value, self.thumbnail_field) or getattr(value, self.source_field)
+        return super().to_representation(image) if image else None
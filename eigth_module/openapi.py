@@ -0,0 +1,102 @@
+"""
+Предварительно собранная схема OpenAPI.
+
+Схема генерируется при сборке командой `python manage.py build_openapi_schema`
+в файл OPENAPI_SCHEMA_FILE и отдается с /api/schema/ как статический файл
+с сильным ETag. Живая генерация (обход всех представлений и сериализаторов)
+используется только в DEBUG, если файла нет.
+"""
+import hashlib
+import logging
+
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseNotModified
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_CONTENT_TYPE = 'application/vnd.oai.openapi+json'
+
+# (путь, mtime, размер) -> (содержимое, ETag); файл читается один раз на процесс
+_artifact_cache = {}
+
+
+def generate_schema() -> bytes:
+    """Генерирует схему API в JSON так же, как SpectacularAPIView"""
+    from drf_spectacular.renderers import OpenApiJsonRenderer
+    from drf_spectacular.settings import spectacular_settings
+    import users.schema  # noqa: F401
+
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    schema = generator.get_schema(request=None, public=True)
+    return OpenApiJsonRenderer().render(schema, renderer_context={})
+
+
+def write_schema(path=None) -> bytes:
+    """Записывает схему в файл (по умолчанию OPENAPI_SCHEMA_FILE)"""
+    path = settings.OPENAPI_SCHEMA_FILE if path is None else path
+    content = generate_schema()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+    return content
+
+
+def build_etag(content: bytes) -> str:
+    return '"%s"' % hashlib.sha256(content).hexdigest()
+
+
+def load_schema_artifact():
+    """
+    Содержимое собранной схемы и ее ETag
+
+    Returns:
+        tuple | None: (содержимое, ETag) или None, если файл не собран
+    """
+    path = settings.OPENAPI_SCHEMA_FILE
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    cache_key = (str(path), stat.st_mtime_ns, stat.st_size)
+    cached = _artifact_cache.get(cache_key)
+    if cached is None:
+        content = path.read_bytes()
+        _artifact_cache.clear()
+        cached = _artifact_cache[cache_key] = (content, build_etag(content))
+    return cached
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Совпадает ли ETag с заголовком If-None-Match (список тегов или *)"""
+    tags = {tag.strip() for tag in if_none_match.split(',') if tag.strip()}
+    return etag in tags or '*' in tags
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class CachedSchemaView(View):
+    """Отдает собранную схему OpenAPI; повторный запрос с If-None-Match получает 304"""
+
+    http_method_names = ['get', 'head']
+
+    def get(self, request, *args, **kwargs):
+        artifact = load_schema_artifact()
+        if artifact is None:
+            if settings.DEBUG:
+                from drf_spectacular.views import SpectacularAPIView
+                import users.schema  # noqa: F401
+                return SpectacularAPIView.as_view()(request, *args, **kwargs)
+            logger.error('Схема OpenAPI не собрана: %s', settings.OPENAPI_SCHEMA_FILE)
+            raise Http404('Схема OpenAPI не собрана')
+
+        content, etag = artifact
+        if etag_matches(request.headers.get('If-None-Match', ''), etag):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(content, content_type=SCHEMA_CONTENT_TYPE)
+        response['ETag'] = etag
+        # Клиент хранит копию, но каждый раз сверяет ее по ETag
+        response['Cache-Control'] = 'public, no-cache'
+        return response
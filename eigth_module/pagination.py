@@ -0,0 +1,112 @@
+"""
+Пагинация больших таблиц без точного COUNT(*).
+
+На PostgreSQL COUNT(*) читает все подходящие строки. Для запросов без фильтров
+достаточно оценки из статистики планировщика (pg_class.reltuples), которую
+обновляют VACUUM/ANALYZE, для запросов с фильтрами - оценки строк из EXPLAIN.
+Если оценка меньше ESTIMATED_COUNT_THRESHOLD, выполняется точный COUNT(*);
+на других СУБД количество всегда точное. Ответ API помечает оценку флагом
+count_is_estimate.
+"""
+import json
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+
+
+def estimate_table_rows(model, using='default'):
+    """
+    Оценка числа строк таблицы модели по статистике PostgreSQL
+
+    Returns:
+        int | None: Оценка или None, если статистики нет или СУБД не PostgreSQL
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        # У секционированной таблицы статистика хранится по секциям
+        cursor.execute(
+            "SELECT CASE WHEN c.relkind = 'p' THEN ("
+            '    SELECT sum(p.reltuples) FILTER (WHERE p.reltuples >= 0)'
+            '    FROM pg_inherits i JOIN pg_class p ON p.oid = i.inhrelid WHERE i.inhparent = c.oid'
+            ') ELSE c.reltuples END::bigint '
+            'FROM pg_class c WHERE c.oid = %s::regclass',
+            [model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    # reltuples = -1, пока таблицу ни разу не анализировали
+    return row[0] if row and row[0] is not None and row[0] >= 0 else None
+
+
+def estimate_query_rows(queryset):
+    """
+    Оценка числа строк запроса по плану PostgreSQL (EXPLAIN без выполнения)
+
+    Returns:
+        int | None: Оценка или None, если СУБД не PostgreSQL
+    """
+    if connections[queryset.db].vendor != 'postgresql':
+        return None
+    plan = json.loads(queryset.order_by().explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def estimate_count(queryset):
+    """
+    Оценка количества объектов для большого результата
+
+    Returns:
+        int | None: Оценка или None, если нужен точный COUNT(*)
+    """
+    if not isinstance(queryset, QuerySet):
+        return None
+    if queryset.query.where or queryset.query.distinct:
+        estimate = estimate_query_rows(queryset)
+    else:
+        estimate = estimate_table_rows(queryset.model, queryset.db)
+    if estimate is None or estimate < settings.ESTIMATED_COUNT_THRESHOLD:
+        return None
+    return estimate
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator, который для больших результатов берет оценку вместо COUNT(*)"""
+
+    count_is_estimate = False
+
+    @cached_property
+    def count(self):
+        estimate = estimate_count(self.object_list)
+        if estimate is None:
+            return super().count
+        self.count_is_estimate = True
+        return estimate
+
+
+class EstimatedCountPageNumberPagination(PageNumberPagination):
+    """Постраничная пагинация DRF с оценкой количества для больших результатов"""
+
+    django_paginator_class = EstimatedCountPaginator
+
+    def get_paginated_response(self, data):
+        return Response({
+            'count': self.page.paginator.count,
+            'count_is_estimate': self.page.paginator.count_is_estimate,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['count_is_estimate'] = {
+            'type': 'boolean',
+            'example': False,
+        }
+        return response_schema
@@ -59,6 +59,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'eigth_module.db_router.ReplicaStickinessMiddleware',
 ]
 
 ROOT_URLCONF = 'eigth_module.urls'
@@ -93,9 +94,53 @@ DATABASES = {
         'PASSWORD': os.getenv('DB_PASSWORD', ''),
         'HOST': os.getenv('DB_HOST', 'localhost'),
         'PORT': os.getenv('DB_PORT', '5432'),
+        # Постоянные соединения: переиспользуются между запросами и задачами Celery
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', '60')),
+        # Проверка соединения перед повторным использованием (после рестарта БД или PgBouncer)
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {},
     }
 }
 
+# Пул соединений psycopg (нужен пакет psycopg[pool] вместо psycopg2)
+if os.getenv('DB_POOL', '0') == '1':
+    # Пул несовместим с постоянными соединениями: соединения хранит сам пул
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': int(os.getenv('DB_POOL_MIN_SIZE', '2')),
+        'max_size': int(os.getenv('DB_POOL_MAX_SIZE', '10')),
+        'timeout': int(os.getenv('DB_POOL_TIMEOUT', '10')),
+    }
+
+# Реплики только для чтения: хосты через запятую, алиасы replica1, replica2, ...
+db_replica_hosts = os.getenv('DB_REPLICA_HOSTS', '')
+for index, host in enumerate([h.strip() for h in db_replica_hosts.split(',') if h.strip()], start=1):
+    DATABASES[f'replica{index}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+        # В тестах реплика смотрит в тестовую копию основной БД
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['eigth_module.db_router.PrimaryReplicaRouter']
+REPLICA_DATABASES = [alias for alias in DATABASES if alias != 'default']
+# Максимально допустимое отставание реплики (секунды), иначе чтение с основной БД
+REPLICA_MAX_LAG = float(os.getenv('DB_REPLICA_MAX_LAG', '5'))
+# Как часто перепроверять отставание реплики (секунды)
+REPLICA_LAG_CHECK_INTERVAL = float(os.getenv('DB_REPLICA_LAG_CHECK_INTERVAL', '5'))
+# Сколько секунд после записи пользователь читает только с основной БД
+REPLICA_STICKY_SECONDS = int(os.getenv('DB_REPLICA_STICKY_SECONDS', '10'))
+
+# Секционирование платежей по месяцам (PostgreSQL, см. users.partitioning)
+# На сколько месяцев вперед создавать секции
+PAYMENT_PARTITION_MONTHS_AHEAD = int(os.getenv('PAYMENT_PARTITION_MONTHS_AHEAD', '3'))
+# Секции старше стольких месяцев переносятся в архив; 0 - не переносить
+PAYMENT_PARTITION_RETENTION_MONTHS = int(os.getenv('PAYMENT_PARTITION_RETENTION_MONTHS', '0'))
+PAYMENT_ARCHIVE_SCHEMA = os.getenv('PAYMENT_ARCHIVE_SCHEMA', 'archive')
+# Табличное пространство на медленных дисках для архивных секций (необязательно)
+PAYMENT_ARCHIVE_TABLESPACE = os.getenv('PAYMENT_ARCHIVE_TABLESPACE', '')
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -116,6 +161,20 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Хеширование паролей: предпочтительный хешер первый, остальные нужны для проверки
+# старых хешей (при входе они пересчитываются предпочтительным)
+PASSWORD_HASHERS = [
+    'users.hashers.ConfigurablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+# Число итераций PBKDF2 (по умолчанию как в Django 5.2)
+PASSWORD_PBKDF2_ITERATIONS = int(os.getenv('PASSWORD_PBKDF2_ITERATIONS', '1000000'))
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -145,13 +204,24 @@ AUTH_USER_MODEL = 'users.User'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Загрузки всегда пишутся во временный файл на диске, а не в память
+FILE_UPLOAD_HANDLERS = ['django.core.files.uploadhandler.TemporaryFileUploadHandler']
+FILE_UPLOAD_TEMP_DIR = os.getenv('FILE_UPLOAD_TEMP_DIR') or None
+# Ограничения загружаемых изображений (превью и аватарки)
+IMAGE_UPLOAD_MAX_SIZE = int(os.getenv('IMAGE_UPLOAD_MAX_SIZE', str(5 * 1024 * 1024)))
+IMAGE_MAX_DIMENSION = int(os.getenv('IMAGE_MAX_DIMENSION', '4096'))
+# Размеры уменьшенных копий в WebP (ширина, высота) и качество сжатия
+PREVIEW_THUMBNAIL_SIZE = (480, 270)
+AVATAR_THUMBNAIL_SIZE = (128, 128)
+IMAGE_THUMBNAIL_QUALITY = int(os.getenv('IMAGE_THUMBNAIL_QUALITY', '80'))
+
 # Static files
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
 # DRF settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -160,17 +230,37 @@ REST_FRAMEWORK = {
         'django_filters.rest_framework.DjangoFilterBackend',
         'rest_framework.filters.OrderingFilter',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    # Скользящее окно в Redis (users.ratelimit); платежи и подписки ограничиваются отдельно
+    'DEFAULT_THROTTLE_CLASSES': [
+        'users.ratelimit.ReadWriteThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'read': os.getenv('THROTTLE_RATE_READ', '600/min'),
+        'write': os.getenv('THROTTLE_RATE_WRITE', '120/min'),
+        'subscription': os.getenv('THROTTLE_RATE_SUBSCRIPTION', '10/min'),
+        'payment_create': os.getenv('THROTTLE_RATE_PAYMENT_CREATE', '10/min'),
+    },
+    'DEFAULT_PAGINATION_CLASS': 'eigth_module.pagination.EstimatedCountPageNumberPagination',
     'PAGE_SIZE': 10,
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
 }
 
+# С какой оценки числа строк пагинация отдает оценку PostgreSQL (reltuples/EXPLAIN), а не COUNT(*)
+ESTIMATED_COUNT_THRESHOLD = int(os.getenv('ESTIMATED_COUNT_THRESHOLD', '100000'))
+
 # JWT settings
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=1),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
     'ROTATE_REFRESH_TOKENS': True,
+    'TOKEN_OBTAIN_SERIALIZER': 'users.serializers.ClaimsTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'users.serializers.VersionedTokenRefreshSerializer',
 }
+# Сколько секунд пользователь из токена берется из кеша процесса без запроса к БД
+AUTH_USER_CACHE_TTL = int(os.getenv('AUTH_USER_CACHE_TTL', '30'))
+AUTH_USER_CACHE_SIZE = int(os.getenv('AUTH_USER_CACHE_SIZE', '10000'))
+# Сколько записей об истекших refresh-токенах в памяти процесса удаляется за одну запись токена
+REFRESH_TOKEN_PRUNE_BATCH_SIZE = int(os.getenv('REFRESH_TOKEN_PRUNE_BATCH_SIZE', '1000'))
 
 # drf-spectacular settings
 SPECTACULAR_SETTINGS = {
@@ -180,10 +270,59 @@ SPECTACULAR_SETTINGS = {
     'SERVE_INCLUDE_SCHEMA': False,
     'COMPONENT_SPLIT_REQUEST': True,
 }
+# Собранная схема OpenAPI (python manage.py build_openapi_schema)
+OPENAPI_SCHEMA_FILE = Path(os.getenv('OPENAPI_SCHEMA_FILE', BASE_DIR / 'build' / 'openapi.json'))
 
 # Stripe settings
 STRIPE_SECRET_KEY = os.getenv('STRIPE_SECRET_KEY', '')
 STRIPE_PUBLISHABLE_KEY = os.getenv('STRIPE_PUBLISHABLE_KEY', '')
+# Создание сессии оплаты в фоновой задаче Celery (ответ сразу со статусом pending)
+STRIPE_CHECKOUT_ASYNC = os.getenv('STRIPE_CHECKOUT_ASYNC', '0') == '1'
+# Ограничения long-poll ожидания ссылки на оплату в эндпоинте статуса (секунды)
+PAYMENT_STATUS_MAX_WAIT = int(os.getenv('PAYMENT_STATUS_MAX_WAIT', '20'))
+PAYMENT_STATUS_POLL_INTERVAL = float(os.getenv('PAYMENT_STATUS_POLL_INTERVAL', '0.5'))
+# Лимит проверок статуса платежа на пользователя: токенов в секунду (> 0) и размер запаса (>= 1)
+PAYMENT_STATUS_RATE = float(os.getenv('PAYMENT_STATUS_RATE', '1'))
+PAYMENT_STATUS_BURST = int(os.getenv('PAYMENT_STATUS_BURST', '10'))
+# Окно, в течение которого запросы статуса одного платежа делят один ответ Stripe (секунды)
+PAYMENT_STATUS_COALESCE_WINDOW = float(os.getenv('PAYMENT_STATUS_COALESCE_WINDOW', '2'))
+
+# Redis для общих ограничителей частоты запросов (пусто - хранение в памяти процесса)
+REDIS_URL = os.getenv('REDIS_URL', '')
+
+# Cache
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Время жизни кеша ленты "мои курсы" (секунды)
+MY_COURSES_CACHE_TIMEOUT = int(os.getenv('MY_COURSES_CACHE_TIMEOUT', '300'))
+# Время жизни кеша оплаченных курсов и уроков пользователя (секунды)
+ENTITLEMENTS_CACHE_TIMEOUT = int(os.getenv('ENTITLEMENTS_CACHE_TIMEOUT', '600'))
+# Рекомендации "подписчики этого курса подписаны также на": сколько курсов хранить
+COURSE_RECOMMENDATIONS_TOP_K = int(os.getenv('COURSE_RECOMMENDATIONS_TOP_K', '10'))
+# Пользователи с большим числом подписок не учитываются (их пары дают квадратичный рост)
+COURSE_RECOMMENDATIONS_MAX_USER_COURSES = int(os.getenv('COURSE_RECOMMENDATIONS_MAX_USER_COURSES', '200'))
+
+# Server-sent events (/api/events/)
+# Интервал пинга простаивающего соединения (секунды)
+SSE_HEARTBEAT_SECONDS = float(os.getenv('SSE_HEARTBEAT_SECONDS', '15'))
+# Через сколько миллисекунд EventSource переподключается после обрыва
+SSE_RETRY_MILLISECONDS = int(os.getenv('SSE_RETRY_MILLISECONDS', '5000'))
+# Как часто открытый поток проверяет, что пользователь активен и токены не отозваны (секунды)
+SSE_ACCESS_CHECK_SECONDS = float(os.getenv('SSE_ACCESS_CHECK_SECONDS', '60'))
+# Сколько непрочитанных событий хранится для одного соединения
+SSE_QUEUE_SIZE = int(os.getenv('SSE_QUEUE_SIZE', '100'))
 
 # Celery settings
 CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', 'redis://localhost:6379/0')
@@ -197,9 +336,32 @@ CELERY_TIMEZONE = TIME_ZONE
 CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60  # 30 минут
 CELERY_TASK_SOFT_TIME_LIMIT = 60 * 60  # 1 час
+# Воркер не закрывает соединения с БД после каждой задачи, а переиспользует их
+# (устаревшие и сломанные соединения закрываются по CONN_MAX_AGE в eigth_module/celery.py)
+CELERY_DB_REUSE_MAX = int(os.getenv('CELERY_DB_REUSE_MAX', '1000'))
+# Порт HTTP-эндпоинта /metrics воркера в формате Prometheus (пусто - не запускать)
+CELERY_METRICS_PORT = os.getenv('CELERY_METRICS_PORT', '')
+
+# Окно изменений, в течение которого повторные уведомления о курсе/уроке отбрасываются (секунды)
+NOTIFICATION_DEDUPE_WINDOW = int(os.getenv('NOTIFICATION_DEDUPE_WINDOW', '300'))
+# Через сколько секунд переданное, но не обработанное уведомление передается повторно
+NOTIFICATION_REDISPATCH_AFTER = int(os.getenv('NOTIFICATION_REDISPATCH_AFTER', '600'))
+# Сколько секунд воркер владеет захваченным уведомлением; после упавшего воркера
+# захват истекает, и ретранслятор передает уведомление снова
+NOTIFICATION_CLAIM_TIMEOUT = int(os.getenv('NOTIFICATION_CLAIM_TIMEOUT', '300'))
+# После скольких неудачных запусков задачи (с исчерпанными ретраями) уведомление больше не передается
+NOTIFICATION_MAX_ATTEMPTS = int(os.getenv('NOTIFICATION_MAX_ATTEMPTS', '5'))
+
+# Задержка перед повторной отправкой уведомления после ошибки SMTP (секунды)
+NOTIFICATION_RETRY_DELAY = int(os.getenv('NOTIFICATION_RETRY_DELAY', '60'))
+# Период, за который собирается дайджест уведомлений (часы)
+NOTIFICATION_DIGEST_PERIOD_HOURS = int(os.getenv('NOTIFICATION_DIGEST_PERIOD_HOURS', '24'))
 
 # Email settings
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+# Для локальной работы без SMTP: django.core.mail.backends.console.EmailBackend
+# или django.core.mail.backends.filebased.EmailBackend (письма в EMAIL_FILE_PATH)
+EMAIL_BACKEND = os.getenv('EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
+EMAIL_FILE_PATH = os.getenv('EMAIL_FILE_PATH', str(BASE_DIR / 'sent_emails'))
 EMAIL_HOST = os.getenv('EMAIL_HOST', 'smtp.gmail.com')
 EMAIL_PORT = int(os.getenv('EMAIL_PORT', '587'))
 EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS', 'True').lower() == 'true'
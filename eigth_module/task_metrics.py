@@ -0,0 +1,250 @@
+"""
+Метрики задач Celery в формате Prometheus.
+
+Счетчики собираются обработчиками сигналов Celery. Если задан REDIS_URL,
+они хранятся в Redis (хеш metrics:task:<имя задачи>) и видны из всех
+процессов prefork-пула: одно событие задачи - один pipeline из HINCRBY.
+Без Redis счетчики живут в памяти процесса (для тестов и разработки), и
+эндпоинт /metrics не запускается - главный процесс воркера не видит, что
+насчитали дочерние. Воркер отдает метрики по HTTP на CELERY_METRICS_PORT.
+
+Задачи возвращают словарь с ключами status и message; уведомления
+дополнительно сообщают recipients, из которого считается скорость рассылки.
+"""
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from celery import signals
+
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.05, 0.1, 0.5, 1, 5, 30, 60, 300)
+STATES = ('success', 'failure', 'retry')
+PUBLISHED_AT_HEADER = 'published_at'
+
+_started_at = {}
+
+# Счетчики процесса без Redis: имя задачи -> поле -> значение
+_local_metrics = defaultdict(dict)
+_local_lock = threading.Lock()
+
+
+def task_result(status: str, message: str, **extra) -> dict:
+    """Структурированный результат задачи: машинный статус, текст и числовые поля"""
+    return {'status': status, 'message': message, **extra}
+
+
+def get_redis_client():
+    # Модуль импортируется из eigth_module.celery до настройки Django
+    from users.ratelimit import get_redis_client
+    return get_redis_client()
+
+
+def _key(task_name) -> str:
+    return f'metrics:task:{task_name}'
+
+
+def _field(*parts) -> str:
+    return ':'.join(str(part) for part in parts)
+
+
+def _record(task_name, increments, gauges=None):
+    """Увеличивает счетчики и выставляет значения задачи за одно обращение к Redis"""
+    client = get_redis_client()
+    if client is not None:
+        pipe = client.pipeline(transaction=False)
+        for field, delta in increments.items():
+            pipe.hincrby(_key(task_name), field, delta)
+        if gauges:
+            pipe.hset(_key(task_name), mapping=gauges)
+        pipe.execute()
+        return
+
+    with _local_lock:
+        metrics = _local_metrics[task_name]
+        for field, delta in increments.items():
+            metrics[field] = metrics.get(field, 0) + delta
+        metrics.update(gauges or {})
+
+
+def _parse(value):
+    value = value.decode() if isinstance(value, bytes) else value
+    try:
+        return int(value)
+    except ValueError:
+        return float(value)
+
+
+def _read(task_names) -> dict:
+    """Значения метрик задач: имя задачи -> поле -> значение"""
+    client = get_redis_client()
+    if client is not None:
+        pipe = client.pipeline(transaction=False)
+        for name in task_names:
+            pipe.hgetall(_key(name))
+        return {
+            name: {field.decode(): _parse(value) for field, value in values.items()}
+            for name, values in zip(task_names, pipe.execute())
+        }
+
+    with _local_lock:
+        return {name: dict(_local_metrics.get(name, {})) for name in task_names}
+
+
+def clear_metrics():
+    """Сбрасывает счетчики в памяти процесса"""
+    with _local_lock:
+        _local_metrics.clear()
+
+
+def is_metrics_storage_shared() -> bool:
+    """Видны ли счетчики дочерних процессов воркера из главного (хранятся в Redis)"""
+    return get_redis_client() is not None
+
+
+def _observe(increments: Counter, name, seconds, buckets=None):
+    """Добавляет наблюдение гистограммы (сумма хранится в микросекундах)"""
+    increments[_field(name, 'count')] += 1
+    increments[_field(name, 'sum_us')] += int(seconds * 1_000_000)
+    for bucket in buckets or ():
+        if seconds <= bucket:
+            increments[_field(name, 'bucket', bucket)] += 1
+
+
+def record_task_result(task_name, state, duration=None, retval=None):
+    """Учитывает завершение задачи: состояние, длительность и число получателей"""
+    increments = Counter({_field('runs', state): 1})
+    gauges = {}
+    if duration is not None:
+        _observe(increments, 'duration', duration, DURATION_BUCKETS)
+    if isinstance(retval, dict) and retval.get('recipients'):
+        recipients = retval['recipients']
+        increments['recipients'] += recipients
+        if duration:
+            gauges['recipients_per_second'] = recipients / duration
+    _record(task_name, increments, gauges)
+
+
+def record_smtp_error(task_name):
+    """Учитывает ошибку SMTP при отправке уведомлений"""
+    _record(task_name, {'smtp_errors': 1})
+
+
+@signals.before_task_publish.connect
+def add_published_at_header(headers=None, **kwargs):
+    """Ставит время публикации, чтобы воркер посчитал время ожидания в очереди"""
+    if headers is not None:
+        headers.setdefault(PUBLISHED_AT_HEADER, time.time())
+
+
+@signals.task_prerun.connect
+def on_task_prerun(task_id=None, task=None, **kwargs):
+    _started_at[task_id] = time.monotonic()
+    published_at = getattr(task.request, PUBLISHED_AT_HEADER, None)
+    if published_at:
+        increments = Counter()
+        _observe(increments, 'queue_wait', max(0.0, time.time() - float(published_at)), DURATION_BUCKETS)
+        _record(task.name, increments)
+
+
+@signals.task_postrun.connect
+def on_task_postrun(task_id=None, task=None, retval=None, state=None, **kwargs):
+    started_at = _started_at.pop(task_id, None)
+    duration = time.monotonic() - started_at if started_at is not None else None
+    if state == 'SUCCESS':
+        record_task_result(task.name, 'success', duration, retval)
+    elif state == 'FAILURE':
+        record_task_result(task.name, 'failure', duration)
+
+
+@signals.task_retry.connect
+def on_task_retry(sender=None, **kwargs):
+    record_task_result(sender.name, 'retry')
+
+
+def _format_value(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(int(value))
+
+
+def render_prometheus(task_names) -> str:
+    """Текст метрик в формате Prometheus для перечисленных задач"""
+    task_names = sorted(task_names)
+    values = _read(task_names)
+
+    def get(name, *parts):
+        return values[name].get(_field(*parts), 0)
+
+    lines = [
+        '# HELP celery_task_runs_total Завершенные запуски задач по состояниям',
+        '# TYPE celery_task_runs_total counter',
+    ]
+    for name in task_names:
+        for state in STATES:
+            lines.append(f'celery_task_runs_total{{task="{name}",state="{state}"}} {get(name, "runs", state)}')
+
+    for metric, title in (('duration', 'Длительность выполнения задачи'),
+                          ('queue_wait', 'Время ожидания задачи в очереди')):
+        full_name = f'celery_task_{metric}_seconds'
+        lines += [f'# HELP {full_name} {title}', f'# TYPE {full_name} histogram']
+        for name in task_names:
+            for bucket in DURATION_BUCKETS:
+                lines.append(f'{full_name}_bucket{{task="{name}",le="{bucket}"}} {get(name, metric, "bucket", bucket)}')
+            count = get(name, metric, 'count')
+            lines.append(f'{full_name}_bucket{{task="{name}",le="+Inf"}} {count}')
+            lines.append(f'{full_name}_sum{{task="{name}"}} {get(name, metric, "sum_us") / 1_000_000!r}')
+            lines.append(f'{full_name}_count{{task="{name}"}} {count}')
+
+    for metric, metric_type, title in (
+        ('recipients', 'counter', 'Получатели отправленных уведомлений'),
+        ('recipients_per_second', 'gauge', 'Скорость последней рассылки, получателей в секунду'),
+        ('smtp_errors', 'counter', 'Ошибки SMTP при отправке уведомлений'),
+    ):
+        full_name = f'notification_{metric}' + ('_total' if metric_type == 'counter' else '')
+        lines += [f'# HELP {full_name} {title}', f'# TYPE {full_name} {metric_type}']
+        for name in task_names:
+            lines.append(f'{full_name}{{task="{name}"}} {_format_value(get(name, metric))}')
+
+    return '\n'.join(lines) + '\n'
+
+
+def get_project_task_names(app) -> list:
+    """Задачи проекта (без встроенных задач Celery)"""
+    return [name for name in app.tasks if not name.startswith('celery.')]
+
+
+def start_metrics_server(app, port: int):
+    """
+    Запускает HTTP-сервер /metrics в фоновом потоке процесса воркера
+
+    Returns:
+        ThreadingHTTPServer | None: None, если счетчики не общие для процессов (нет REDIS_URL)
+    """
+    if not is_metrics_storage_shared():
+        logger.error(
+            'Эндпоинт /metrics не запущен: без REDIS_URL счетчики дочерних процессов воркера '
+            'не видны главному процессу'
+        )
+        return None
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = render_prometheus(get_project_task_names(app)).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('0.0.0.0', port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name='celery-metrics', daemon=True).start()
+    return server
@@ -18,20 +18,38 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
-from drf_spectacular.views import (
-    SpectacularAPIView,
-    SpectacularRedocView,
-    SpectacularSwaggerView,
-)
+from django.utils.module_loading import import_string
+from django.views.decorators.csrf import csrf_exempt
+
+from .openapi import CachedSchemaView
+
+
+def lazy_view(dotted_path: str, **initkwargs):
+    """
+    Представление, класс которого импортируется при первом запросе.
+    Генератор схемы drf_spectacular не нужен при загрузке URLconf
+    в каждом воркере и management-команде.
+    """
+    view = None
+
+    @csrf_exempt
+    def wrapper(request, *args, **kwargs):
+        nonlocal view
+        if view is None:
+            view = import_string(dotted_path).as_view(**initkwargs)
+        return view(request, *args, **kwargs)
+
+    return wrapper
+
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('lms.urls')),
     path('api/', include('users.urls')),
     # Документация API
-    path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
-    path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
-    path('api/redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc'),
+    path('api/schema/', CachedSchemaView.as_view(), name='schema'),
+    path('api/docs/', lazy_view('drf_spectacular.views.SpectacularSwaggerView', url_name='schema'), name='swagger-ui'),
+    path('api/redoc/', lazy_view('drf_spectacular.views.SpectacularRedocView', url_name='schema'), name='redoc'),
 ]
 
 # Раздача медиафайлов в режиме разработки
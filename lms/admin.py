@@ -1,27 +1,74 @@
 from django.contrib import admin
-from .models import Course, Lesson, CourseSubscription
+
+from eigth_module.pagination import EstimatedCountPaginator
+from .models import Course, Lesson, CourseSubscription, NotificationOutbox, SubscriptionEvent
+
+
+# Списки по большим таблицам: без точного COUNT(*) и без подсчета всех строк
+# для надписи "N из M" при фильтрации. Фильтры по курсам, урокам и пользователям
+# не выводятся в боковой панели (она загружала бы все записи) - вместо них поиск
+# и ссылки вида ?course__id__exact=<id>
 
 
 @admin.register(Course)
 class CourseAdmin(admin.ModelAdmin):
     list_display = ('title', 'owner', 'description')
-    list_filter = ('title', 'owner')
+    list_select_related = ('owner',)
     search_fields = ('title', 'description')
-    raw_id_fields = ('owner',)
+    autocomplete_fields = ('owner',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 @admin.register(Lesson)
 class LessonAdmin(admin.ModelAdmin):
     list_display = ('title', 'course', 'owner', 'video_link')
-    list_filter = ('course', 'owner')
-    search_fields = ('title', 'description')
-    raw_id_fields = ('course', 'owner')
+    list_select_related = ('course', 'owner')
+    search_fields = ('title', 'description', 'course__title')
+    autocomplete_fields = ('course', 'owner')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        # Lesson.__str__ использует название курса (в том числе в автодополнении)
+        return super().get_queryset(request).select_related('course')
 
 
 @admin.register(CourseSubscription)
 class CourseSubscriptionAdmin(admin.ModelAdmin):
     list_display = ('user', 'course', 'created_at')
-    list_filter = ('course', 'user')
+    list_select_related = ('user', 'course')
     search_fields = ('user__email', 'course__title')
-    raw_id_fields = ('user', 'course')
+    autocomplete_fields = ('user', 'course')
+    date_hierarchy = 'created_at'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(SubscriptionEvent)
+class SubscriptionEventAdmin(admin.ModelAdmin):
+    """Журнал подписок только для чтения: записи не меняются и не удаляются"""
+    list_display = ('id', 'kind', 'user_id', 'course_id', 'occurred_at')
+    list_filter = ('kind',)
+    search_fields = ('=user_id', '=course_id')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
 
+@admin.register(NotificationOutbox)
+class NotificationOutboxAdmin(admin.ModelAdmin):
+    list_display = ('dedupe_key', 'kind', 'created_at', 'dispatched_at', 'claimed_at', 'processed_at', 'attempts', 'failed_at')
+    list_filter = ('kind',)
+    search_fields = ('dedupe_key',)
+    raw_id_fields = ('course', 'lesson')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
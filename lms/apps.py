@@ -6,3 +6,5 @@ class LmsConfig(AppConfig):
     name = 'lms'
     verbose_name = 'Система управления обучением'
 
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,106 @@
+"""
+Рендеринг и отправка писем об обновлениях курсов.
+
+Шаблоны (lms/templates/lms/emails/<name>_subject.txt и <name>_body.txt)
+компилируются один раз на процесс. Письма отправляются пачкой по одному
+SMTP-соединению (как send_mass_mail), каждому получателю - свое письмо;
+при обрыве известно, сколько писем из начала пачки уже ушло.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.template.loader import get_template
+
+
+class DeliveryInterrupted(Exception):
+    """Отправка пачки прервана ошибкой error после sent писем из ее начала"""
+
+    def __init__(self, sent: int, error: Exception):
+        super().__init__(f'Отправлено писем: {sent}, затем ошибка: {error}')
+        self.sent = sent
+        self.error = error
+
+
+_compiled_templates = {}
+
+
+def _get_compiled(name: str):
+    template = _compiled_templates.get(name)
+    if template is None:
+        template = _compiled_templates[name] = get_template(f'lms/emails/{name}.txt')
+    return template
+
+
+def render_email(name: str, context: dict) -> tuple:
+    """
+    Рендерит тему и текст письма по имени шаблона
+
+    Returns:
+        tuple: Тема (одна строка) и текст письма
+    """
+    subject = ' '.join(_get_compiled(f'{name}_subject').render(context).split())
+    body = _get_compiled(f'{name}_body').render(context)
+    return subject, body
+
+
+def build_messages(name: str, context: dict, recipients) -> list:
+    """Одинаковое письмо для каждого получателя в формате send_mass_mail"""
+    subject, body = render_email(name, context)
+    return [(subject, body, settings.DEFAULT_FROM_EMAIL, [email]) for email in recipients]
+
+
+def send_messages(messages) -> int:
+    """
+    Отправляет письма (кортежи формата send_mass_mail) по одному соединению
+
+    Returns:
+        int: Количество отправленных писем
+
+    Raises:
+        DeliveryInterrupted: Ошибка после отправки части писем
+    """
+    if not messages:
+        return 0
+    connection = get_connection(fail_silently=False)
+    sent = 0
+    try:
+        with connection:
+            for subject, body, from_email, recipients in messages:
+                connection.send_messages([EmailMessage(subject, body, from_email, recipients)])
+                sent += 1
+    except Exception as e:
+        raise DeliveryInterrupted(sent, e) from e
+    return sent
+
+
+def build_digest_messages(entries, subscriptions) -> list:
+    """
+    Собирает по одному письму-дайджесту на пользователя
+
+    Args:
+        entries: Записи NotificationOutbox за период (с course и lesson)
+        subscriptions: Подписки пользователей-получателей дайджеста (с user)
+
+    Returns:
+        list: Письма в формате send_mass_mail
+    """
+    updates_by_course = defaultdict(list)
+    for entry in entries:
+        updates_by_course[entry.course_id].append(entry)
+
+    users = {}
+    updates_by_user = defaultdict(list)
+    for subscription in subscriptions:
+        users[subscription.user_id] = subscription.user
+        updates_by_user[subscription.user_id].extend(updates_by_course.get(subscription.course_id, []))
+
+    messages = []
+    for user_id, updates in updates_by_user.items():
+        user = users[user_id]
+        if not updates or not user.email:
+            continue
+        updates.sort(key=lambda entry: entry.created_at)
+        subject, body = render_email('digest', {'user': user, 'updates': updates})
+        messages.append((subject, body, settings.DEFAULT_FROM_EMAIL, [user.email]))
+    return messages
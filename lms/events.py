@@ -0,0 +1,207 @@
+"""
+Push-события об изменениях курсов и уроков (server-sent events).
+
+Изменения публикуются после коммита из тех же мест, что ставят уведомления
+в outbox (perform_update курсов и уроков). Если задан REDIS_URL, событие
+уходит в Redis pub/sub и доходит до всех ASGI-воркеров; иначе доставляется
+подписчикам текущего процесса (для тестов и разработки).
+
+Каждый ASGI-воркер держит одно соединение с Redis (PSUBSCRIBE на каналы
+всех курсов) и раздает события открытым SSE-соединениям через их очереди:
+простаивающее соединение - это одна корутина и пустая asyncio.Queue,
+без потока и без своего соединения с Redis.
+
+Поток живет не дольше access-токена, по которому открыт, и закрывается
+раньше, если пользователь заблокирован или его токены отозваны
+(проверка раз в SSE_ACCESS_CHECK_SECONDS).
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from users.ratelimit import get_redis_client
+
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = 'lms:events:course:'
+# Последнее сообщение потока: клиент должен обновить токен и переподключиться
+ACCESS_EXPIRED_EVENT = 'event: access_expired\ndata: {}\n\n'
+
+
+def _put_latest(queue, payload):
+    """Кладет событие в очередь; у медленного клиента отбрасываются самые старые"""
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(payload)
+
+
+class Subscription:
+    """Очередь событий одного SSE-соединения по набору курсов"""
+
+    def __init__(self, hub, course_ids, maxsize):
+        self.hub = hub
+        self.course_ids = frozenset(course_ids)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    async def get(self) -> str:
+        return await self.queue.get()
+
+    def close(self):
+        self.hub.unsubscribe(self)
+
+
+class EventHub:
+    """Подписчики процесса: ID курса -> открытые SSE-соединения"""
+
+    def __init__(self):
+        self._subscriptions = defaultdict(set)
+        self._lock = threading.Lock()
+        self._listeners = {}
+
+    def subscribe(self, course_ids) -> Subscription:
+        """Регистрирует соединение; вызывается из корутины ASGI-воркера"""
+        subscription = Subscription(self, course_ids, settings.SSE_QUEUE_SIZE)
+        with self._lock:
+            for course_id in subscription.course_ids:
+                self._subscriptions[course_id].add(subscription)
+        if settings.REDIS_URL:
+            self._ensure_listener(subscription.loop)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for course_id in subscription.course_ids:
+                subscribers = self._subscriptions.get(course_id)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscriptions[course_id]
+
+    def publish(self, course_id, event: dict):
+        """Публикует событие курса (в Redis или подписчикам процесса)"""
+        payload = json.dumps(event)
+        client = get_redis_client()
+        if client is not None:
+            client.publish(f'{CHANNEL_PREFIX}{course_id}', payload)
+        else:
+            self.deliver(course_id, payload)
+
+    def deliver(self, course_id, payload: str):
+        """Раздает событие соединениям процесса (потокобезопасно)"""
+        with self._lock:
+            subscribers = list(self._subscriptions.get(course_id, ()))
+        for subscription in subscribers:
+            subscription.loop.call_soon_threadsafe(_put_latest, subscription.queue, payload)
+
+    def _ensure_listener(self, loop):
+        with self._lock:
+            listener = self._listeners.get(loop)
+            if listener is None or listener.done():
+                self._listeners[loop] = loop.create_task(self._listen())
+
+    async def _listen(self):
+        """Читает события всех курсов из Redis pub/sub; при обрыве переподключается"""
+        import redis.asyncio
+
+        while True:
+            client = redis.asyncio.Redis.from_url(settings.REDIS_URL)
+            try:
+                async with client.pubsub() as pubsub:
+                    await pubsub.psubscribe(f'{CHANNEL_PREFIX}*')
+                    async for message in pubsub.listen():
+                        if message['type'] != 'pmessage':
+                            continue
+                        course_id = int(message['channel'].decode().rsplit(':', 1)[1])
+                        self.deliver(course_id, message['data'].decode())
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning('Соединение с Redis pub/sub потеряно, переподключение', exc_info=True)
+                await asyncio.sleep(1)
+            finally:
+                await client.aclose()
+
+    def clear(self):
+        """Сбрасывает подписчиков процесса"""
+        with self._lock:
+            self._subscriptions.clear()
+
+
+event_hub = EventHub()
+
+
+def broadcast_update(kind: str, course_id, lesson_id=None):
+    """
+    После коммита публикует событие об изменении курса или урока
+
+    Args:
+        kind: Тип события (NotificationOutbox.KIND_*)
+        course_id: ID курса
+        lesson_id: ID урока (для событий урока)
+    """
+    event = {
+        'type': kind,
+        'course': course_id,
+        'lesson': lesson_id,
+        'updated_at': timezone.now().isoformat(),
+    }
+
+    def publish():
+        try:
+            event_hub.publish(course_id, event)
+        except Exception:
+            # Push - дополнительный канал: клиент получит изменения при следующем запросе
+            logger.warning('Не удалось опубликовать событие курса %s', course_id, exc_info=True)
+
+    transaction.on_commit(publish)
+
+
+def format_event(payload: str) -> str:
+    """Сообщение SSE: тип события и данные в JSON"""
+    event_type = json.loads(payload)['type']
+    return f'event: {event_type}\ndata: {payload}\n\n'
+
+
+async def stream_events(course_ids, expires_at=None, check_access=None):
+    """
+    Поток SSE для соединения: события курсов и комментарии-пинги каждые
+    SSE_HEARTBEAT_SECONDS, чтобы прокси не закрывали простаивающее соединение
+
+    Args:
+        course_ids: ID курсов, события которых получает соединение
+        expires_at: Время истечения токена (unix time), после него поток закрывается
+        check_access: Корутина без аргументов, вызывается раз в SSE_ACCESS_CHECK_SECONDS;
+            False - доступ отозван, поток закрывается
+    """
+    subscription = event_hub.subscribe(course_ids)
+    checked_at = time.monotonic()
+    try:
+        yield f'retry: {settings.SSE_RETRY_MILLISECONDS}\n\n'
+        while True:
+            timeout = settings.SSE_HEARTBEAT_SECONDS
+            if expires_at is not None:
+                timeout = max(0, min(timeout, expires_at - time.time()))
+            try:
+                payload = await asyncio.wait_for(subscription.get(), timeout)
+            except asyncio.TimeoutError:
+                payload = None
+
+            if expires_at is not None and time.time() >= expires_at:
+                break
+            if check_access is not None and time.monotonic() - checked_at >= settings.SSE_ACCESS_CHECK_SECONDS:
+                checked_at = time.monotonic()
+                if not await check_access():
+                    break
+            yield ': ping\n\n' if payload is None else format_event(payload)
+        yield ACCESS_EXPIRED_EVENT
+    finally:
+        subscription.close()
@@ -0,0 +1,21 @@
+# Generated manually
+
+from django.db import migrations, models
+
+from eigth_module.migration_operations import AddIndexConcurrentlyIfPostgres
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY нельзя выполнять внутри транзакции
+    atomic = False
+
+    dependencies = [
+        ('lms', '0004_add_updated_at_fields'),
+    ]
+
+    operations = [
+        AddIndexConcurrentlyIfPostgres(
+            model_name='lesson',
+            index=models.Index(fields=['course', 'updated_at'], name='lms_lesson_course_upd_idx'),
+        ),
+    ]
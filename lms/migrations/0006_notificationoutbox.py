@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms', '0005_lesson_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('course_update', 'Обновление курса'), ('lesson_update', 'Обновление урока')], max_length=20, verbose_name='Тип уведомления')),
+                ('dedupe_key', models.CharField(max_length=100, unique=True, verbose_name='Ключ дедупликации')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('dispatched_at', models.DateTimeField(blank=True, null=True, verbose_name='Дата передачи в очередь')),
+                ('processed_at', models.DateTimeField(blank=True, null=True, verbose_name='Дата обработки')),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notification_outbox', to='lms.course', verbose_name='Курс')),
+                ('lesson', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='notification_outbox', to='lms.lesson', verbose_name='Урок')),
+            ],
+            options={
+                'verbose_name': 'Уведомление в очереди',
+                'verbose_name_plural': 'Очередь уведомлений',
+                'indexes': [models.Index(condition=models.Q(('processed_at__isnull', True)), fields=['created_at'], name='lms_outbox_pending_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:07
+
+import eigth_module.images
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms', '0006_notificationoutbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='preview_thumbnail',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='courses/thumbs/', verbose_name='Уменьшенное превью'),
+        ),
+        migrations.AddField(
+            model_name='lesson',
+            name='preview_thumbnail',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='lessons/thumbs/', verbose_name='Уменьшенное превью'),
+        ),
+        migrations.AlterField(
+            model_name='course',
+            name='preview',
+            field=models.ImageField(blank=True, null=True, upload_to='courses/', validators=[eigth_module.images.validate_image_upload], verbose_name='Превью'),
+        ),
+        migrations.AlterField(
+            model_name='lesson',
+            name='preview',
+            field=models.ImageField(blank=True, null=True, upload_to='lessons/', validators=[eigth_module.images.validate_image_upload], verbose_name='Превью'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated manually
+
+import re
+
+from django.db import migrations, models
+
+
+# Копия lms.validators.YOUTUBE_VIDEO_RE: миграция не зависит от кода приложения
+YOUTUBE_VIDEO_RE = re.compile(
+    r'(?:https?://)?'
+    r'(?:'
+    r'(?:www\.|m\.|music\.)?youtube\.com/'
+    r'(?:watch/?\?(?:[^#\s]*&)?v=|embed/|shorts/|live/|v/)'
+    r'|youtu\.be/'
+    r')'
+    r'([A-Za-z0-9_-]{11})'
+    r'(?![A-Za-z0-9_-])',
+    re.IGNORECASE,
+)
+
+
+def fill_video_ids(apps, schema_editor):
+    Lesson = apps.get_model('lms', 'Lesson')
+    lessons = list(Lesson.objects.exclude(video_link__isnull=True).exclude(video_link='').only('id', 'video_link'))
+    for lesson in lessons:
+        match = YOUTUBE_VIDEO_RE.match(lesson.video_link.strip())
+        lesson.video_id = match.group(1) if match else ''
+    Lesson.objects.bulk_update(lessons, ['video_id'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms', '0007_image_thumbnails'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lesson',
+            name='video_id',
+            field=models.CharField(blank=True, default='', editable=False, max_length=11, verbose_name='ID видео YouTube'),
+        ),
+        migrations.RunPython(fill_video_ids, migrations.RunPython.noop),
+    ]
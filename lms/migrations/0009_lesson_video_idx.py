@@ -0,0 +1,23 @@
+# Generated manually
+
+from django.db import migrations, models
+
+from eigth_module.migration_operations import AddIndexConcurrentlyIfPostgres
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY нельзя выполнять внутри транзакции
+    atomic = False
+
+    dependencies = [
+        ('lms', '0008_lesson_video_id'),
+    ]
+
+    operations = [
+        AddIndexConcurrentlyIfPostgres(
+            model_name='lesson',
+            index=models.Index(
+                condition=~models.Q(video_id=''), fields=['video_id'], name='lms_lesson_video_idx'
+            ),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated manually
+
+import datetime
+
+from django.db import migrations, models
+
+
+# Копия lms.subscriptions.EVENT_EPOCH: миграция не зависит от кода приложения
+EVENT_EPOCH = datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def to_event_time(value):
+    return int((value - EVENT_EPOCH).total_seconds())
+
+
+def log_existing_subscriptions(apps, schema_editor):
+    CourseSubscription = apps.get_model('lms', 'CourseSubscription')
+    SubscriptionEvent = apps.get_model('lms', 'SubscriptionEvent')
+    subscriptions = CourseSubscription.objects.values_list('user_id', 'course_id', 'created_at').iterator()
+    SubscriptionEvent.objects.bulk_create(
+        (
+            SubscriptionEvent(user_id=user_id, course_id=course_id, kind=1, occurred_at=to_event_time(created_at))
+            for user_id, course_id, created_at in subscriptions
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms', '0009_lesson_video_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubscriptionEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_id', models.IntegerField(verbose_name='ID пользователя')),
+                ('course_id', models.IntegerField(verbose_name='ID курса')),
+                ('kind', models.PositiveSmallIntegerField(choices=[(1, 'Подписка'), (2, 'Отписка')], verbose_name='Событие')),
+                ('occurred_at', models.IntegerField(verbose_name='Время события (секунды от начала эпохи журнала)')),
+            ],
+            options={
+                'verbose_name': 'Событие подписки',
+                'verbose_name_plural': 'Журнал подписок',
+                'indexes': [models.Index(fields=['course_id', 'occurred_at', 'kind'], name='lms_subevent_course_time_idx')],
+            },
+        ),
+        migrations.RunPython(log_existing_subscriptions, migrations.RunPython.noop),
+    ]
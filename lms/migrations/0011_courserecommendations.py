@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms', '0010_subscriptionevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseRecommendations',
+            fields=[
+                ('course', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='recommendations', serialize=False, to='lms.course', verbose_name='Курс')),
+                ('course_ids', models.JSONField(default=list, verbose_name='ID рекомендованных курсов')),
+                ('scores', models.JSONField(default=list, verbose_name='Оценки сходства')),
+                ('built_at', models.DateTimeField(verbose_name='Дата построения')),
+            ],
+            options={
+                'verbose_name': 'Рекомендации курса',
+                'verbose_name_plural': 'Рекомендации курсов',
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms', '0011_courserecommendations'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationoutbox',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='Неудачных попыток'),
+        ),
+        migrations.AddField(
+            model_name='notificationoutbox',
+            name='failed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Дата отказа от отправки'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms', '0012_notificationoutbox_attempts'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='subscriptionevent',
+            name='course_id',
+            field=models.BigIntegerField(verbose_name='ID курса'),
+        ),
+        migrations.AlterField(
+            model_name='subscriptionevent',
+            name='user_id',
+            field=models.BigIntegerField(verbose_name='ID пользователя'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms', '0013_subscriptionevent_bigint_ids'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationoutbox',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Дата захвата воркером'),
+        ),
+        migrations.AddField(
+            model_name='notificationoutbox',
+            name='delivered_through',
+            field=models.CharField(blank=True, default='', max_length=254, verbose_name='Последний получатель, которому ушло письмо'),
+        ),
+    ]
@@ -1,11 +1,19 @@
 from django.db import models
 from django.conf import settings
 
+from eigth_module.images import validate_image_upload
+from .validators import extract_youtube_video_id
+
 
 class Course(models.Model):
     """Модель курса"""
     title = models.CharField(max_length=200, verbose_name='Название')
-    preview = models.ImageField(upload_to='courses/', blank=True, null=True, verbose_name='Превью')
+    preview = models.ImageField(
+        upload_to='courses/', blank=True, null=True, validators=[validate_image_upload], verbose_name='Превью'
+    )
+    preview_thumbnail = models.ImageField(
+        upload_to='courses/thumbs/', blank=True, null=True, editable=False, verbose_name='Уменьшенное превью'
+    )
     description = models.TextField(blank=True, null=True, verbose_name='Описание')
     owner = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -31,8 +39,16 @@ class Lesson(models.Model):
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='lessons', verbose_name='Курс')
     title = models.CharField(max_length=200, verbose_name='Название')
     description = models.TextField(blank=True, null=True, verbose_name='Описание')
-    preview = models.ImageField(upload_to='lessons/', blank=True, null=True, verbose_name='Превью')
+    preview = models.ImageField(
+        upload_to='lessons/', blank=True, null=True, validators=[validate_image_upload], verbose_name='Превью'
+    )
+    preview_thumbnail = models.ImageField(
+        upload_to='lessons/thumbs/', blank=True, null=True, editable=False, verbose_name='Уменьшенное превью'
+    )
     video_link = models.URLField(blank=True, null=True, verbose_name='Ссылка на видео')
+    video_id = models.CharField(
+        max_length=11, blank=True, default='', editable=False, verbose_name='ID видео YouTube'
+    )
     owner = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
@@ -47,10 +63,23 @@ class Lesson(models.Model):
         verbose_name = 'Урок'
         verbose_name_plural = 'Уроки'
         ordering = ['course', 'title']
+        indexes = [
+            # Поиск недавно обновленных уроков курса перед отправкой уведомлений
+            models.Index(fields=['course', 'updated_at'], name='lms_lesson_course_upd_idx'),
+            # Поиск уроков с тем же видео (дедупликация при импорте)
+            models.Index(fields=['video_id'], condition=~models.Q(video_id=''), name='lms_lesson_video_idx'),
+        ]
 
     def __str__(self):
         return f"{self.course.title} - {self.title}"
 
+    def save(self, *args, **kwargs):
+        self.video_id = extract_youtube_video_id(self.video_link) or ''
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'video_link' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'video_id'}
+        super().save(*args, **kwargs)
+
 
 class CourseSubscription(models.Model):
     """Подписка пользователя на курс"""
@@ -77,3 +106,114 @@ class CourseSubscription(models.Model):
         return f"{self.user.email} -> {self.course.title}"
 
 
+class SubscriptionEvent(models.Model):
+    """
+    Запись журнала подписок (только добавление). CourseSubscription - проекция
+    журнала: текущее состояние подписок (см. lms.subscriptions).
+
+    Запись компактная: ID пользователя и курса - целые без внешних ключей
+    (история сохраняется после удаления пользователя или курса), время -
+    секунды от 2020-01-01 UTC (lms.subscriptions.EVENT_EPOCH) в 4-байтовом целом.
+    """
+    SUBSCRIBE = 1
+    UNSUBSCRIBE = 2
+    KIND_CHOICES = [
+        (SUBSCRIBE, 'Подписка'),
+        (UNSUBSCRIBE, 'Отписка'),
+    ]
+
+    # Первичные ключи пользователей и курсов - BigAutoField
+    user_id = models.BigIntegerField(verbose_name='ID пользователя')
+    course_id = models.BigIntegerField(verbose_name='ID курса')
+    kind = models.PositiveSmallIntegerField(choices=KIND_CHOICES, verbose_name='Событие')
+    occurred_at = models.IntegerField(verbose_name='Время события (секунды от начала эпохи журнала)')
+
+    class Meta:
+        verbose_name = 'Событие подписки'
+        verbose_name_plural = 'Журнал подписок'
+        indexes = [
+            # Число подписчиков на момент времени и отток по курсу
+            models.Index(fields=['course_id', 'occurred_at', 'kind'], name='lms_subevent_course_time_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()}: {self.user_id} -> {self.course_id}"
+
+
+class CourseRecommendations(models.Model):
+    """
+    Top-K похожих курсов по совместным подпискам (строится задачей
+    build_course_recommendations, см. lms.recommendations). Одна строка
+    на курс: рекомендации читаются по первичному ключу за O(K).
+    """
+    course = models.OneToOneField(
+        Course,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='recommendations',
+        verbose_name='Курс'
+    )
+    course_ids = models.JSONField(default=list, verbose_name='ID рекомендованных курсов')
+    scores = models.JSONField(default=list, verbose_name='Оценки сходства')
+    built_at = models.DateTimeField(verbose_name='Дата построения')
+
+    class Meta:
+        verbose_name = 'Рекомендации курса'
+        verbose_name_plural = 'Рекомендации курсов'
+
+    def __str__(self):
+        return f"{self.course_id}: {self.course_ids}"
+
+
+class NotificationOutbox(models.Model):
+    """
+    Намерение отправить уведомление, записанное в одной транзакции с изменением.
+    После коммита запись передается в Celery; dedupe_key отсекает повторы.
+    """
+    KIND_COURSE_UPDATE = 'course_update'
+    KIND_LESSON_UPDATE = 'lesson_update'
+    KIND_CHOICES = [
+        (KIND_COURSE_UPDATE, 'Обновление курса'),
+        (KIND_LESSON_UPDATE, 'Обновление урока'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, verbose_name='Тип уведомления')
+    course = models.ForeignKey(
+        Course,
+        on_delete=models.CASCADE,
+        related_name='notification_outbox',
+        verbose_name='Курс'
+    )
+    lesson = models.ForeignKey(
+        Lesson,
+        on_delete=models.CASCADE,
+        related_name='notification_outbox',
+        blank=True,
+        null=True,
+        verbose_name='Урок'
+    )
+    dedupe_key = models.CharField(max_length=100, unique=True, verbose_name='Ключ дедупликации')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')
+    dispatched_at = models.DateTimeField(blank=True, null=True, verbose_name='Дата передачи в очередь')
+    claimed_at = models.DateTimeField(blank=True, null=True, verbose_name='Дата захвата воркером')
+    processed_at = models.DateTimeField(blank=True, null=True, verbose_name='Дата обработки')
+    delivered_through = models.CharField(
+        max_length=254, blank=True, default='', verbose_name='Последний получатель, которому ушло письмо',
+    )
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name='Неудачных попыток')
+    failed_at = models.DateTimeField(blank=True, null=True, verbose_name='Дата отказа от отправки')
+
+    class Meta:
+        verbose_name = 'Уведомление в очереди'
+        verbose_name_plural = 'Очередь уведомлений'
+        indexes = [
+            # Выборка необработанных записей ретранслятором
+            models.Index(
+                fields=['created_at'],
+                condition=models.Q(processed_at__isnull=True),
+                name='lms_outbox_pending_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return self.dedupe_key
@@ -0,0 +1,172 @@
+"""
+Outbox для уведомлений о курсах и уроках.
+
+Намерение отправить уведомление записывается в NotificationOutbox в той же
+транзакции, что и изменение курса/урока, и передается в Celery только после
+коммита. Откат транзакции не порождает письмо, а повторная передача
+(ретранслятор, ретраи брокера) отсекается атомарным захватом записи воркером.
+Захват - аренда на NOTIFICATION_CLAIM_TIMEOUT секунд: processed_at ставится
+только после успешной обработки, а запись упавшего воркера после истечения
+аренды снова передается ретранслятором. Получатели отправляются по порядку
+email, последний доставленный хранится в delivered_through, поэтому ретрай
+после частичной отправки не шлет письмо тем, кто его уже получил.
+Запись, задача которой NOTIFICATION_MAX_ATTEMPTS раз завершилась ошибкой,
+помечается failed_at и ретранслятором больше не передается.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, DateTimeField, F, Q, Value, When
+from django.utils import timezone
+
+from .models import NotificationOutbox
+
+
+logger = logging.getLogger(__name__)
+
+
+def build_dedupe_key(kind: str, course_id, lesson_id=None, now=None) -> str:
+    """Ключ дедупликации: тип, курс, урок и номер окна изменений"""
+    now = now or timezone.now()
+    window = int(now.timestamp() // settings.NOTIFICATION_DEDUPE_WINDOW)
+    return f'{kind}:{course_id}:{lesson_id or 0}:{window}'
+
+
+def enqueue_notification(kind: str, course_id, lesson_id=None) -> NotificationOutbox:
+    """
+    Записывает уведомление в outbox в текущей транзакции и после коммита
+    передает его в очередь. Повтор в том же окне изменений не создает новую запись.
+
+    Args:
+        kind: Тип уведомления (NotificationOutbox.KIND_*)
+        course_id: ID курса
+        lesson_id: ID урока (для уведомлений об уроке)
+
+    Returns:
+        NotificationOutbox: Запись outbox
+    """
+    entry, created = NotificationOutbox.objects.get_or_create(
+        dedupe_key=build_dedupe_key(kind, course_id, lesson_id),
+        defaults={'kind': kind, 'course_id': course_id, 'lesson_id': lesson_id},
+    )
+    if created:
+        transaction.on_commit(lambda: dispatch_outbox_entries([entry]))
+    return entry
+
+
+def _get_task(entry):
+    from .tasks import check_and_send_lesson_update_notification, send_course_update_notification
+
+    if entry.kind == NotificationOutbox.KIND_LESSON_UPDATE:
+        return check_and_send_lesson_update_notification, (entry.lesson_id,)
+    return send_course_update_notification, (entry.course_id,)
+
+
+def dispatch_outbox_entries(entries) -> int:
+    """
+    Передает записи outbox в Celery. Если брокер недоступен, запись остается
+    неотправленной и будет передана ретранслятором позже.
+
+    Returns:
+        int: Количество переданных записей
+    """
+    dispatched = 0
+    for entry in entries:
+        task, args = _get_task(entry)
+        try:
+            task.apply_async(args=args, kwargs={'outbox_id': entry.id})
+        except Exception:
+            logger.exception('Не удалось передать уведомление %s в очередь', entry.dedupe_key)
+            continue
+        NotificationOutbox.objects.filter(id=entry.id).update(dispatched_at=timezone.now())
+        dispatched += 1
+    return dispatched
+
+
+def relay_pending_entries(batch_size: int = 500) -> int:
+    """
+    Передает в очередь записи, которые не были переданы после коммита
+    или были переданы, но так и не обработаны (потеряны брокером).
+
+    Returns:
+        int: Количество переданных записей
+    """
+    now = timezone.now()
+    redispatch_before = now - timedelta(seconds=settings.NOTIFICATION_REDISPATCH_AFTER)
+    with transaction.atomic():
+        entries = list(
+            NotificationOutbox.objects
+            .select_for_update(skip_locked=True)
+            .filter(processed_at__isnull=True, failed_at__isnull=True)
+            .exclude(dispatched_at__gte=redispatch_before)
+            .exclude(claimed_at__gte=_lease_expired_before(now))
+            .order_by('created_at')[:batch_size]
+        )
+        return dispatch_outbox_entries(entries)
+
+
+def _lease_expired_before(now):
+    return now - timedelta(seconds=settings.NOTIFICATION_CLAIM_TIMEOUT)
+
+
+def claim_outbox_entry(outbox_id) -> bool:
+    """
+    Атомарно захватывает запись на NOTIFICATION_CLAIM_TIMEOUT секунд;
+    False - запись обработана, от нее отказались или ее обрабатывает другой воркер
+    """
+    now = timezone.now()
+    return bool(
+        NotificationOutbox.objects
+        .filter(id=outbox_id, processed_at__isnull=True, failed_at__isnull=True)
+        .filter(Q(claimed_at__isnull=True) | Q(claimed_at__lt=_lease_expired_before(now)))
+        .update(claimed_at=now)
+    )
+
+
+def complete_outbox_entry(outbox_id):
+    """Помечает захваченную запись обработанной"""
+    NotificationOutbox.objects.filter(id=outbox_id).update(processed_at=timezone.now(), claimed_at=None)
+
+
+def get_delivered_through(outbox_id) -> str:
+    """Email последнего получателя, которому уже ушло письмо ('' - никому)"""
+    return (
+        NotificationOutbox.objects.filter(id=outbox_id).values_list('delivered_through', flat=True).first() or ''
+    )
+
+
+def save_delivery_progress(outbox_id, email):
+    """Запоминает последнего получателя перед ретраем частично отправленной рассылки"""
+    NotificationOutbox.objects.filter(id=outbox_id).update(delivered_through=email)
+
+
+def release_outbox_entry(outbox_id, failed=False):
+    """
+    Снимает захват после ошибки, чтобы ретрай или ретранслятор повторили отправку
+
+    Args:
+        outbox_id: ID записи outbox
+        failed: Задача завершилась ошибкой (а не ушла на ретрай): попытка
+            засчитывается, на NOTIFICATION_MAX_ATTEMPTS-й запись помечается failed_at
+    """
+    updates = {'claimed_at': None}
+    if failed:
+        updates['attempts'] = F('attempts') + 1
+        # В UPDATE справа используется значение attempts до увеличения
+        updates['failed_at'] = Case(
+            When(attempts__gte=settings.NOTIFICATION_MAX_ATTEMPTS - 1, then=Value(timezone.now())),
+            default=None,
+            output_field=DateTimeField(),
+        )
+    NotificationOutbox.objects.filter(id=outbox_id).update(**updates)
+
+
+def prune_processed_entries(older_than_days: int = 7) -> int:
+    """Удаляет давно обработанные записи и записи, от отправки которых отказались"""
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    deleted, _ = NotificationOutbox.objects.filter(
+        Q(processed_at__lt=cutoff) | Q(failed_at__lt=cutoff)
+    ).delete()
+    return deleted
@@ -1,13 +1,22 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination
 
+from eigth_module.pagination import EstimatedCountPageNumberPagination
 
-class CoursePagination(PageNumberPagination):
+
+class CoursePagination(EstimatedCountPageNumberPagination):
     page_size = 5
     page_size_query_param = 'page_size'
     max_page_size = 50
 
 
-class LessonPagination(PageNumberPagination):
+class LessonPagination(EstimatedCountPageNumberPagination):
     page_size = 10
     page_size_query_param = 'page_size'
     max_page_size = 100
+
+
+class CourseFeedPagination(CursorPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-updated_at', '-id')
@@ -1,10 +1,20 @@
 from rest_framework import permissions
 
+from users.authentication import MODERATORS_GROUP
+
+
+def user_is_moderator(user) -> bool:
+    """Роль модератора: из токена (CachedJWTAuthentication) или по группе в БД"""
+    is_moderator = getattr(user, 'is_moderator', None)
+    if is_moderator is not None:
+        return is_moderator
+    return user.is_authenticated and user.groups.filter(name=MODERATORS_GROUP).exists()
+
 
 class IsModerator(permissions.BasePermission):
     """Проверка, является ли пользователь модератором"""
     def has_permission(self, request, view):
-        return request.user.groups.filter(name='Модераторы').exists()
+        return user_is_moderator(request.user)
 
 
 class IsOwner(permissions.BasePermission):
@@ -22,8 +32,7 @@ class CourseLessonPermission(permissions.BasePermission):
         
         # Если это POST (создание), проверяем, не является ли пользователь модератором
         if request.method == 'POST':
-            is_moderator = request.user.groups.filter(name='Модераторы').exists()
-            return not is_moderator  # Модераторы не могут создавать
+            return not user_is_moderator(request.user)  # Модераторы не могут создавать
         
         return True
 
@@ -32,7 +41,7 @@ class CourseLessonPermission(permissions.BasePermission):
         owner = getattr(obj, 'owner', None)
         
         # Проверяем, является ли пользователь модератором
-        is_moderator = request.user.groups.filter(name='Модераторы').exists()
+        is_moderator = user_is_moderator(request.user)
         
         # Если пользователь - модератор
         if is_moderator:
@@ -47,6 +56,16 @@ class CourseLessonPermission(permissions.BasePermission):
         if owner is None:
             return request.method in ['GET', 'HEAD', 'OPTIONS']
         
+        # Оплаченные курсы и уроки доступны покупателю только для просмотра
+        if request.method in permissions.SAFE_METHODS and owner != request.user:
+            from .models import Lesson
+            from .services import get_user_entitlements
+
+            entitlements = get_user_entitlements(request.user.id)
+            if isinstance(obj, Lesson):
+                return entitlements.has_lesson(obj)
+            return entitlements.has_course(obj)
+
         # Проверяем владельца для всех операций
         return owner == request.user
 
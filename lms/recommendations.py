@@ -0,0 +1,121 @@
+"""
+Рекомендации курсов по совместным подпискам.
+
+Матрица совместных подписок C = XᵀX (X - разреженная матрица
+пользователь x курс) считается за один проход по подпискам, отсортированным
+по пользователю: каждый пользователь добавляет по единице в клетки всех пар
+своих курсов. Стоимость - сумма квадратов числа подписок пользователей,
+а не квадрат числа курсов; хранятся только ненулевые клетки.
+
+Сходство курсов - косинусная мера co(a, b) / sqrt(n(a) * n(b)), где n -
+число подписчиков курса. Для каждого курса сохраняются K лучших соседей
+(CourseRecommendations), эндпоинт рекомендаций читает одну строку.
+"""
+import heapq
+import itertools
+import math
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Course, CourseRecommendations, CourseSubscription
+
+
+def iter_user_course_sets(chunk_size=5000):
+    """ID курсов каждого пользователя (подписки читаются потоком, по порядку user_id)"""
+    rows = (
+        CourseSubscription.objects
+        .order_by('user_id', 'course_id')
+        .values_list('user_id', 'course_id')
+        .iterator(chunk_size=chunk_size)
+    )
+    for _, group in itertools.groupby(rows, key=lambda row: row[0]):
+        yield [course_id for _, course_id in group]
+
+
+def count_cooccurrences(course_sets, max_user_courses=None):
+    """
+    Ненулевые клетки матрицы совместных подписок
+
+    Args:
+        course_sets: Списки ID курсов пользователей (отсортированные)
+        max_user_courses: Пользователи с большим числом подписок пропускаются
+
+    Returns:
+        tuple: (Counter пар (a, b) с a < b, Counter подписчиков курса)
+    """
+    pairs = Counter()
+    subscribers = Counter()
+    for courses in course_sets:
+        if max_user_courses and len(courses) > max_user_courses:
+            continue
+        subscribers.update(courses)
+        pairs.update(itertools.combinations(courses, 2))
+    return pairs, subscribers
+
+
+def _rank(item):
+    # При равном сходстве выше курс с большим числом общих подписчиков, затем с меньшим ID
+    score, together, neighbour = item
+    return score, together, -neighbour
+
+
+def top_neighbours(pairs, subscribers, k):
+    """
+    K самых похожих курсов для каждого курса
+
+    Returns:
+        dict: ID курса -> список (ID соседа, сходство) по убыванию сходства
+    """
+    candidates = defaultdict(list)
+    for (a, b), together in pairs.items():
+        score = together / math.sqrt(subscribers[a] * subscribers[b])
+        candidates[a].append((score, together, b))
+        candidates[b].append((score, together, a))
+    return {
+        course_id: [(neighbour, round(score, 4)) for score, _, neighbour in heapq.nlargest(k, items, key=_rank)]
+        for course_id, items in candidates.items()
+    }
+
+
+def build_course_recommendations(k=None) -> int:
+    """
+    Пересчитывает рекомендации всех курсов
+
+    Returns:
+        int: Количество курсов с рекомендациями
+    """
+    k = settings.COURSE_RECOMMENDATIONS_TOP_K if k is None else k
+    pairs, subscribers = count_cooccurrences(
+        iter_user_course_sets(), settings.COURSE_RECOMMENDATIONS_MAX_USER_COURSES,
+    )
+    neighbours = top_neighbours(pairs, subscribers, k)
+    # Курс мог быть удален, пока считалась матрица
+    existing = set(Course.objects.filter(id__in=list(neighbours)).values_list('id', flat=True))
+    built_at = timezone.now()
+    rows = [
+        CourseRecommendations(
+            course_id=course_id,
+            course_ids=[neighbour for neighbour, _ in items],
+            scores=[score for _, score in items],
+            built_at=built_at,
+        )
+        for course_id, items in neighbours.items()
+        if course_id in existing
+    ]
+    with transaction.atomic():
+        CourseRecommendations.objects.all().delete()
+        CourseRecommendations.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def get_recommended_course_ids(course_id) -> list:
+    """ID рекомендованных курсов (по убыванию сходства) одним запросом по первичному ключу"""
+    return (
+        CourseRecommendations.objects
+        .filter(course_id=course_id)
+        .values_list('course_ids', flat=True)
+        .first()
+    ) or []
@@ -1,6 +1,11 @@
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
+
+from eigth_module.images import ThumbnailField
 from .models import Course, Lesson
-from .validators import validate_youtube_link
+from .services import has_lesson_access
+from .validators import normalize_youtube_link, validate_youtube_link
 
 
 class LessonSerializer(serializers.ModelSerializer):
@@ -18,6 +23,10 @@ class LessonSerializer(serializers.ModelSerializer):
             'owner': {'read_only': True},
         }
 
+    def validate_video_link(self, value):
+        """Сохраняет ссылку в каноническом виде (watch?v=ID)"""
+        return normalize_youtube_link(value)
+
 
 class CourseSerializer(serializers.ModelSerializer):
     """Сериализатор для курса"""
@@ -31,6 +40,7 @@ class CourseSerializer(serializers.ModelSerializer):
             'id',
             'title',
             'preview',
+            'preview_thumbnail',
             'description',
             'owner',
             'lessons',
@@ -56,13 +66,52 @@ class CourseSerializer(serializers.ModelSerializer):
         return obj.subscriptions.filter(user=user).exists()
 
 
+class LessonInCourseListSerializer(LessonSerializer):
+    """Урок в списке курсов: превью - уменьшенная копия"""
+    preview = ThumbnailField('preview', 'preview_thumbnail')
+
+
+class CourseListSerializer(CourseSerializer):
+    """Сериализатор для списка курсов: превью курса и уроков - уменьшенные копии"""
+    preview = ThumbnailField('preview', 'preview_thumbnail')
+    lessons = LessonInCourseListSerializer(many=True, read_only=True)
+
+
+class CourseShortSerializer(serializers.ModelSerializer):
+    """Краткий сериализатор курса для списков и лент"""
+    preview = ThumbnailField('preview', 'preview_thumbnail')
+
+    class Meta:
+        model = Course
+        fields = ('id', 'title', 'preview', 'updated_at')
+
+
+@extend_schema_field(OpenApiTypes.BOOL)
+class LessonAccessField(serializers.Field):
+    """Признак доступа к уроку по оплаченным курсам и урокам из контекста"""
+
+    def __init__(self, **kwargs):
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        entitlements = self.context.get('entitlements')
+        request = self.context.get('request')
+        if entitlements is None or request is None:
+            return False
+        return has_lesson_access(request.user, value, entitlements, self.context.get('is_moderator', False))
+
+
 class LessonListSerializer(serializers.ModelSerializer):
     """Сериализатор для списка уроков"""
     course_title = serializers.CharField(source='course.title', read_only=True)
+    preview = ThumbnailField('preview', 'preview_thumbnail')
+    has_access = LessonAccessField()
 
     class Meta:
         model = Lesson
-        fields = ('id', 'title', 'course', 'course_title', 'preview', 'video_link')
+        fields = ('id', 'title', 'course', 'course_title', 'preview', 'video_link', 'has_access')
         extra_kwargs = {
             'owner': {'read_only': True},
         }
@@ -71,6 +120,7 @@ class LessonListSerializer(serializers.ModelSerializer):
 class LessonDetailSerializer(serializers.ModelSerializer):
     """Сериализатор для детального представления урока"""
     course_title = serializers.CharField(source='course.title', read_only=True)
+    has_access = LessonAccessField()
 
     class Meta:
         model = Lesson
@@ -79,3 +129,28 @@ class LessonDetailSerializer(serializers.ModelSerializer):
             'owner': {'read_only': True},
         }
 
+
+class SubscriptionStatsQuerySerializer(serializers.Serializer):
+    """Параметры запроса статистики подписок"""
+    at = serializers.DateTimeField(required=False)
+    since = serializers.DateTimeField(required=False)
+    until = serializers.DateTimeField(required=False)
+
+    def validate(self, attrs):
+        since, until = attrs.get('since'), attrs.get('until')
+        if since and until and since >= until:
+            raise serializers.ValidationError({'since': 'Начало периода должно быть раньше конца'})
+        return attrs
+
+
+class SubscriptionStatsSerializer(serializers.Serializer):
+    """Число подписчиков курса на момент времени и отток за период"""
+    course = serializers.IntegerField()
+    at = serializers.DateTimeField()
+    subscribers = serializers.IntegerField()
+    since = serializers.DateTimeField()
+    until = serializers.DateTimeField()
+    subscribers_at_start = serializers.IntegerField()
+    subscribed = serializers.IntegerField()
+    unsubscribed = serializers.IntegerField()
+    churn_rate = serializers.FloatField(allow_null=True)
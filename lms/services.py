@@ -0,0 +1,128 @@
+"""
+Сервисные функции приложения lms
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Course, CourseSubscription, Lesson
+
+
+def _my_courses_cache_key(user_id) -> str:
+    return f'lms:my-courses:{user_id}'
+
+
+def build_user_course_ids(user_id) -> list:
+    """
+    Собирает ID всех курсов пользователя одним UNION-запросом:
+    свои курсы, подписки, оплаченные курсы и курсы оплаченных уроков
+
+    Args:
+        user_id: ID пользователя
+
+    Returns:
+        list: ID курсов
+    """
+    from users.models import Payment
+
+    owned = Course.objects.filter(owner_id=user_id).values_list('id', flat=True)
+    subscribed = CourseSubscription.objects.filter(user_id=user_id).values_list('course_id', flat=True)
+    paid = Payment.objects.filter(user_id=user_id, payment_status='paid')
+    paid_courses = paid.filter(course__isnull=False).values_list('course_id', flat=True)
+    paid_lessons = paid.filter(lesson__isnull=False).values_list('lesson__course_id', flat=True)
+
+    # UNION (без ALL) сразу убирает дубликаты; сортировка моделей здесь не нужна
+    querysets = [qs.order_by() for qs in (owned, subscribed, paid_courses, paid_lessons)]
+    return list(querysets[0].union(*querysets[1:]))
+
+
+def get_user_course_ids(user_id) -> list:
+    """Возвращает ID курсов пользователя из кеша, при промахе собирает их заново"""
+    key = _my_courses_cache_key(user_id)
+    course_ids = cache.get(key)
+    if course_ids is None:
+        course_ids = build_user_course_ids(user_id)
+        cache.set(key, course_ids, settings.MY_COURSES_CACHE_TIMEOUT)
+    return course_ids
+
+
+def invalidate_user_courses(*user_ids):
+    """Сбрасывает кеш ленты курсов для указанных пользователей"""
+    keys = [_my_courses_cache_key(user_id) for user_id in user_ids if user_id]
+    if keys:
+        cache.delete_many(keys)
+
+
+class Entitlements:
+    """Множества ID курсов и уроков, оплаченных пользователем; проверка доступа за O(1)"""
+
+    def __init__(self, course_ids=(), lesson_ids=()):
+        self.course_ids = frozenset(course_ids)
+        self.lesson_ids = frozenset(lesson_ids)
+
+    def has_lesson(self, lesson) -> bool:
+        return lesson.id in self.lesson_ids or lesson.course_id in self.course_ids
+
+    def has_course(self, course) -> bool:
+        return course.id in self.course_ids
+
+
+def _entitlements_cache_key(user_id) -> str:
+    return f'lms:entitlements:{user_id}'
+
+
+def build_user_entitlements(user_id) -> Entitlements:
+    """
+    Собирает оплаченные пользователем курсы и уроки по платежам со статусом 'paid'
+
+    Args:
+        user_id: ID пользователя
+
+    Returns:
+        Entitlements: Доступные курсы и уроки
+    """
+    from users.models import Payment
+
+    course_ids = set()
+    lesson_ids = set()
+    paid = Payment.objects.filter(user_id=user_id, payment_status='paid').values_list('course_id', 'lesson_id')
+    for course_id, lesson_id in paid:
+        if course_id:
+            course_ids.add(course_id)
+        if lesson_id:
+            lesson_ids.add(lesson_id)
+    return Entitlements(course_ids, lesson_ids)
+
+
+def get_user_entitlements(user_id) -> Entitlements:
+    """Возвращает доступы пользователя из кеша, при промахе собирает их заново"""
+    key = _entitlements_cache_key(user_id)
+    cached = cache.get(key)
+    if cached is not None:
+        return Entitlements(*cached)
+    entitlements = build_user_entitlements(user_id)
+    cache.set(
+        key,
+        (sorted(entitlements.course_ids), sorted(entitlements.lesson_ids)),
+        settings.ENTITLEMENTS_CACHE_TIMEOUT,
+    )
+    return entitlements
+
+
+def invalidate_user_entitlements(*user_ids):
+    """Сбрасывает кеш доступов для указанных пользователей"""
+    keys = [_entitlements_cache_key(user_id) for user_id in user_ids if user_id]
+    if keys:
+        cache.delete_many(keys)
+
+
+def has_lesson_access(user, lesson, entitlements: Entitlements, is_moderator: bool = False) -> bool:
+    """Может ли пользователь открыть урок: модератор, владелец или оплативший курс/урок"""
+    return is_moderator or lesson.owner_id == user.id or entitlements.has_lesson(lesson)
+
+
+def get_recently_updated_lessons(course, since, exclude_lesson_id=None):
+    """Уроки курса, обновленные не раньше since (индекс lms_lesson_course_upd_idx)"""
+    lessons = Lesson.objects.filter(course=course)
+    if exclude_lesson_id is not None:
+        lessons = lessons.exclude(id=exclude_lesson_id)
+    return lessons.filter(updated_at__gte=since)
@@ -0,0 +1,72 @@
+"""
+Сигналы приложения lms: сброс кешей при изменении подписок, платежей и владельцев курсов,
+журнал подписок, постановка задач на уменьшенные превью.
+
+Кеши сбрасываются после коммита: при удалении внутри транзакции параллельный
+запрос успел бы заполнить кеш данными до коммита, и они жили бы до истечения TTL.
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from eigth_module.images import schedule_thumbnail
+from users.models import Payment
+from .models import Course, CourseSubscription, Lesson, SubscriptionEvent
+from .services import invalidate_user_courses, invalidate_user_entitlements
+from .subscriptions import record_subscription_event
+
+
+@receiver(pre_save, sender=Course)
+def remember_previous_course_owner(sender, instance, **kwargs):
+    """Запоминает прежнего владельца, чтобы сбросить и его кеш"""
+    if instance.pk:
+        instance._previous_owner_id = (
+            Course.objects.filter(pk=instance.pk).values_list('owner_id', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def invalidate_course_owner(sender, instance, **kwargs):
+    user_ids = (instance.owner_id, getattr(instance, '_previous_owner_id', None))
+    transaction.on_commit(lambda: invalidate_user_courses(*user_ids))
+
+
+@receiver(post_save, sender=CourseSubscription)
+@receiver(post_delete, sender=CourseSubscription)
+def invalidate_subscriber(sender, instance, **kwargs):
+    user_id = instance.user_id
+    transaction.on_commit(lambda: invalidate_user_courses(user_id))
+
+
+@receiver(post_save, sender=CourseSubscription)
+def log_subscribe(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        record_subscription_event(
+            instance.user_id, instance.course_id, SubscriptionEvent.SUBSCRIBE, instance.created_at,
+        )
+
+
+@receiver(post_delete, sender=CourseSubscription)
+def log_unsubscribe(sender, instance, **kwargs):
+    """Отписка, в том числе каскадная при удалении пользователя или курса"""
+    record_subscription_event(instance.user_id, instance.course_id, SubscriptionEvent.UNSUBSCRIBE)
+
+
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+def invalidate_payer(sender, instance, **kwargs):
+    user_id = instance.user_id
+    transaction.on_commit(lambda: invalidate_user_courses(user_id))
+    transaction.on_commit(lambda: invalidate_user_entitlements(user_id))
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_save, sender=Lesson)
+def schedule_preview_thumbnail(sender, instance, **kwargs):
+    from .tasks import generate_preview_thumbnail
+
+    schedule_thumbnail(
+        instance, 'preview', 'preview_thumbnail',
+        generate_preview_thumbnail, sender._meta.model_name, instance.pk,
+    )
@@ -0,0 +1,111 @@
+"""
+Журнал подписок на курсы и запросы по нему.
+
+Каждая подписка и отписка добавляет запись SubscriptionEvent (сигналы
+CourseSubscription, в той же транзакции), поэтому CourseSubscription остается
+проекцией журнала, а история и отток не теряются при удалении подписки.
+
+Число подписчиков на момент T - сумма +1/-1 по событиям курса до T;
+индекс (course_id, occurred_at, kind) позволяет считать ее без чтения таблицы.
+"""
+import datetime
+
+from django.db.models import Case, Count, IntegerField, Q, Sum, Value, When
+from django.utils import timezone
+
+from .models import SubscriptionEvent
+
+
+EVENT_EPOCH = datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def to_event_time(value) -> int:
+    """Секунды от EVENT_EPOCH для datetime (4-байтового целого хватает до 2088 года)"""
+    return int((value - EVENT_EPOCH).total_seconds())
+
+
+def from_event_time(seconds: int) -> datetime.datetime:
+    return EVENT_EPOCH + datetime.timedelta(seconds=seconds)
+
+
+def record_subscription_event(user_id, course_id, kind, at=None):
+    """Добавляет событие подписки или отписки в журнал"""
+    return SubscriptionEvent.objects.create(
+        user_id=user_id,
+        course_id=course_id,
+        kind=kind,
+        occurred_at=to_event_time(at or timezone.now()),
+    )
+
+
+def _subscriber_delta():
+    return Case(
+        When(kind=SubscriptionEvent.SUBSCRIBE, then=Value(1)),
+        default=Value(-1),
+        output_field=IntegerField(),
+    )
+
+
+def subscriber_counts_at(course_ids, at) -> dict:
+    """
+    Число подписчиков курсов на момент времени at
+
+    Returns:
+        dict: ID курса -> число подписчиков (0 для курсов без событий)
+    """
+    course_ids = list(course_ids)
+    rows = (
+        SubscriptionEvent.objects
+        .filter(course_id__in=course_ids, occurred_at__lte=to_event_time(at))
+        .values('course_id')
+        .annotate(subscribers=Sum(_subscriber_delta()))
+        .order_by()
+    )
+    counts = dict.fromkeys(course_ids, 0)
+    counts.update((row['course_id'], row['subscribers']) for row in rows)
+    return counts
+
+
+def subscriber_count_at(course_id, at) -> int:
+    return subscriber_counts_at([course_id], at)[course_id]
+
+
+def course_churn(course_ids, since, until) -> dict:
+    """
+    Отток подписчиков курсов за период [since, until)
+
+    Returns:
+        dict: ID курса -> словарь с числом подписчиков на начало периода,
+        подписок и отписок за период и долей отписавшихся (churn_rate,
+        None, если на начало периода подписчиков не было)
+    """
+    course_ids = list(course_ids)
+    at_start = subscriber_counts_at(course_ids, since - datetime.timedelta(seconds=1))
+    rows = (
+        SubscriptionEvent.objects
+        .filter(
+            course_id__in=course_ids,
+            occurred_at__gte=to_event_time(since),
+            occurred_at__lt=to_event_time(until),
+        )
+        .values('course_id')
+        .annotate(
+            subscribed=Count('id', filter=Q(kind=SubscriptionEvent.SUBSCRIBE)),
+            unsubscribed=Count('id', filter=Q(kind=SubscriptionEvent.UNSUBSCRIBE)),
+        )
+        .order_by()
+    )
+    in_period = {row['course_id']: row for row in rows}
+
+    result = {}
+    for course_id in course_ids:
+        row = in_period.get(course_id, {})
+        subscribers = at_start[course_id]
+        unsubscribed = row.get('unsubscribed', 0)
+        result[course_id] = {
+            'subscribers_at_start': subscribers,
+            'subscribed': row.get('subscribed', 0),
+            'unsubscribed': unsubscribed,
+            'churn_rate': unsubscribed / subscribers if subscribers else None,
+        }
+    return result
@@ -1,113 +1,247 @@
 """
 Задачи Celery для приложения lms
 """
+import smtplib
+from contextlib import contextmanager
+
 from celery import shared_task
-from django.core.mail import send_mail
+from celery.exceptions import Retry
 from django.conf import settings
 from django.utils import timezone
 from datetime import timedelta
-from .models import Course, CourseSubscription
+
+from eigth_module.images import update_thumbnail
+from eigth_module.task_metrics import record_smtp_error, task_result
+from .emails import DeliveryInterrupted, build_digest_messages, build_messages, send_messages
+from .models import Course, CourseSubscription, Lesson, NotificationOutbox
+from .recommendations import build_course_recommendations
+from .services import get_recently_updated_lessons
+from .outbox import (
+    claim_outbox_entry, complete_outbox_entry, get_delivered_through, prune_processed_entries,
+    relay_pending_entries, release_outbox_entry, save_delivery_progress,
+)
+
+
+# Ошибки доставки, после которых уведомление стоит отправить повторно
+DELIVERY_ERRORS = (smtplib.SMTPException, ConnectionError, TimeoutError)
+
+
+def get_instant_recipients(course, delivered_through='') -> list:
+    """
+    Email подписчиков курса, получающих уведомления сразу (без дайджеста),
+    по порядку; delivered_through - последний, кому письмо уже ушло
+    """
+    recipients = (
+        CourseSubscription.objects
+        .filter(course=course, user__email_digest=False)
+        .exclude(user__email='')
+    )
+    if delivered_through:
+        recipients = recipients.filter(user__email__gt=delivered_through)
+    return list(recipients.order_by('user__email').values_list('user__email', flat=True))
 
 
-@shared_task
-def send_course_update_notification(course_id):
+@contextmanager
+def outbox_lease(outbox_id):
+    """
+    Запись outbox помечается обработанной после успешного выполнения задачи.
+    При ошибке захват снимается, чтобы ретраи и ретранслятор повторили
+    отправку; ошибка после исчерпания ретраев засчитывается как неудачная попытка
+    """
+    try:
+        yield
+    except Retry:
+        if outbox_id is not None:
+            release_outbox_entry(outbox_id)
+        raise
+    except Exception:
+        if outbox_id is not None:
+            release_outbox_entry(outbox_id, failed=True)
+        raise
+    else:
+        if outbox_id is not None:
+            complete_outbox_entry(outbox_id)
+
+
+def _deliver(task, messages, outbox_id=None):
+    """
+    Отправляет письма; при ошибке SMTP перезапускает задачу с задержкой
+    (захват outbox снимается в outbox_lease). Для записи outbox запоминается
+    последний получатель, которому письмо ушло до ошибки.
+    """
+    try:
+        return send_messages(messages)
+    except DeliveryInterrupted as e:
+        sent, error = e.sent, e.error
+    except DELIVERY_ERRORS as e:
+        sent, error = 0, e
+
+    if sent and outbox_id is not None:
+        save_delivery_progress(outbox_id, messages[sent - 1][3][0])
+    if not isinstance(error, DELIVERY_ERRORS):
+        raise error
+    record_smtp_error(task.name)
+    raise task.retry(exc=error, countdown=settings.NOTIFICATION_RETRY_DELAY)
+
+
+@shared_task(bind=True, max_retries=3, acks_late=True)
+def send_course_update_notification(self, course_id, outbox_id=None):
     """
     Отправляет уведомления подписанным пользователям об обновлении курса
-    
+
     Args:
         course_id: ID курса, который был обновлен
+        outbox_id: ID записи NotificationOutbox (повторная доставка игнорируется)
     """
-    try:
-        course = Course.objects.get(id=course_id)
-        subscriptions = CourseSubscription.objects.filter(course=course)
-        
-        subscribers = [subscription.user for subscription in subscriptions]
-        
-        if not subscribers:
-            return f"Нет подписчиков на курс '{course.title}'"
-        
-        subject = f'Обновление курса: {course.title}'
-        message = f'Курс "{course.title}" был обновлен. Проверьте новые материалы!'
-        
-        recipient_list = [user.email for user in subscribers if user.email]
-        
+    if outbox_id is not None and not claim_outbox_entry(outbox_id):
+        return task_result('duplicate', f"Уведомление {outbox_id} уже обработано или обрабатывается")
+
+    delivered_through = get_delivered_through(outbox_id) if outbox_id is not None else ''
+    with outbox_lease(outbox_id):
+        try:
+            course = Course.objects.get(id=course_id)
+        except Course.DoesNotExist:
+            return task_result('not_found', f"Курс с ID {course_id} не найден")
+
+        # Пользователи с дайджестом получат обновление в сводном письме
+        recipient_list = get_instant_recipients(course, delivered_through)
+
         if recipient_list:
-            send_mail(
-                subject=subject,
-                message=message,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=recipient_list,
-                fail_silently=False,
+            _deliver(self, build_messages('course_update', {'course': course}, recipient_list), outbox_id)
+            return task_result(
+                'sent',
+                f"Уведомления отправлены {len(recipient_list)} подписчикам курса '{course.title}'",
+                recipients=len(recipient_list),
             )
-            return f"Уведомления отправлены {len(recipient_list)} подписчикам курса '{course.title}'"
+        elif not CourseSubscription.objects.filter(course=course).exists():
+            return task_result('no_subscribers', f"Нет подписчиков на курс '{course.title}'")
         else:
-            return f"Нет email адресов для отправки уведомлений о курсе '{course.title}'"
-            
-    except Course.DoesNotExist:
-        return f"Курс с ID {course_id} не найден"
-    except Exception as e:
-        return f"Ошибка при отправке уведомлений: {str(e)}"
+            return task_result('no_recipients', f"Нет получателей мгновенных уведомлений о курсе '{course.title}'")
 
 
-@shared_task
-def check_and_send_lesson_update_notification(lesson_id):
+@shared_task(bind=True, max_retries=3, acks_late=True)
+def check_and_send_lesson_update_notification(self, lesson_id, outbox_id=None):
     """
     Проверяет, прошло ли более 4 часов с последнего обновления курса,
     и отправляет уведомления подписанным пользователям об обновлении урока
-    
+
     Args:
         lesson_id: ID урока, который был обновлен
+        outbox_id: ID записи NotificationOutbox (повторная доставка игнорируется)
     """
-    try:
-        from .models import Lesson
-        
-        lesson = Lesson.objects.select_related('course').get(id=lesson_id)
+    if outbox_id is not None and not claim_outbox_entry(outbox_id):
+        return task_result('duplicate', f"Уведомление {outbox_id} уже обработано или обрабатывается")
+
+    delivered_through = get_delivered_through(outbox_id) if outbox_id is not None else ''
+    with outbox_lease(outbox_id):
+        try:
+            lesson = Lesson.objects.select_related('course').get(id=lesson_id)
+        except Lesson.DoesNotExist:
+            return task_result('not_found', f"Урок с ID {lesson_id} не найден")
         course = lesson.course
-        
+
         # Проверяем, когда курс был последний раз обновлен
         now = timezone.now()
         four_hours_ago = now - timedelta(hours=4)
-        
+
         # Проверяем время последнего обновления курса
         if course.updated_at and course.updated_at > four_hours_ago:
             # Курс обновлялся менее 4 часов назад, не отправляем уведомление
-            return f"Курс '{course.title}' обновлялся менее 4 часов назад. Уведомление не отправлено."
-        
+            return task_result(
+                'skipped',
+                f"Курс '{course.title}' обновлялся менее 4 часов назад. Уведомление не отправлено.",
+            )
+
         # Проверяем, есть ли другие уроки, обновленные в последние 4 часа
-        recent_lessons = Lesson.objects.filter(
-            course=course
-        ).exclude(id=lesson_id).filter(
-            updated_at__gte=four_hours_ago
-        ).exists()
-        
+        recent_lessons = get_recently_updated_lessons(course, four_hours_ago, exclude_lesson_id=lesson_id).exists()
+
         if recent_lessons:
             # Есть другие уроки, обновленные недавно, не отправляем уведомление
-            return f"В курсе '{course.title}' есть другие уроки, обновленные менее 4 часов назад. Уведомление не отправлено."
-        
+            return task_result(
+                'skipped',
+                f"В курсе '{course.title}' есть другие уроки, обновленные менее 4 часов назад. Уведомление не отправлено.",
+            )
+
         # Отправляем уведомление только если прошло более 4 часов с последнего обновления курса
-        subscriptions = CourseSubscription.objects.filter(course=course)
-        subscribers = [subscription.user for subscription in subscriptions]
-        
-        if not subscribers:
-            return f"Нет подписчиков на курс '{course.title}'"
-        
-        subject = f'Обновление курса: {course.title}'
-        message = f'В курсе "{course.title}" добавлен новый урок: "{lesson.title}". Проверьте новые материалы!'
-        
-        recipient_list = [user.email for user in subscribers if user.email]
-        
+        recipient_list = get_instant_recipients(course, delivered_through)
+
         if recipient_list:
-            send_mail(
-                subject=subject,
-                message=message,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=recipient_list,
-                fail_silently=False,
+            _deliver(self, build_messages('lesson_update', {'course': course, 'lesson': lesson}, recipient_list), outbox_id)
+            return task_result(
+                'sent',
+                f"Уведомления отправлены {len(recipient_list)} подписчикам курса '{course.title}' об уроке '{lesson.title}'",
+                recipients=len(recipient_list),
             )
-            return f"Уведомления отправлены {len(recipient_list)} подписчикам курса '{course.title}' об уроке '{lesson.title}'"
+        elif not CourseSubscription.objects.filter(course=course).exists():
+            return task_result('no_subscribers', f"Нет подписчиков на курс '{course.title}'")
         else:
-            return f"Нет email адресов для отправки уведомлений о курсе '{course.title}'"
-            
-    except Exception as e:
-        return f"Ошибка при отправке уведомлений об уроке: {str(e)}"
+            return task_result('no_recipients', f"Нет получателей мгновенных уведомлений о курсе '{course.title}'")
+
+
+@shared_task(acks_late=True)
+def relay_notification_outbox():
+    """
+    Передает в очередь уведомления из outbox, которые не ушли после коммита
+    (например, брокер был недоступен) или были потеряны
+    """
+    dispatched = relay_pending_entries()
+    return task_result('relayed', f"Передано в очередь уведомлений: {dispatched}", dispatched=dispatched)
+
 
+@shared_task(acks_late=True)
+def prune_notification_outbox():
+    """Удаляет давно обработанные записи outbox"""
+    deleted = prune_processed_entries()
+    return task_result('pruned', f"Удалено обработанных уведомлений: {deleted}", deleted=deleted)
+
+
+@shared_task(acks_late=True)
+def rebuild_course_recommendations():
+    """Пересчитывает рекомендации курсов по совместным подпискам"""
+    courses = build_course_recommendations()
+    return task_result('built', f"Рекомендации построены для {courses} курсов", courses=courses)
+
+
+@shared_task(bind=True, max_retries=3)
+def send_notification_digests(self):
+    """
+    Отправляет пользователям с дайджестом одно письмо со всеми обновлениями
+    их курсов за последний период. Письма уходят по одному SMTP-соединению.
+    """
+    since = timezone.now() - timedelta(hours=settings.NOTIFICATION_DIGEST_PERIOD_HOURS)
+    entries = list(
+        NotificationOutbox.objects
+        .filter(processed_at__gte=since)
+        .select_related('course', 'lesson')
+    )
+    if not entries:
+        return task_result('no_updates', "Нет обновлений для дайджеста")
+
+    subscriptions = (
+        CourseSubscription.objects
+        .filter(
+            course_id__in={entry.course_id for entry in entries},
+            user__email_digest=True,
+            user__is_active=True,
+        )
+        .select_related('user')
+    )
+    messages = build_digest_messages(entries, subscriptions)
+    sent = _deliver(self, messages)
+    return task_result('sent', f"Дайджесты отправлены {sent} пользователям", recipients=sent)
+
+
+@shared_task(acks_late=True)
+def generate_preview_thumbnail(model_name, object_id):
+    """
+    Строит уменьшенное превью курса или урока в WebP
+
+    Args:
+        model_name: 'course' или 'lesson'
+        object_id: ID курса или урока
+    """
+    model = {'course': Course, 'lesson': Lesson}[model_name]
+    name = update_thumbnail(model, object_id, 'preview', 'preview_thumbnail', settings.PREVIEW_THUMBNAIL_SIZE)
+    if name is None:
+        return task_result('cleared', f"Превью {model_name} {object_id} отсутствует")
+    return task_result('created', f"Уменьшенное превью {model_name} {object_id}: {name}")
@@ -0,0 +1,53 @@
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.test import TestCase
+from django.utils import timezone
+
+from lms.models import Course, CourseSubscription, Lesson, NotificationOutbox
+from lms.tasks import send_course_update_notification, send_notification_digests
+
+
+User = get_user_model()
+
+
+class NotificationEmailTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create(email='author@example.com')
+        self.instant = User.objects.create(email='instant@example.com')
+        self.other_instant = User.objects.create(email='other@example.com')
+        self.digest = User.objects.create(email='digest@example.com', email_digest=True)
+        self.course = Course.objects.create(title='Django "Pro"', owner=self.author)
+        self.second_course = Course.objects.create(title='Python', owner=self.author)
+        for user in (self.instant, self.other_instant, self.digest):
+            CourseSubscription.objects.create(user=user, course=self.course)
+        CourseSubscription.objects.create(user=self.digest, course=self.second_course)
+
+    def test_instant_update_sends_one_message_per_recipient(self):
+        send_course_update_notification(self.course.id)
+
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(
+            sorted(message.to[0] for message in mail.outbox),
+            ['instant@example.com', 'other@example.com'],
+        )
+        self.assertEqual(mail.outbox[0].subject, 'Обновление курса: Django "Pro"')
+
+    def test_digest_rolls_updates_into_one_email(self):
+        lesson = Lesson.objects.create(course=self.second_course, title='Generators', owner=self.author)
+        now = timezone.now()
+        NotificationOutbox.objects.create(
+            kind=NotificationOutbox.KIND_COURSE_UPDATE, course=self.course,
+            dedupe_key='course', processed_at=now,
+        )
+        NotificationOutbox.objects.create(
+            kind=NotificationOutbox.KIND_LESSON_UPDATE, course=self.second_course, lesson=lesson,
+            dedupe_key='lesson', processed_at=now,
+        )
+
+        send_notification_digests()
+
+        self.assertEqual(len(mail.outbox), 1)
+        message = mail.outbox[0]
+        self.assertEqual(message.to, ['digest@example.com'])
+        self.assertIn('Курс "Django "Pro"" был обновлен', message.body)
+        self.assertIn('добавлен урок "Generators"', message.body)
@@ -0,0 +1,56 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from lms.models import Course, Lesson
+from users.models import Payment
+
+
+User = get_user_model()
+
+
+class LessonEntitlementTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create(email='author@example.com')
+        self.buyer = User.objects.create(email='buyer@example.com')
+        self.course = Course.objects.create(title='Paid Course', owner=self.author)
+        self.lesson = Lesson.objects.create(course=self.course, title='Lesson', owner=self.author)
+        self.lesson_url = reverse('lesson-detail', args=[self.lesson.id])
+        self.client.force_authenticate(self.buyer)
+
+    def test_unpaid_lesson_is_hidden(self):
+        response = self.client.get(self.lesson_url)
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_paid_course_opens_lessons_after_status_change(self):
+        payment = Payment.objects.create(
+            user=self.buyer, course=self.course, amount='10.00', payment_method='stripe'
+        )
+        self.assertEqual(self.client.get(self.lesson_url).status_code, status.HTTP_404_NOT_FOUND)
+
+        payment.payment_status = 'paid'
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            payment.save()
+            # До коммита кеш доступов не сбрасывается
+            self.assertEqual(self.client.get(self.lesson_url).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertTrue(callbacks)
+
+        response = self.client.get(self.lesson_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['has_access'])
+
+        list_response = self.client.get(reverse('lesson-list-create'))
+        self.assertEqual([item['id'] for item in list_response.data['results']], [self.lesson.id])
+
+    def test_buyer_cannot_edit_paid_lesson(self):
+        Payment.objects.create(
+            user=self.buyer, lesson=self.lesson, amount='5.00', payment_method='cash', payment_status='paid'
+        )
+
+        response = self.client.patch(self.lesson_url, {'title': 'Changed'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,95 @@
+import asyncio
+import json
+import time
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from lms.events import ACCESS_EXPIRED_EVENT, event_hub, stream_events
+from lms.models import Course, CourseSubscription
+from lms.tasks import send_course_update_notification
+from users.authentication import add_user_claims, bump_token_version
+
+
+User = get_user_model()
+
+
+@override_settings(REDIS_URL='', SSE_HEARTBEAT_SECONDS=0.05)
+class CourseEventsTests(TestCase):
+    def setUp(self):
+        event_hub.clear()
+        self.owner = User.objects.create(email='owner@example.com')
+        self.subscriber = User.objects.create(email='subscriber@example.com')
+        self.course = Course.objects.create(title='Course', owner=self.owner)
+        self.other_course = Course.objects.create(title='Other', owner=self.owner)
+        CourseSubscription.objects.create(user=self.subscriber, course=self.course)
+
+    async def test_stream_requires_token(self):
+        response = await self.async_client.get('/api/events/')
+
+        self.assertEqual(response.status_code, 401)
+
+    async def test_subscriber_receives_course_update(self):
+        token = str(AccessToken.for_user(self.subscriber))
+        response = await self.async_client.get('/api/events/', {'token': token})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+        self.assertTrue((await anext(stream)).startswith(b'retry:'))
+
+        await sync_to_async(self.update_course)(self.other_course)
+        await sync_to_async(self.update_course)(self.course)
+
+        while True:
+            chunk = (await asyncio.wait_for(anext(stream), 1)).decode()
+            if not chunk.startswith(':'):
+                break
+        await stream.aclose()
+
+        self.assertTrue(chunk.startswith('event: course_update\n'))
+        event = json.loads(chunk.split('data: ', 1)[1])
+        self.assertEqual(event['course'], self.course.id)
+
+    def update_course(self, course):
+        client = APIClient()
+        client.force_authenticate(self.owner)
+        # Уведомление из outbox не должно уходить в брокер
+        with mock.patch.object(send_course_update_notification, 'apply_async'):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = client.patch(f'/api/courses/{course.id}/', {'title': 'Updated'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+    async def test_idle_stream_sends_heartbeat_and_unsubscribes(self):
+        stream = stream_events([self.course.id])
+        await anext(stream)
+
+        self.assertEqual(await anext(stream), ': ping\n\n')
+        await stream.aclose()
+        self.assertEqual(event_hub._subscriptions, {})
+
+    async def test_stream_closes_when_token_expires(self):
+        stream = stream_events([self.course.id], expires_at=time.time() + 0.12)
+        chunks = [chunk async for chunk in stream]
+
+        self.assertEqual(chunks[-1], ACCESS_EXPIRED_EVENT)
+        self.assertIn(': ping\n\n', chunks)
+        self.assertEqual(event_hub._subscriptions, {})
+
+    @override_settings(SSE_ACCESS_CHECK_SECONDS=0)
+    async def test_stream_closes_when_tokens_are_revoked(self):
+        token = await sync_to_async(add_user_claims)(AccessToken.for_user(self.subscriber), self.subscriber)
+        response = await self.async_client.get('/api/events/', {'token': str(token)})
+        stream = aiter(response.streaming_content)
+        await anext(stream)
+
+        self.assertEqual(await anext(stream), b': ping\n\n')
+        await sync_to_async(bump_token_version)([self.subscriber.id])
+
+        self.assertEqual(await anext(stream), ACCESS_EXPIRED_EVENT.encode())
+        with self.assertRaises(StopAsyncIteration):
+            await anext(stream)
@@ -0,0 +1,55 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from lms.models import Course, CourseSubscription, Lesson
+from users.models import Payment
+
+
+User = get_user_model()
+
+
+class MyCoursesFeedTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(email='feed@example.com')
+        self.author = User.objects.create(email='author@example.com')
+        self.owned = Course.objects.create(title='Owned', owner=self.user)
+        self.subscribed = Course.objects.create(title='Subscribed', owner=self.author)
+        self.paid = Course.objects.create(title='Paid', owner=self.author)
+        self.lesson_course = Course.objects.create(title='Lesson Paid', owner=self.author)
+        self.other = Course.objects.create(title='Other', owner=self.author)
+        lesson = Lesson.objects.create(course=self.lesson_course, title='Lesson', owner=self.author)
+
+        CourseSubscription.objects.create(user=self.user, course=self.subscribed)
+        Payment.objects.create(user=self.user, course=self.paid, amount='10.00', payment_method='cash', payment_status='paid')
+        Payment.objects.create(user=self.user, lesson=lesson, amount='5.00', payment_method='cash', payment_status='paid')
+        Payment.objects.create(user=self.user, course=self.other, amount='5.00', payment_method='cash')
+
+        self.feed_url = reverse('course-feed')
+        self.client.force_authenticate(self.user)
+
+    def _feed_ids(self):
+        response = self.client.get(self.feed_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return {item['id'] for item in response.data['results']}
+
+    def test_feed_combines_owned_subscribed_and_paid_courses(self):
+        self.assertEqual(
+            self._feed_ids(),
+            {self.owned.id, self.subscribed.id, self.paid.id, self.lesson_course.id},
+        )
+
+    def test_feed_uses_cache_and_is_invalidated_by_subscription(self):
+        self._feed_ids()
+
+        with self.assertNumQueries(1):
+            self.client.get(self.feed_url)
+
+        # Кеш сбрасывается после коммита
+        with self.captureOnCommitCallbacks(execute=True):
+            CourseSubscription.objects.create(user=self.user, course=self.other)
+
+        self.assertIn(self.other.id, self._feed_ids())
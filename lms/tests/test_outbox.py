@@ -0,0 +1,162 @@
+import smtplib
+from datetime import timedelta
+from unittest import mock
+
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from lms.models import Course, CourseSubscription, NotificationOutbox
+from lms.outbox import claim_outbox_entry, enqueue_notification, relay_pending_entries
+from lms.tasks import send_course_update_notification
+
+
+User = get_user_model()
+
+
+class NotificationOutboxTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(email='owner@example.com')
+        self.course = Course.objects.create(title='Course', owner=self.user)
+        CourseSubscription.objects.create(user=self.user, course=self.course)
+
+    def test_repeated_updates_in_window_create_one_entry(self):
+        with mock.patch.object(send_course_update_notification, 'apply_async') as apply_async:
+            with self.captureOnCommitCallbacks(execute=True):
+                enqueue_notification(NotificationOutbox.KIND_COURSE_UPDATE, self.course.id)
+                enqueue_notification(NotificationOutbox.KIND_COURSE_UPDATE, self.course.id)
+
+        self.assertEqual(NotificationOutbox.objects.count(), 1)
+        apply_async.assert_called_once()
+        self.assertIsNotNone(NotificationOutbox.objects.get().dispatched_at)
+
+    def test_rollback_does_not_dispatch(self):
+        with mock.patch.object(send_course_update_notification, 'apply_async') as apply_async:
+            with self.captureOnCommitCallbacks(execute=True):
+                try:
+                    with transaction.atomic():
+                        enqueue_notification(NotificationOutbox.KIND_COURSE_UPDATE, self.course.id)
+                        raise RuntimeError
+                except RuntimeError:
+                    pass
+
+        self.assertFalse(NotificationOutbox.objects.exists())
+        apply_async.assert_not_called()
+
+    def test_broker_outage_is_relayed_later(self):
+        with mock.patch.object(send_course_update_notification, 'apply_async', side_effect=ConnectionError):
+            with self.captureOnCommitCallbacks(execute=True):
+                enqueue_notification(NotificationOutbox.KIND_COURSE_UPDATE, self.course.id)
+        self.assertIsNone(NotificationOutbox.objects.get().dispatched_at)
+
+        with mock.patch.object(send_course_update_notification, 'apply_async') as apply_async:
+            self.assertEqual(relay_pending_entries(), 1)
+        apply_async.assert_called_once()
+
+    def test_duplicate_delivery_sends_mail_once(self):
+        entry = NotificationOutbox.objects.create(
+            kind=NotificationOutbox.KIND_COURSE_UPDATE, course=self.course, dedupe_key='test'
+        )
+
+        send_course_update_notification(self.course.id, outbox_id=entry.id)
+        send_course_update_notification(self.course.id, outbox_id=entry.id)
+
+        self.assertEqual(len(mail.outbox), 1)
+
+    @override_settings(NOTIFICATION_REDISPATCH_AFTER=0, NOTIFICATION_CLAIM_TIMEOUT=300)
+    def test_expired_claim_is_relayed_and_reclaimed(self):
+        entry = NotificationOutbox.objects.create(
+            kind=NotificationOutbox.KIND_COURSE_UPDATE, course=self.course, dedupe_key='test'
+        )
+        self.assertTrue(claim_outbox_entry(entry.id))
+        self.assertIsNone(NotificationOutbox.objects.get().processed_at)
+
+        # Воркер с захваченной записью жив - запись не ретранслируется и не захватывается
+        with mock.patch.object(send_course_update_notification, 'apply_async') as apply_async:
+            self.assertEqual(relay_pending_entries(), 0)
+        self.assertFalse(claim_outbox_entry(entry.id))
+
+        # Воркер упал: захват истек, уведомление отправляется заново
+        NotificationOutbox.objects.update(claimed_at=timezone.now() - timedelta(seconds=301))
+        with mock.patch.object(send_course_update_notification, 'apply_async') as apply_async:
+            self.assertEqual(relay_pending_entries(), 1)
+        apply_async.assert_called_once()
+
+        send_course_update_notification(self.course.id, outbox_id=entry.id)
+
+        self.assertEqual(len(mail.outbox), 1)
+        entry.refresh_from_db()
+        self.assertIsNotNone(entry.processed_at)
+        self.assertIsNone(entry.claimed_at)
+
+    def test_retry_after_partial_send_skips_delivered_recipients(self):
+        for email in ('a@example.com', 'b@example.com'):
+            user = User.objects.create(email=email)
+            CourseSubscription.objects.create(user=user, course=self.course)
+        entry = NotificationOutbox.objects.create(
+            kind=NotificationOutbox.KIND_COURSE_UPDATE, course=self.course, dedupe_key='test'
+        )
+        send = mail.get_connection().send_messages
+        calls = []
+
+        def fail_on_second(messages):
+            calls.append(messages)
+            if len(calls) == 2:
+                raise smtplib.SMTPServerDisconnected
+            return send(messages)
+
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages', side_effect=fail_on_second):
+            # При прямом вызове retry() поднимает исходную ошибку
+            with self.assertRaises(smtplib.SMTPServerDisconnected):
+                send_course_update_notification(self.course.id, outbox_id=entry.id)
+
+        entry.refresh_from_db()
+        self.assertIsNone(entry.processed_at)
+        self.assertIsNone(entry.claimed_at)
+        self.assertEqual(entry.delivered_through, 'a@example.com')
+
+        send_course_update_notification(self.course.id, outbox_id=entry.id)
+
+        self.assertEqual(
+            [message.to for message in mail.outbox],
+            [['a@example.com'], ['b@example.com'], ['owner@example.com']],
+        )
+        entry.refresh_from_db()
+        self.assertIsNotNone(entry.processed_at)
+
+    @override_settings(NOTIFICATION_MAX_ATTEMPTS=2, NOTIFICATION_REDISPATCH_AFTER=0)
+    def test_failing_notification_stops_being_relayed(self):
+        entry = NotificationOutbox.objects.create(
+            kind=NotificationOutbox.KIND_COURSE_UPDATE, course=self.course, dedupe_key='test'
+        )
+
+        with mock.patch('lms.tasks.get_instant_recipients', side_effect=ValueError):
+            for _ in range(2):
+                with self.assertRaises(ValueError):
+                    send_course_update_notification(self.course.id, outbox_id=entry.id)
+
+        entry.refresh_from_db()
+        self.assertEqual(entry.attempts, 2)
+        self.assertIsNone(entry.processed_at)
+        self.assertIsNotNone(entry.failed_at)
+        with mock.patch.object(send_course_update_notification, 'apply_async') as apply_async:
+            self.assertEqual(relay_pending_entries(), 0)
+        apply_async.assert_not_called()
+
+
+class CourseUpdateOutboxTests(APITestCase):
+    def test_course_update_writes_outbox_entry(self):
+        user = User.objects.create(email='author@example.com')
+        course = Course.objects.create(title='Course', owner=user)
+        self.client.force_authenticate(user)
+
+        response = self.client.patch(reverse('course-detail', args=[course.id]), {'title': 'New'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(NotificationOutbox.objects.filter(course=course, kind='course_update').exists())
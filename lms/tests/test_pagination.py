@@ -0,0 +1,42 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from lms.models import Course
+
+
+User = get_user_model()
+
+
+@override_settings(ESTIMATED_COUNT_THRESHOLD=1000)
+class EstimatedCountPaginationTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(email='author@example.com')
+        self.client.force_authenticate(self.user)
+        for i in range(3):
+            Course.objects.create(title=f'Course {i}', owner=self.user)
+
+    def test_small_result_has_exact_count(self):
+        response = self.client.get('/api/courses/')
+
+        self.assertEqual(response.data['count'], 3)
+        self.assertFalse(response.data['count_is_estimate'])
+
+    def test_large_result_uses_estimate(self):
+        with mock.patch('eigth_module.pagination.estimate_table_rows', return_value=2_500_000), \
+                mock.patch('eigth_module.pagination.estimate_query_rows', return_value=2_500_000):
+            response = self.client.get('/api/courses/')
+
+        self.assertEqual(response.data['count'], 2_500_000)
+        self.assertTrue(response.data['count_is_estimate'])
+        self.assertEqual(len(response.data['results']), 3)
+
+    def test_filtered_result_below_threshold_is_counted_exactly(self):
+        with mock.patch('eigth_module.pagination.estimate_table_rows', return_value=2_500_000), \
+                mock.patch('eigth_module.pagination.estimate_query_rows', return_value=40):
+            response = self.client.get('/api/payments/', {'payment_method': 'cash'})
+
+        self.assertEqual(response.data['count'], 0)
+        self.assertFalse(response.data['count_is_estimate'])
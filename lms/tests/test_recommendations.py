@@ -0,0 +1,71 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from lms.models import Course, CourseRecommendations, CourseSubscription
+from lms.recommendations import count_cooccurrences, top_neighbours
+from lms.tasks import rebuild_course_recommendations
+
+
+User = get_user_model()
+
+
+class CourseRecommendationsTests(APITestCase):
+    def setUp(self):
+        self.owner = User.objects.create(email='owner@example.com')
+        self.python, self.django, self.sql, self.design = (
+            Course.objects.create(title=title, owner=self.owner) for title in ('Python', 'Django', 'SQL', 'Design')
+        )
+        subscriptions = {
+            'a@example.com': [self.python, self.django, self.sql],
+            'b@example.com': [self.python, self.django],
+            'c@example.com': [self.python, self.design],
+            'd@example.com': [self.django],
+        }
+        for email, courses in subscriptions.items():
+            user = User.objects.create(email=email)
+            for course in courses:
+                CourseSubscription.objects.create(user=user, course=course)
+
+    def test_cooccurrence_counts_and_cosine_ranking(self):
+        pairs, subscribers = count_cooccurrences([[1, 2, 3], [1, 2], [1, 4], [2]])
+
+        self.assertEqual(pairs, {(1, 2): 2, (1, 3): 1, (2, 3): 1, (1, 4): 1})
+        self.assertEqual(subscribers, {1: 3, 2: 3, 3: 1, 4: 1})
+        neighbours = top_neighbours(pairs, subscribers, k=2)
+        self.assertEqual([course_id for course_id, _ in neighbours[1]], [2, 3])
+        self.assertEqual(neighbours[4], [(1, round(1 / 3 ** 0.5, 4))])
+
+    def test_users_with_too_many_courses_are_skipped(self):
+        pairs, subscribers = count_cooccurrences([[1, 2, 3], [1, 2]], max_user_courses=2)
+
+        self.assertEqual(pairs, {(1, 2): 1})
+        self.assertNotIn(3, subscribers)
+
+    def test_endpoint_serves_precomputed_neighbours(self):
+        result = rebuild_course_recommendations.apply().get()
+        self.assertEqual(result['courses'], 4)
+        self.assertEqual(CourseRecommendations.objects.get(course=self.python).course_ids[0], self.django.id)
+
+        viewer = User.objects.create(email='viewer@example.com')
+        self.client.force_authenticate(viewer)
+        url = f'/api/courses/{self.python.id}/recommendations/'
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([course['id'] for course in response.data][:1], [self.django.id])
+        self.assertEqual(len(response.data), 3)
+        self.assertLessEqual(len(queries), 4)
+
+    def test_known_courses_are_not_recommended(self):
+        rebuild_course_recommendations.apply()
+        user = User.objects.get(email='b@example.com')
+        self.client.force_authenticate(user)
+
+        response = self.client.get(f'/api/courses/{self.python.id}/recommendations/')
+
+        self.assertNotIn(self.django.id, [course['id'] for course in response.data])
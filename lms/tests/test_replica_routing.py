@@ -0,0 +1,59 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from eigth_module.db_router import PrimaryReplicaRouter, use_replica
+from lms.models import Course
+
+
+User = get_user_model()
+
+
+@override_settings(REPLICA_DATABASES=['replica1'], REPLICA_MAX_LAG=5)
+class PrimaryReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+
+    def test_reads_go_to_primary_outside_replica_block(self):
+        self.assertEqual(self.router.db_for_read(Course), 'default')
+
+    def test_reads_go_to_fresh_replica(self):
+        with mock.patch('eigth_module.db_router.get_replica_lag', return_value=0.5), use_replica():
+            self.assertEqual(self.router.db_for_read(Course), 'replica1')
+        self.assertEqual(self.router.db_for_write(Course), 'default')
+
+    def test_lagging_replica_falls_back_to_primary(self):
+        with mock.patch('eigth_module.db_router.get_replica_lag', return_value=30), use_replica():
+            self.assertEqual(self.router.db_for_read(Course), 'default')
+
+
+@override_settings(REPLICA_DATABASES=['replica1'])
+class ReadYourWritesTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(email='reader@example.com')
+        self.course = Course.objects.create(title='Course', owner=self.user)
+        self.client.force_authenticate(self.user)
+        # Реплику в тестах заменяет основная БД, фиксируем только выбор роутера
+        patcher = mock.patch('eigth_module.db_router.choose_replica_alias', return_value='default')
+        self.choose_replica = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_list_reads_from_replica(self):
+        response = self.client.get(reverse('course-list'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(self.choose_replica.called)
+
+    def test_reads_stick_to_primary_after_write(self):
+        self.client.post(reverse('course-subscription-toggle'), {'course': self.course.id}, format='json')
+
+        response = self.client.get(reverse('course-list'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(self.choose_replica.called)
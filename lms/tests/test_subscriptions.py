@@ -1,9 +1,13 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock
+
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 
-from lms.models import Course, CourseSubscription
+from lms.models import Course, CourseSubscription, SubscriptionEvent
+from lms.subscriptions import course_churn, subscriber_count_at
 
 
 User = get_user_model()
@@ -38,3 +42,60 @@ class CourseSubscriptionTests(APITestCase):
         course_detail_after = self.client.get(self.course_detail_url)
         self.assertEqual(course_detail_after.status_code, status.HTTP_200_OK)
         self.assertFalse(course_detail_after.data['is_subscribed'])
+
+
+class SubscriptionEventLogTests(APITestCase):
+    def setUp(self):
+        self.owner = User.objects.create(email='owner@example.com')
+        self.course = Course.objects.create(title='Course', owner=self.owner)
+        self.subscription_url = reverse('course-subscription-toggle')
+        self.stats_url = reverse('course-subscription-stats', args=[self.course.id])
+
+    def subscribe(self, email, at):
+        user = User.objects.get_or_create(email=email)[0]
+        with mock.patch('django.utils.timezone.now', return_value=at):
+            CourseSubscription.objects.create(user=user, course=self.course)
+        return user
+
+    def test_toggle_appends_events_and_keeps_projection(self):
+        user = User.objects.create(email='subscriber@example.com')
+        self.client.force_authenticate(user)
+
+        self.client.post(self.subscription_url, {'course': self.course.id}, format='json')
+        self.client.post(self.subscription_url, {'course': self.course.id}, format='json')
+
+        kinds = list(SubscriptionEvent.objects.filter(user_id=user.id).order_by('id').values_list('kind', flat=True))
+        self.assertEqual(kinds, [SubscriptionEvent.SUBSCRIBE, SubscriptionEvent.UNSUBSCRIBE])
+        self.assertFalse(CourseSubscription.objects.filter(user=user, course=self.course).exists())
+
+    def test_subscriber_count_at_time_and_churn(self):
+        start = datetime(2026, 1, 1, tzinfo=dt_timezone.utc)
+        first = self.subscribe('first@example.com', start)
+        self.subscribe('second@example.com', start + timedelta(days=1))
+        with mock.patch('django.utils.timezone.now', return_value=start + timedelta(days=10)):
+            CourseSubscription.objects.filter(user=first).delete()
+
+        self.assertEqual(subscriber_count_at(self.course.id, start - timedelta(days=1)), 0)
+        self.assertEqual(subscriber_count_at(self.course.id, start + timedelta(days=5)), 2)
+        self.assertEqual(subscriber_count_at(self.course.id, start + timedelta(days=20)), 1)
+
+        churn = course_churn([self.course.id], start + timedelta(days=5), start + timedelta(days=15))[self.course.id]
+        self.assertEqual(churn, {
+            'subscribers_at_start': 2, 'subscribed': 0, 'unsubscribed': 1, 'churn_rate': 0.5,
+        })
+
+    def test_owner_gets_subscription_stats(self):
+        start = datetime(2026, 1, 1, tzinfo=dt_timezone.utc)
+        self.subscribe('first@example.com', start)
+        self.client.force_authenticate(self.owner)
+
+        response = self.client.get(self.stats_url, {
+            'at': (start + timedelta(days=1)).isoformat(),
+            'since': start.isoformat(),
+            'until': (start + timedelta(days=30)).isoformat(),
+        })
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['subscribers'], 1)
+        self.assertEqual(response.data['subscribed'], 1)
+        self.assertIsNone(response.data['churn_rate'])
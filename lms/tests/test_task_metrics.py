@@ -0,0 +1,54 @@
+import smtplib
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from eigth_module.task_metrics import clear_metrics, render_prometheus, start_metrics_server
+from lms.models import Course, CourseSubscription
+from lms.tasks import send_course_update_notification
+
+
+User = get_user_model()
+TASK_NAME = send_course_update_notification.name
+
+
+class TaskMetricsTests(TestCase):
+    """Задачи выполняются через apply() - в процессе, как в eager-режиме Celery"""
+
+    def setUp(self):
+        clear_metrics()
+        self.author = User.objects.create(email='author@example.com')
+        self.course = Course.objects.create(title='Django', owner=self.author)
+        for email in ('first@example.com', 'second@example.com'):
+            CourseSubscription.objects.create(user=User.objects.create(email=email), course=self.course)
+
+    def metric(self, line_prefix):
+        for line in render_prometheus([TASK_NAME]).splitlines():
+            if line.startswith(line_prefix):
+                return float(line.rsplit(' ', 1)[1])
+        self.fail(f'Метрика {line_prefix} не найдена')
+
+    def test_successful_run_returns_structured_result_and_counts_recipients(self):
+        result = send_course_update_notification.apply(args=(self.course.id,))
+
+        self.assertEqual(result.get()['status'], 'sent')
+        self.assertEqual(result.get()['recipients'], 2)
+        self.assertEqual(self.metric(f'celery_task_runs_total{{task="{TASK_NAME}",state="success"}}'), 1)
+        self.assertEqual(self.metric(f'celery_task_duration_seconds_count{{task="{TASK_NAME}"}}'), 1)
+        self.assertEqual(self.metric(f'notification_recipients_total{{task="{TASK_NAME}"}}'), 2)
+        self.assertGreater(self.metric(f'notification_recipients_per_second{{task="{TASK_NAME}"}}'), 0)
+
+    def test_smtp_errors_are_counted_and_retried(self):
+        with patch('lms.tasks.send_messages', side_effect=smtplib.SMTPException('down')):
+            result = send_course_update_notification.apply(args=(self.course.id,))
+
+        self.assertTrue(result.failed())
+        # Первый запуск и три повтора
+        self.assertEqual(self.metric(f'notification_smtp_errors_total{{task="{TASK_NAME}"}}'), 4)
+        self.assertEqual(self.metric(f'celery_task_runs_total{{task="{TASK_NAME}",state="retry"}}'), 3)
+        self.assertEqual(self.metric(f'celery_task_runs_total{{task="{TASK_NAME}",state="failure"}}'), 1)
+
+    def test_metrics_server_requires_shared_storage(self):
+        with self.assertLogs('eigth_module.task_metrics', 'ERROR'):
+            self.assertIsNone(start_metrics_server(None, 0))
@@ -0,0 +1,108 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from PIL import Image
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from eigth_module.images import validate_image_upload
+from lms.models import Course, Lesson
+from lms.serializers import CourseShortSerializer
+from lms.tasks import generate_preview_thumbnail
+
+
+User = get_user_model()
+
+
+def make_image(name='preview.png', size=(1600, 900), image_format='PNG'):
+    buffer = BytesIO()
+    Image.new('RGB', size, color=(200, 40, 40)).save(buffer, image_format)
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type=f'image/{image_format.lower()}')
+
+
+class PreviewThumbnailTests(APITestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.author = User.objects.create(email='author@example.com')
+
+    def test_task_builds_webp_thumbnail_without_touching_updated_at(self):
+        course = Course.objects.create(title='Django', owner=self.author, preview=make_image())
+
+        result = generate_preview_thumbnail('course', course.id)
+
+        self.assertEqual(result['status'], 'created')
+        refreshed = Course.objects.get(id=course.id)
+        self.assertEqual(refreshed.preview_thumbnail.name, 'courses/thumbs/preview.webp')
+        self.assertEqual(refreshed.updated_at, course.updated_at)
+        with Image.open(refreshed.preview_thumbnail.path) as thumbnail:
+            self.assertEqual(thumbnail.format, 'WEBP')
+            self.assertEqual(thumbnail.size, (480, 270))
+
+    def test_removed_preview_clears_thumbnail(self):
+        lesson = Lesson.objects.create(
+            course=Course.objects.create(title='Django'), title='Intro', preview=make_image('intro.png'),
+        )
+        generate_preview_thumbnail('lesson', lesson.id)
+        Lesson.objects.filter(id=lesson.id).update(preview=None)
+
+        result = generate_preview_thumbnail('lesson', lesson.id)
+
+        self.assertEqual(result['status'], 'cleared')
+        self.assertFalse(Lesson.objects.get(id=lesson.id).preview_thumbnail)
+
+    def test_list_serializer_prefers_thumbnail(self):
+        course = Course.objects.create(title='Django', owner=self.author, preview=make_image())
+        self.assertTrue(CourseShortSerializer(course).data['preview'].endswith('/courses/preview.png'))
+
+        generate_preview_thumbnail('course', course.id)
+        course.refresh_from_db()
+
+        self.assertTrue(CourseShortSerializer(course).data['preview'].endswith('/courses/thumbs/preview.webp'))
+
+    def test_course_list_uses_thumbnails_and_detail_keeps_original(self):
+        course = Course.objects.create(title='Django', owner=self.author, preview=make_image())
+        lesson = Lesson.objects.create(course=course, title='Intro', preview=make_image('intro.png'))
+        generate_preview_thumbnail('course', course.id)
+        generate_preview_thumbnail('lesson', lesson.id)
+        self.client.force_authenticate(self.author)
+
+        listed = self.client.get('/api/courses/').data['results'][0]
+        detail = self.client.get(f'/api/courses/{course.id}/').data
+
+        self.assertTrue(listed['preview'].endswith('/courses/thumbs/preview.webp'))
+        self.assertTrue(listed['lessons'][0]['preview'].endswith('/lessons/thumbs/intro.webp'))
+        self.assertTrue(detail['preview'].endswith('/courses/preview.png'))
+        self.assertTrue(detail['lessons'][0]['preview'].endswith('/lessons/intro.png'))
+
+
+class ImageUploadValidationTests(APITestCase):
+    def test_oversized_dimensions_are_rejected(self):
+        with self.assertRaises(ValidationError):
+            validate_image_upload(make_image(size=(5000, 10)))
+
+    @override_settings(IMAGE_UPLOAD_MAX_SIZE=1024)
+    def test_oversized_file_is_rejected(self):
+        with self.assertRaises(ValidationError):
+            validate_image_upload(make_image(size=(300, 300), image_format='BMP'))
+
+    def test_api_rejects_oversized_preview(self):
+        user = User.objects.create(email='author@example.com')
+        self.client.force_authenticate(user)
+
+        response = self.client.post(
+            '/api/courses/',
+            {'title': 'Django', 'preview': make_image(size=(5000, 10))},
+            format='multipart',
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('preview', response.data)
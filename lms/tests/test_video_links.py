@@ -0,0 +1,73 @@
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from lms.models import Course, Lesson
+from lms.validators import extract_youtube_video_id, extract_youtube_video_ids
+
+
+User = get_user_model()
+VIDEO_ID = 'dQw4w9WgXcQ'
+
+
+class YouTubeVideoIdTests(SimpleTestCase):
+    def test_supported_link_formats(self):
+        links = [
+            f'https://www.youtube.com/watch?v={VIDEO_ID}',
+            f'https://youtube.com/watch?feature=share&v={VIDEO_ID}&t=10',
+            f'https://m.youtube.com/watch?v={VIDEO_ID}',
+            f'https://youtu.be/{VIDEO_ID}?si=abc',
+            f'https://www.youtube.com/embed/{VIDEO_ID}?rel=0',
+            f'https://www.youtube.com/shorts/{VIDEO_ID}',
+            f'  www.youtube.com/watch?v={VIDEO_ID}  ',
+        ]
+        for link in links:
+            with self.subTest(link=link):
+                self.assertEqual(extract_youtube_video_id(link), VIDEO_ID)
+
+    def test_links_without_video_are_rejected(self):
+        links = [
+            'https://www.youtube.com/',
+            'https://www.youtube.com/channel/UC123',
+            f'https://www.youtube.com/watch?v={VIDEO_ID}X',
+            f'https://vimeo.com/{VIDEO_ID}',
+            f'https://evil.example/?u=https://youtu.be/{VIDEO_ID}',
+        ]
+        for link in links:
+            with self.subTest(link=link):
+                self.assertIsNone(extract_youtube_video_id(link))
+
+    def test_batch_matches_single_extraction(self):
+        links = [f'https://youtu.be/{VIDEO_ID}', None, 'https://vimeo.com/1', '', f'https://youtu.be/{VIDEO_ID}']
+
+        self.assertEqual(extract_youtube_video_ids(links), [extract_youtube_video_id(link) for link in links])
+
+
+class LessonVideoIdTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(email='user@example.com')
+        self.course = Course.objects.create(title='Course', owner=self.user)
+
+    def test_short_link_is_normalized_and_video_id_stored(self):
+        self.client.force_authenticate(self.user)
+
+        response = self.client.post(
+            reverse('lesson-list-create'),
+            {'course': self.course.id, 'title': 'Lesson', 'video_link': f'https://youtu.be/{VIDEO_ID}?t=42'},
+            format='json',
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        lesson = Lesson.objects.get()
+        self.assertEqual(lesson.video_link, f'https://www.youtube.com/watch?v={VIDEO_ID}')
+        self.assertEqual(lesson.video_id, VIDEO_ID)
+
+    def test_video_id_follows_link_on_partial_save(self):
+        lesson = Lesson.objects.create(course=self.course, title='Lesson', video_link=f'https://youtu.be/{VIDEO_ID}')
+
+        lesson.video_link = ''
+        lesson.save(update_fields=['video_link'])
+
+        self.assertEqual(Lesson.objects.get(id=lesson.id).video_id, '')
@@ -4,7 +4,8 @@ from .views import (
     CourseViewSet,
     LessonListCreateView,
     LessonRetrieveUpdateDestroyView,
-    CourseSubscriptionToggleAPIView
+    CourseSubscriptionToggleAPIView,
+    course_events,
 )
 
 router = DefaultRouter()
@@ -14,6 +15,8 @@ urlpatterns = [
     path('lessons/', LessonListCreateView.as_view(), name='lesson-list-create'),
     path('lessons/<int:pk>/', LessonRetrieveUpdateDestroyView.as_view(), name='lesson-detail'),
     path('courses/subscription/', CourseSubscriptionToggleAPIView.as_view(), name='course-subscription-toggle'),
+    # Server-sent events (только под ASGI)
+    path('events/', course_events, name='course-events'),
     path('', include(router.urls)),
 ]
 
@@ -1,24 +1,58 @@
-from urllib.parse import urlparse
+import re
 
 from django.core.exceptions import ValidationError
 
 
-ALLOWED_YOUTUBE_DOMAINS = {
-    'youtube.com',
-    'www.youtube.com',
-    'm.youtube.com',
-}
+# Ссылка на конкретное видео: watch?v=ID, /embed/ID, /shorts/ID, /live/ID, /v/ID и youtu.be/ID.
+# ID видео YouTube - 11 символов из [A-Za-z0-9_-]
+YOUTUBE_VIDEO_RE = re.compile(
+    r'(?:https?://)?'
+    r'(?:'
+    r'(?:www\.|m\.|music\.)?youtube\.com/'
+    r'(?:watch/?\?(?:[^#\s]*&)?v=|embed/|shorts/|live/|v/)'
+    r'|youtu\.be/'
+    r')'
+    r'([A-Za-z0-9_-]{11})'
+    r'(?![A-Za-z0-9_-])',
+    re.IGNORECASE,
+)
+YOUTUBE_WATCH_URL = 'https://www.youtube.com/watch?v={}'
+
+
+def extract_youtube_video_id(value):
+    """ID видео из ссылки YouTube или None, если ссылка не указывает на видео"""
+    if not value:
+        return None
+    match = YOUTUBE_VIDEO_RE.match(value.strip())
+    return match.group(1) if match else None
+
+
+def extract_youtube_video_ids(values) -> list:
+    """
+    ID видео для списка ссылок (массовый импорт уроков)
+
+    Ссылки сопоставляются со скомпилированным шаблоном через map, без urlparse
+    и без вызова extract_youtube_video_id на каждую ссылку.
+
+    Returns:
+        list: ID видео или None для каждой ссылки в исходном порядке
+    """
+    links = [value.strip() if value else '' for value in values]
+    return [match.group(1) if match else None for match in map(YOUTUBE_VIDEO_RE.match, links)]
+
+
+def normalize_youtube_link(value):
+    """Каноническая ссылка на видео (https://www.youtube.com/watch?v=ID)"""
+    video_id = extract_youtube_video_id(value)
+    return YOUTUBE_WATCH_URL.format(video_id) if video_id else value
 
 
 def validate_youtube_link(value: str) -> str:
-    """Ensure that provided video link points to youtube.com."""
+    """Ensure that provided video link points to a YouTube video."""
     if not value:
         return value
 
-    parsed = urlparse(value)
-    domain = parsed.netloc.lower()
-
-    if domain not in ALLOWED_YOUTUBE_DOMAINS:
-        raise ValidationError('Разрешены только ссылки на youtube.com.')
+    if extract_youtube_video_id(value) is None:
+        raise ValidationError('Разрешены только ссылки на видео YouTube (youtube.com, youtu.be).')
 
     return value
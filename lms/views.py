@@ -1,5 +1,17 @@
+from collections.abc import Mapping
+from datetime import timedelta
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.db.models import Q
+from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.views.decorators.http import require_GET
 from rest_framework import status, viewsets
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.decorators import action
 from rest_framework.generics import (
     ListCreateAPIView,
     RetrieveUpdateDestroyAPIView
@@ -10,18 +22,32 @@ from rest_framework.views import APIView
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiResponse
 from drf_spectacular.types import OpenApiTypes
 
-from .models import Course, Lesson, CourseSubscription
+from eigth_module.db_router import ReplicaReadMixin
+from users.authentication import VERSION_CLAIM, CachedJWTAuthentication
+from users.models import User
+from users.ratelimit import SubscriptionToggleThrottle
+
+from .models import Course, Lesson, CourseSubscription, NotificationOutbox
+from .events import broadcast_update, stream_events
+from .outbox import enqueue_notification
 from .serializers import (
+    CourseListSerializer,
     CourseSerializer,
+    CourseShortSerializer,
     LessonSerializer,
     LessonListSerializer,
-    LessonDetailSerializer
+    LessonDetailSerializer,
+    SubscriptionStatsQuerySerializer,
+    SubscriptionStatsSerializer,
 )
-from .permissions import CourseLessonPermission
-from .paginators import CoursePagination, LessonPagination
+from .permissions import CourseLessonPermission, user_is_moderator
+from .paginators import CoursePagination, CourseFeedPagination, LessonPagination
+from .recommendations import get_recommended_course_ids
+from .services import get_user_course_ids, get_user_entitlements
+from .subscriptions import course_churn, subscriber_count_at
 
 
-class CourseViewSet(viewsets.ModelViewSet):
+class CourseViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     """
     ViewSet для управления курсами.
     
@@ -30,6 +56,9 @@ class CourseViewSet(viewsets.ModelViewSet):
     - Детали курса: GET /api/courses/{id}/
     - Обновление курса: PUT/PATCH /api/courses/{id}/
     - Удаление курса: DELETE /api/courses/{id}/
+    - Лента "мои курсы": GET /api/courses/feed/
+    - Рекомендации: GET /api/courses/{id}/recommendations/
+    - Статистика подписок: GET /api/courses/{id}/subscription-stats/
     
     Модераторы видят все курсы, обычные пользователи - только свои.
     """
@@ -41,7 +70,7 @@ class CourseViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         """Фильтрация queryset в зависимости от прав пользователя"""
         user = self.request.user
-        is_moderator = user.groups.filter(name='Модераторы').exists()
+        is_moderator = user_is_moderator(user)
 
         if is_moderator:
             # Модераторы видят все курсы
@@ -50,26 +79,147 @@ class CourseViewSet(viewsets.ModelViewSet):
             # Обычные пользователи видят только свои курсы
             return Course.objects.filter(owner=user)
 
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return CourseListSerializer
+        return super().get_serializer_class()
+
     def perform_create(self, serializer):
         """Устанавливаем владельца при создании курса"""
         serializer.save(owner=self.request.user)
 
     def perform_update(self, serializer):
         """Обновляет курс и отправляет уведомления подписчикам"""
-        instance = serializer.save()
-        # Отправляем уведомления асинхронно
-        from .tasks import send_course_update_notification
-        send_course_update_notification.delay(instance.id)
+        with transaction.atomic():
+            instance = serializer.save()
+            # Уведомление уйдет в очередь только после коммита
+            enqueue_notification(NotificationOutbox.KIND_COURSE_UPDATE, instance.id)
+            broadcast_update(NotificationOutbox.KIND_COURSE_UPDATE, instance.id)
+
+    @extend_schema(
+        summary='Лента "мои курсы"',
+        description='Курсы пользователя: свои, с подпиской и оплаченные (курс или урок курса)',
+        responses={200: CourseShortSerializer(many=True)}
+    )
+    @action(
+        detail=False,
+        methods=['get'],
+        url_path='feed',
+        serializer_class=CourseShortSerializer,
+        pagination_class=CourseFeedPagination,
+    )
+    def feed(self, request):
+        """Лента всех курсов, доступных пользователю"""
+        queryset = Course.objects.filter(id__in=get_user_course_ids(request.user.id))
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @extend_schema(
+        summary='Рекомендации курса',
+        description=(
+            'Курсы, на которые также подписаны подписчики этого курса (обновляются раз в сутки). '
+            'Курсы, которые уже есть в ленте пользователя, не показываются.'
+        ),
+        responses={200: CourseShortSerializer(many=True)}
+    )
+    @action(
+        detail=True,
+        methods=['get'],
+        url_path='recommendations',
+        serializer_class=CourseShortSerializer,
+        pagination_class=None,
+    )
+    def recommendations(self, request, pk=None):
+        """Похожие курсы по совместным подпискам (до COURSE_RECOMMENDATIONS_TOP_K)"""
+        course = get_object_or_404(Course, pk=pk)
+        known = set(get_user_course_ids(request.user.id))
+        course_ids = [course_id for course_id in get_recommended_course_ids(course.id) if course_id not in known]
+        courses = Course.objects.in_bulk(course_ids)
+        # in_bulk не сохраняет порядок: восстанавливаем его по убыванию сходства
+        ordered = [courses[course_id] for course_id in course_ids if course_id in courses]
+        return Response(self.get_serializer(ordered, many=True).data)
+
+    @extend_schema(
+        summary='Статистика подписок курса',
+        description=(
+            'Число подписчиков на момент at и отток за период [since, until) по журналу подписок. '
+            'По умолчанию at и until - текущее время, since - на 30 дней раньше until.'
+        ),
+        parameters=[
+            OpenApiParameter('at', OpenApiTypes.DATETIME, description='Момент для числа подписчиков'),
+            OpenApiParameter('since', OpenApiTypes.DATETIME, description='Начало периода оттока'),
+            OpenApiParameter('until', OpenApiTypes.DATETIME, description='Конец периода оттока (не включается)'),
+        ],
+        responses={200: SubscriptionStatsSerializer, 400: OpenApiResponse(description='Ошибка валидации')},
+    )
+    @action(detail=True, methods=['get'], url_path='subscription-stats', pagination_class=None)
+    def subscription_stats(self, request, pk=None):
+        """Число подписчиков на момент времени и отток подписчиков курса"""
+        course = self.get_object()
+        params = SubscriptionStatsQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        now = timezone.now()
+        at = params.validated_data.get('at') or now
+        until = params.validated_data.get('until') or now
+        since = params.validated_data.get('since') or until - timedelta(days=30)
+
+        churn = course_churn([course.id], since, until)[course.id]
+        data = {
+            'course': course.id,
+            'at': at,
+            'subscribers': subscriber_count_at(course.id, at),
+            'since': since,
+            'until': until,
+            **churn,
+        }
+        return Response(SubscriptionStatsSerializer(data).data)
+
+
+class LessonAccessMixin:
+    """
+    Общая логика доступа к урокам: модераторы видят все уроки,
+    обычные пользователи - свои и оплаченные (курс целиком или отдельный урок).
+    Оплаченные доступы берутся из кеша и передаются в сериализатор.
+    """
+
+    def _get_access(self):
+        if not hasattr(self, '_access'):
+            user = self.request.user
+            is_moderator = user_is_moderator(user)
+            self._access = (is_moderator, get_user_entitlements(user.id))
+        return self._access
+
+    def get_queryset(self):
+        """Фильтрация queryset в зависимости от прав пользователя"""
+        user = self.request.user
+        is_moderator, entitlements = self._get_access()
+
+        if is_moderator:
+            # Модераторы видят все уроки
+            return Lesson.objects.all()
+        # Обычные пользователи видят свои и оплаченные уроки
+        return Lesson.objects.filter(
+            Q(owner=user)
+            | Q(course_id__in=entitlements.course_ids)
+            | Q(id__in=entitlements.lesson_ids)
+        )
 
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.request.user.is_authenticated:
+            context['is_moderator'], context['entitlements'] = self._get_access()
+        return context
 
-class LessonListCreateView(ListCreateAPIView):
+
+class LessonListCreateView(ReplicaReadMixin, LessonAccessMixin, ListCreateAPIView):
     """
     Представление для получения списка уроков и создания нового урока.
     
     - Список уроков: GET /api/lessons/
     - Создание урока: POST /api/lessons/
     
-    Модераторы видят все уроки, обычные пользователи - только свои.
+    Модераторы видят все уроки, обычные пользователи - свои и оплаченные.
     Видео-ссылки должны быть только с YouTube.
     """
     queryset = Lesson.objects.all()
@@ -81,27 +231,16 @@ class LessonListCreateView(ListCreateAPIView):
             return LessonListSerializer
         return LessonSerializer
 
-    def get_queryset(self):
-        """Фильтрация queryset в зависимости от прав пользователя"""
-        user = self.request.user
-        is_moderator = user.groups.filter(name='Модераторы').exists()
-
-        if is_moderator:
-            # Модераторы видят все уроки
-            return Lesson.objects.all()
-        else:
-            # Обычные пользователи видят только свои уроки
-            return Lesson.objects.filter(owner=user)
-
     def perform_create(self, serializer):
         """Устанавливаем владельца при создании урока и отправляет уведомления"""
-        lesson = serializer.save(owner=self.request.user)
-        # Отправляем уведомления асинхронно с проверкой на 4 часа
-        from .tasks import check_and_send_lesson_update_notification
-        check_and_send_lesson_update_notification.delay(lesson.id)
+        with transaction.atomic():
+            lesson = serializer.save(owner=self.request.user)
+            # Уведомление с проверкой на 4 часа уйдет в очередь только после коммита
+            enqueue_notification(NotificationOutbox.KIND_LESSON_UPDATE, lesson.course_id, lesson.id)
+            broadcast_update(NotificationOutbox.KIND_LESSON_UPDATE, lesson.course_id, lesson.id)
 
 
-class LessonRetrieveUpdateDestroyView(RetrieveUpdateDestroyAPIView):
+class LessonRetrieveUpdateDestroyView(ReplicaReadMixin, LessonAccessMixin, RetrieveUpdateDestroyAPIView):
     """
     Представление для получения, обновления и удаления урока.
     
@@ -110,6 +249,7 @@ class LessonRetrieveUpdateDestroyView(RetrieveUpdateDestroyAPIView):
     - Удаление урока: DELETE /api/lessons/{id}/
     
     Модераторы могут управлять всеми уроками, обычные пользователи - только своими.
+    Оплаченные уроки доступны покупателю только для просмотра.
     """
     queryset = Lesson.objects.all()
     permission_classes = [CourseLessonPermission]
@@ -119,29 +259,19 @@ class LessonRetrieveUpdateDestroyView(RetrieveUpdateDestroyAPIView):
             return LessonDetailSerializer
         return LessonSerializer
 
-    def get_queryset(self):
-        """Фильтрация queryset в зависимости от прав пользователя"""
-        user = self.request.user
-        is_moderator = user.groups.filter(name='Модераторы').exists()
-
-        if is_moderator:
-            # Модераторы видят все уроки
-            return Lesson.objects.all()
-        else:
-            # Обычные пользователи видят только свои уроки
-            return Lesson.objects.filter(owner=user)
-
     def perform_update(self, serializer):
         """Обновляет урок и отправляет уведомления подписчикам с проверкой на 4 часа"""
-        lesson = serializer.save()
-        # Отправляем уведомления асинхронно с проверкой на 4 часа
-        from .tasks import check_and_send_lesson_update_notification
-        check_and_send_lesson_update_notification.delay(lesson.id)
+        with transaction.atomic():
+            lesson = serializer.save()
+            # Уведомление с проверкой на 4 часа уйдет в очередь только после коммита
+            enqueue_notification(NotificationOutbox.KIND_LESSON_UPDATE, lesson.course_id, lesson.id)
+            broadcast_update(NotificationOutbox.KIND_LESSON_UPDATE, lesson.course_id, lesson.id)
 
 
 class CourseSubscriptionToggleAPIView(APIView):
     """Управление подпиской пользователя на курс"""
     permission_classes = [IsAuthenticated]
+    throttle_classes = [SubscriptionToggleThrottle]
 
     @extend_schema(
         summary='Переключить подписку на курс',
@@ -173,7 +303,7 @@ class CourseSubscriptionToggleAPIView(APIView):
     )
     def post(self, request, *args, **kwargs):
         user = request.user
-        course_id = request.data.get('course')
+        course_id = request.data.get('course') if isinstance(request.data, Mapping) else None
 
         if not course_id:
             return Response({'message': 'Не передан идентификатор курса'}, status=status.HTTP_400_BAD_REQUEST)
@@ -181,12 +311,67 @@ class CourseSubscriptionToggleAPIView(APIView):
         course = get_object_or_404(Course, pk=course_id)
         subscription_qs = CourseSubscription.objects.filter(user=user, course=course)
 
-        if subscription_qs.exists():
-            subscription_qs.delete()
-            message = 'Подписка удалена'
-        else:
-            CourseSubscription.objects.create(user=user, course=course)
-            message = 'Подписка добавлена'
+        # Подписка и запись в журнале подписок меняются вместе
+        with transaction.atomic():
+            if subscription_qs.exists():
+                subscription_qs.delete()
+                message = 'Подписка удалена'
+            else:
+                CourseSubscription.objects.create(user=user, course=course)
+                message = 'Подписка добавлена'
 
         return Response({'message': message}, status=status.HTTP_200_OK)
 
+
+def _authenticate_stream_request(request):
+    """
+    Пользователь и access-токен из заголовка Authorization или параметра
+    token (EventSource в браузере не умеет передавать заголовки)
+
+    Returns:
+        tuple | None: (пользователь, проверенный токен) или None
+    """
+    authentication = CachedJWTAuthentication()
+    try:
+        raw_token = request.GET.get('token')
+        if raw_token:
+            validated_token = authentication.get_validated_token(raw_token)
+            return authentication.get_user(validated_token), validated_token
+        return authentication.authenticate(request)
+    except AuthenticationFailed:
+        return None
+
+
+def _stream_access_is_valid(user_id, token_version) -> bool:
+    """Пользователь активен и токены не отозваны (по БД, без кеша процесса)"""
+    users = User.objects.filter(id=user_id, is_active=True)
+    if token_version is not None:
+        users = users.filter(token_version=token_version)
+    return users.exists()
+
+
+@require_GET
+async def course_events(request):
+    """
+    Поток server-sent events об изменениях курсов пользователя (своих,
+    с подпиской и оплаченных): GET /api/events/
+
+    Отдается только под ASGI; набор курсов фиксируется при подключении,
+    после подписки на новый курс клиент переподключается. Поток закрывается
+    событием access_expired, когда истекает или отзывается токен.
+    """
+    result = await sync_to_async(_authenticate_stream_request)(request)
+    if result is None:
+        return JsonResponse({'detail': 'Учетные данные не были предоставлены.'}, status=status.HTTP_401_UNAUTHORIZED)
+    user, token = result
+    course_ids = await sync_to_async(get_user_course_ids)(user.id)
+
+    check_access = sync_to_async(partial(_stream_access_is_valid, user.id, token.get(VERSION_CLAIM)))
+    response = StreamingHttpResponse(
+        stream_events(course_ids, expires_at=token['exp'], check_access=check_access),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    # nginx не должен буферизовать поток
+    response['X-Accel-Buffering'] = 'no'
+    return response
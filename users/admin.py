@@ -1,5 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+
+from eigth_module.pagination import EstimatedCountPaginator
 from .models import User, Payment
 
 
@@ -9,7 +11,7 @@ class UserAdmin(BaseUserAdmin):
     list_filter = ('is_staff', 'is_active', 'is_superuser')
     fieldsets = (
         (None, {'fields': ('email', 'password')}),
-        ('Персональная информация', {'fields': ('first_name', 'last_name', 'phone', 'city', 'avatar')}),
+        ('Персональная информация', {'fields': ('first_name', 'last_name', 'phone', 'city', 'avatar', 'email_digest')}),
         ('Права доступа', {'fields': ('is_active', 'is_staff', 'is_superuser', 'groups', 'user_permissions')}),
         ('Важные даты', {'fields': ('last_login', 'date_joined')}),
     )
@@ -21,12 +23,19 @@ class UserAdmin(BaseUserAdmin):
     )
     search_fields = ('email', 'first_name', 'last_name')
     ordering = ('email',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 @admin.register(Payment)
 class PaymentAdmin(admin.ModelAdmin):
-    list_display = ('user', 'payment_date', 'course', 'lesson', 'amount', 'payment_method')
-    list_filter = ('payment_method', 'payment_date', 'course', 'lesson')
+    list_display = ('user', 'payment_date', 'course', 'lesson', 'amount', 'payment_method', 'payment_status')
+    list_select_related = ('user', 'course', 'lesson__course')
+    # Курсы и уроки не выводятся фильтрами: боковая панель загружала бы их все
+    list_filter = ('payment_method', 'payment_status')
+    date_hierarchy = 'payment_date'
     search_fields = ('user__email', 'course__title', 'lesson__title')
-    raw_id_fields = ('user', 'course', 'lesson')
+    autocomplete_fields = ('user', 'course', 'lesson')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
@@ -0,0 +1,98 @@
+"""
+JWT-аутентификация без запроса пользователя в БД на каждый запрос.
+
+В токен при выдаче записываются id пользователя, версия токенов (ver),
+is_active, is_superuser и роль модератора. request.user берется из кеша
+процесса с коротким временем жизни (AUTH_USER_CACHE_TTL); роль модератора
+читается из токена, поэтому проверки прав не обращаются к группам.
+
+Отзыв: при блокировке пользователя или смене его групп версия токенов
+(User.token_version) увеличивается, и токены со старой версией отклоняются
+после обновления записи в кеше процесса (не позже AUTH_USER_CACHE_TTL).
+"""
+import copy
+import time
+
+from django.conf import settings
+from django.db.models import F
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+
+MODERATORS_GROUP = 'Модераторы'
+
+VERSION_CLAIM = 'ver'
+ACTIVE_CLAIM = 'act'
+SUPERUSER_CLAIM = 'su'
+MODERATOR_CLAIM = 'mod'
+
+# id пользователя -> (время загрузки, пользователь)
+_user_cache = {}
+
+
+def add_user_claims(token, user):
+    """Записывает в токен версию и права пользователя"""
+    token[VERSION_CLAIM] = user.token_version
+    token[ACTIVE_CLAIM] = user.is_active
+    token[SUPERUSER_CLAIM] = user.is_superuser
+    token[MODERATOR_CLAIM] = user.groups.filter(name=MODERATORS_GROUP).exists()
+    return token
+
+
+def bump_token_version(user_ids):
+    """Отзывает выданные пользователям токены"""
+    from .models import User
+
+    user_ids = list(user_ids)
+    User.objects.filter(id__in=user_ids).update(token_version=F('token_version') + 1)
+    for user_id in user_ids:
+        evict_cached_user(user_id)
+
+
+def evict_cached_user(user_id):
+    _user_cache.pop(user_id, None)
+
+
+def clear_user_cache():
+    _user_cache.clear()
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication с пользователем из кеша процесса и правами из токена"""
+
+    def get_user(self, validated_token):
+        if VERSION_CLAIM not in validated_token:
+            # Токен выдан до появления версий - обычная проверка по БД
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('В токене нет идентификатора пользователя')
+
+        user = self._get_cached_user(user_id)
+        if user is None:
+            raise AuthenticationFailed('Пользователь не найден', code='user_not_found')
+        if not user.is_active or not validated_token.get(ACTIVE_CLAIM, True):
+            raise AuthenticationFailed('Пользователь заблокирован', code='user_inactive')
+        if validated_token[VERSION_CLAIM] != user.token_version:
+            raise AuthenticationFailed('Токен отозван', code='token_revoked')
+
+        # Копия, чтобы изменения в представлении не попали в кеш других запросов
+        user = copy.copy(user)
+        user.is_moderator = bool(validated_token.get(MODERATOR_CLAIM, False))
+        return user
+
+    def _get_cached_user(self, user_id):
+        cached = _user_cache.get(user_id)
+        now = time.monotonic()
+        if cached is not None and now - cached[0] < settings.AUTH_USER_CACHE_TTL:
+            return cached[1]
+
+        user = self.user_model.objects.filter(**{api_settings.USER_ID_FIELD: user_id}).first()
+        if user is not None:
+            if len(_user_cache) >= settings.AUTH_USER_CACHE_SIZE:
+                _user_cache.clear()
+            _user_cache[user_id] = (now, user)
+        return user
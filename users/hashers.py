@@ -0,0 +1,19 @@
+"""
+Хеширование паролей с настраиваемой стоимостью.
+
+Число итераций PBKDF2 задается настройкой PASSWORD_PBKDF2_ITERATIONS (меньше
+для разработки и тестов, больше для продакшена). Хеши с другим числом
+итераций продолжают проверяться и пересчитываются при следующем входе
+пользователя (check_password с setter в ModelBackend).
+"""
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class ConfigurablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """PBKDF2-SHA256 с числом итераций из настроек; формат хеша стандартный"""
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_PBKDF2_ITERATIONS
+
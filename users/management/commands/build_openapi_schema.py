@@ -0,0 +1,25 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from eigth_module.openapi import build_etag, write_schema
+
+
+class Command(BaseCommand):
+    help = 'Собирает схему OpenAPI в файл, который отдается с /api/schema/'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--file',
+            type=Path,
+            default=None,
+            help='Путь к файлу схемы (по умолчанию OPENAPI_SCHEMA_FILE)',
+        )
+
+    def handle(self, *args, **options):
+        path = options['file'] or settings.OPENAPI_SCHEMA_FILE
+        content = write_schema(path)
+        self.stdout.write(
+            self.style.SUCCESS(f'Схема OpenAPI записана в {path} ({len(content)} байт, ETag {build_etag(content)})')
+        )
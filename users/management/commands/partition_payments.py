@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from users.partitioning import archive_partitions, convert_to_partitioned, ensure_partitions
+
+
+class Command(BaseCommand):
+    help = 'Секционирует таблицу платежей по месяцам, создает секции и переносит старые в архив (PostgreSQL)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--convert',
+            action='store_true',
+            help='Перевести таблицу платежей в секционированную (однократно, блокирует таблицу)',
+        )
+        parser.add_argument(
+            '--drop-old',
+            action='store_true',
+            help='После --convert удалить старую таблицу users_payment_unpartitioned',
+        )
+        parser.add_argument(
+            '--months-ahead',
+            type=int,
+            default=None,
+            help='На сколько месяцев вперед создать секции (по умолчанию PAYMENT_PARTITION_MONTHS_AHEAD)',
+        )
+        parser.add_argument(
+            '--archive-older-than',
+            type=int,
+            default=None,
+            metavar='MONTHS',
+            help='Перенести в архив секции старше MONTHS месяцев (по умолчанию PAYMENT_PARTITION_RETENTION_MONTHS)',
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Секционирование платежей поддерживается только на PostgreSQL')
+
+        if options['convert']:
+            moved = convert_to_partitioned(drop_old=options['drop_old'])
+            self.stdout.write(self.style.SUCCESS(f'Таблица платежей секционирована, перенесено строк: {moved}'))
+
+        for name in ensure_partitions(months_ahead=options['months_ahead']):
+            self.stdout.write(f'Создана секция {name}')
+        for name in archive_partitions(retention_months=options['archive_older_than']):
+            self.stdout.write(f'Секция {name} перенесена в архив')
@@ -0,0 +1,45 @@
+# Generated manually
+
+from django.db import migrations, models
+
+from eigth_module.migration_operations import AddIndexConcurrentlyIfPostgres
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY нельзя выполнять внутри транзакции
+    atomic = False
+
+    dependencies = [
+        ('users', '0002_payment_stripe_fields'),
+    ]
+
+    operations = [
+        AddIndexConcurrentlyIfPostgres(
+            model_name='payment',
+            index=models.Index(fields=['user', '-payment_date'], name='users_pay_user_date_idx'),
+        ),
+        AddIndexConcurrentlyIfPostgres(
+            model_name='payment',
+            index=models.Index(fields=['payment_status', '-payment_date'], name='users_pay_status_date_idx'),
+        ),
+        AddIndexConcurrentlyIfPostgres(
+            model_name='payment',
+            index=models.Index(fields=['payment_method', '-payment_date'], name='users_pay_method_date_idx'),
+        ),
+        AddIndexConcurrentlyIfPostgres(
+            model_name='payment',
+            index=models.Index(
+                fields=['user', 'course', 'lesson'],
+                condition=models.Q(payment_status='paid'),
+                name='users_pay_user_paid_idx',
+            ),
+        ),
+        AddIndexConcurrentlyIfPostgres(
+            model_name='user',
+            index=models.Index(
+                fields=['last_login'],
+                condition=models.Q(is_active=True),
+                name='users_user_active_login_idx',
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_payment_user_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='email_digest',
+            field=models.BooleanField(default=False, help_text='Получать обновления курсов одним письмом за период вместо отдельных писем', verbose_name='Дайджест уведомлений'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:07
+
+import eigth_module.images
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_user_email_digest'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='avatar_thumbnail',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='avatars/thumbs/', verbose_name='Уменьшенная аватарка'),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='avatar',
+            field=models.ImageField(blank=True, null=True, upload_to='avatars/', validators=[eigth_module.images.validate_image_upload], verbose_name='Аватарка'),
+        ),
+    ]
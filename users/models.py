@@ -1,6 +1,8 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 
+from eigth_module.images import validate_image_upload
+
 
 class User(AbstractUser):
     """Кастомная модель пользователя с email в качестве логина"""
@@ -8,7 +10,24 @@ class User(AbstractUser):
     email = models.EmailField(unique=True, verbose_name='Email')
     phone = models.CharField(max_length=20, blank=True, null=True, verbose_name='Телефон')
     city = models.CharField(max_length=100, blank=True, null=True, verbose_name='Город')
-    avatar = models.ImageField(upload_to='avatars/', blank=True, null=True, verbose_name='Аватарка')
+    avatar = models.ImageField(
+        upload_to='avatars/', blank=True, null=True, validators=[validate_image_upload], verbose_name='Аватарка'
+    )
+    avatar_thumbnail = models.ImageField(
+        upload_to='avatars/thumbs/', blank=True, null=True, editable=False, verbose_name='Уменьшенная аватарка'
+    )
+    email_digest = models.BooleanField(
+        default=False,
+        verbose_name='Дайджест уведомлений',
+        help_text='Получать обновления курсов одним письмом за период вместо отдельных писем'
+    )
+
+    token_version = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Версия токенов',
+        help_text='Увеличивается при блокировке и смене групп: выданные ранее токены перестают действовать'
+    )
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = []
@@ -16,6 +35,14 @@ class User(AbstractUser):
     class Meta:
         verbose_name = 'Пользователь'
         verbose_name_plural = 'Пользователи'
+        indexes = [
+            # Поиск активных пользователей без входа в block_inactive_users
+            models.Index(
+                fields=['last_login'],
+                condition=models.Q(is_active=True),
+                name='users_user_active_login_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.email
@@ -98,6 +125,19 @@ class Payment(models.Model):
         verbose_name = 'Платеж'
         verbose_name_plural = 'Платежи'
         ordering = ['-payment_date']
+        indexes = [
+            # История платежей пользователя (PaymentViewSet)
+            models.Index(fields=['user', '-payment_date'], name='users_pay_user_date_idx'),
+            # Фильтры PaymentViewSet по статусу и способу оплаты с сортировкой по дате
+            models.Index(fields=['payment_status', '-payment_date'], name='users_pay_status_date_idx'),
+            models.Index(fields=['payment_method', '-payment_date'], name='users_pay_method_date_idx'),
+            # Оплаченные курсы и уроки пользователя (лента и доступы в lms), покрывающий индекс
+            models.Index(
+                fields=['user', 'course', 'lesson'],
+                condition=models.Q(payment_status='paid'),
+                name='users_pay_user_paid_idx',
+            ),
+        ]
 
     def __str__(self):
         payment_for = self.course.title if self.course else (self.lesson.title if self.lesson else 'Не указано')
@@ -0,0 +1,282 @@
+"""
+Секционирование таблицы платежей по месяцам (PostgreSQL).
+
+Таблица users_payment переводится в секционированную по диапазону
+payment_date (PARTITION BY RANGE) командой
+`python manage.py partition_payments --convert`. Секции называются
+users_payment_pYYYY_MM и создаются заранее на PAYMENT_PARTITION_MONTHS_AHEAD
+месяцев вперед задачей maintain_payment_partitions. Секции старше
+PAYMENT_PARTITION_RETENTION_MONTHS отсоединяются и переносятся в схему
+PAYMENT_ARCHIVE_SCHEMA (и табличное пространство PAYMENT_ARCHIVE_TABLESPACE,
+если задано): из API они больше не читаются, но данные остаются в БД.
+
+Платеж с payment_date вне созданных месяцев (задача не запускалась,
+платеж задним числом в архивный месяц) попадает в секцию по умолчанию
+users_payment_default, а не завершается ошибкой INSERT. При создании секции
+месяца ее строки переносятся из секции по умолчанию; строки прошлых месяцев
+остаются в ней до ручного переноса.
+
+Запросы с условием на payment_date читают только подходящие секции
+(partition pruning), индексы из Payment.Meta создаются на родительской
+таблице и наследуются секциями. На других СУБД функции ничего не делают.
+"""
+import datetime
+import re
+
+from django.conf import settings
+from django.db import NotSupportedError, connections, transaction
+
+
+PARTITION_SUFFIX_RE = re.compile(r'_p(?P<year>\d{4})_(?P<month>\d{2})$')
+
+
+def get_payment_model():
+    from .models import Payment
+    return Payment
+
+
+def month_start(value) -> datetime.date:
+    return datetime.date(value.year, value.month, 1)
+
+
+def add_months(month: datetime.date, count: int) -> datetime.date:
+    index = month.year * 12 + month.month - 1 + count
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: datetime.date) -> str:
+    return f'{table}_p{month.year:04d}_{month.month:02d}'
+
+
+def partition_month(name: str):
+    """Месяц секции по ее имени или None, если имя не по шаблону"""
+    match = PARTITION_SUFFIX_RE.search(name)
+    if match is None:
+        return None
+    return datetime.date(int(match['year']), int(match['month']), 1)
+
+
+def partition_ddl(table: str, month: datetime.date) -> str:
+    """CREATE TABLE для секции за месяц (границы в UTC, верхняя не включается)"""
+    return (
+        f'CREATE TABLE IF NOT EXISTS "{partition_name(table, month)}" PARTITION OF "{table}" '
+        f'{partition_bounds_sql(month)}'
+    )
+
+
+def default_partition_name(table: str) -> str:
+    return f'{table}_default'
+
+
+def default_partition_ddl(table: str) -> str:
+    """CREATE TABLE для секции по умолчанию (строки вне месячных секций)"""
+    return f'CREATE TABLE IF NOT EXISTS "{default_partition_name(table)}" PARTITION OF "{table}" DEFAULT'
+
+
+def partition_bounds_sql(month: datetime.date) -> str:
+    return f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') TO ('{add_months(month, 1).isoformat()} 00:00:00+00')"
+
+
+def partitioned_table_sql(statements, table: str, column: str):
+    """
+    Переделывает DDL модели из schema_editor в DDL секционированной таблицы
+
+    Первичный ключ секционированной таблицы должен включать ключ секционирования,
+    поэтому он становится составным (id, payment_date); id по-прежнему
+    выдается последовательностью и уникален.
+    """
+    create_prefix = f'CREATE TABLE "{table}" '
+    result = []
+    for sql in statements:
+        if sql.startswith(create_prefix):
+            if ' PRIMARY KEY GENERATED ' not in sql:
+                raise ValueError(f'Неожиданный DDL таблицы {table}: {sql}')
+            sql = sql.rstrip(';').replace(' PRIMARY KEY GENERATED ', ' GENERATED ', 1)
+            sql = f'{sql[:-1]}, PRIMARY KEY ("id", "{column}")) PARTITION BY RANGE ("{column}")'
+        result.append(sql.rstrip(';'))
+    return result
+
+
+def is_partitioned(using='default') -> bool:
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return False
+    table = get_payment_model()._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s))', [table],
+        )
+        return cursor.fetchone()[0]
+
+
+def has_default_partition(cursor, table: str) -> bool:
+    cursor.execute(
+        'SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s) AND partdefid <> 0)',
+        [table],
+    )
+    return cursor.fetchone()[0]
+
+
+def list_partitions(using='default'):
+    """Имена секций таблицы платежей, отсортированные по месяцу"""
+    table = get_payment_model()._meta.db_table
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            'SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid '
+            'WHERE i.inhparent = %s::regclass',
+            [table],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    return sorted(name for name in names if partition_month(name) is not None)
+
+
+def ensure_partitions(months_ahead=None, since=None, using='default'):
+    """
+    Создает недостающие секции с месяца since (по умолчанию текущего)
+    на months_ahead месяцев вперед
+
+    Returns:
+        list: Имена секций, которые были созданы
+    """
+    if not is_partitioned(using):
+        return []
+    months_ahead = settings.PAYMENT_PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+    table = get_payment_model()._meta.db_table
+    current = month_start(datetime.datetime.now(datetime.timezone.utc))
+    month = month_start(since) if since is not None else current
+
+    column = get_payment_model()._meta.get_field('payment_date').column
+    existing = set(list_partitions(using))
+    created = []
+    with connections[using].cursor() as cursor:
+        cursor.execute(default_partition_ddl(table))
+        while month <= add_months(current, months_ahead):
+            name = partition_name(table, month)
+            if name not in existing:
+                with transaction.atomic(using=using):
+                    _create_partition(cursor, table, column, month)
+                created.append(name)
+            month = add_months(month, 1)
+    return created
+
+
+def _create_partition(cursor, table: str, column: str, month: datetime.date):
+    """
+    Создает секцию месяца. Если строки этого месяца уже попали в секцию
+    по умолчанию, секция создается отдельной таблицей, строки переносятся
+    в нее и она присоединяется (иначе CREATE ... PARTITION OF завершится ошибкой)
+    """
+    name = partition_name(table, month)
+    default = default_partition_name(table)
+    in_month = f'"{column}" >= %s AND "{column}" < %s'
+    bounds = [f'{month.isoformat()} 00:00:00+00', f'{add_months(month, 1).isoformat()} 00:00:00+00']
+    cursor.execute(f'SELECT EXISTS (SELECT 1 FROM "{default}" WHERE {in_month})', bounds)
+    if not cursor.fetchone()[0]:
+        cursor.execute(partition_ddl(table, month))
+        return
+    cursor.execute(f'CREATE TABLE "{name}" (LIKE "{table}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+    cursor.execute(f'INSERT INTO "{name}" SELECT * FROM "{default}" WHERE {in_month}', bounds)
+    cursor.execute(f'DELETE FROM "{default}" WHERE {in_month}', bounds)
+    cursor.execute(f'ALTER TABLE "{table}" ATTACH PARTITION "{name}" {partition_bounds_sql(month)}')
+
+
+def archive_partitions(retention_months=None, using='default'):
+    """
+    Отсоединяет секции старше retention_months месяцев и переносит их
+    в архивную схему. DETACH PARTITION CONCURRENTLY (PostgreSQL 14+) недоступен
+    при наличии секции по умолчанию - тогда секция отсоединяется обычным
+    DETACH в отдельной короткой транзакции (автокоммит), а перенос в табличное
+    пространство и схему выполняется уже после снятия блокировки с таблицы платежей
+
+    Returns:
+        list: Имена перенесенных секций
+    """
+    retention_months = settings.PAYMENT_PARTITION_RETENTION_MONTHS if retention_months is None else retention_months
+    if not retention_months or not is_partitioned(using):
+        return []
+    connection = connections[using]
+    table = get_payment_model()._meta.db_table
+    schema = settings.PAYMENT_ARCHIVE_SCHEMA
+    tablespace = settings.PAYMENT_ARCHIVE_TABLESPACE
+    cutoff = add_months(month_start(datetime.datetime.now(datetime.timezone.utc)), -retention_months)
+
+    archived = []
+    with connection.cursor() as cursor:
+        concurrent = connection.pg_version >= 140000 and not has_default_partition(cursor, table)
+        concurrently = ' CONCURRENTLY' if concurrent else ''
+        cursor.execute(f'CREATE SCHEMA IF NOT EXISTS "{schema}"')
+        for name in list_partitions(using):
+            if partition_month(name) >= cutoff:
+                continue
+            # DETACH ... CONCURRENTLY нельзя выполнять внутри транзакции
+            cursor.execute(f'ALTER TABLE "{table}" DETACH PARTITION "{name}"{concurrently}')
+            if tablespace:
+                cursor.execute(f'ALTER TABLE "{name}" SET TABLESPACE "{tablespace}"')
+            cursor.execute(f'ALTER TABLE "{name}" SET SCHEMA "{schema}"')
+            archived.append(name)
+    return archived
+
+
+def convert_to_partitioned(drop_old=False, using='default'):
+    """
+    Переводит users_payment в секционированную таблицу с переносом данных
+
+    Старая таблица переименовывается в users_payment_unpartitioned (вместе
+    с индексами) и удаляется при drop_old=True. Выполняется в одной
+    транзакции и блокирует таблицу платежей до конца копирования.
+
+    Returns:
+        int: Количество перенесенных строк
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        raise NotSupportedError(
+            f'Секционирование платежей поддерживается только на PostgreSQL, текущая СУБД: {connection.vendor}'
+        )
+    if is_partitioned(using):
+        return 0
+
+    model = get_payment_model()
+    table = model._meta.db_table
+    column = model._meta.get_field('payment_date').column
+    old_table = f'{table}_unpartitioned'
+    columns = ', '.join(f'"{field.column}"' for field in model._meta.local_concrete_fields)
+
+    with connection.schema_editor(collect_sql=True, atomic=False) as editor:
+        editor.create_model(model)
+    statements = partitioned_table_sql(editor.collected_sql, table, column)
+
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE "{table}" IN ACCESS EXCLUSIVE MODE')
+        cursor.execute(f'ALTER TABLE "{table}" RENAME TO "{old_table}"')
+        # Имена индексов уникальны в схеме: освобождаем их для новой таблицы
+        cursor.execute('SELECT indexname FROM pg_indexes WHERE tablename = %s', [old_table])
+        for (index_name,) in cursor.fetchall():
+            cursor.execute(f'ALTER INDEX "{index_name}" RENAME TO "{index_name[:48]}_unpartitioned"')
+        cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [f'"{old_table}"'])
+        (sequence,) = cursor.fetchone()
+        if sequence:
+            cursor.execute(f'ALTER SEQUENCE {sequence} RENAME TO "{old_table}_id_seq"')
+
+        cursor.execute(f'SELECT min("{column}"), max("{column}") FROM "{old_table}"')
+        first, last = cursor.fetchone()
+
+        for sql in statements:
+            cursor.execute(sql)
+        cursor.execute(default_partition_ddl(table))
+        now = datetime.datetime.now(datetime.timezone.utc)
+        month = month_start(first or now)
+        last_month = add_months(month_start(max(last or now, now)), settings.PAYMENT_PARTITION_MONTHS_AHEAD)
+        while month <= last_month:
+            cursor.execute(partition_ddl(table, month))
+            month = add_months(month, 1)
+
+        cursor.execute(f'INSERT INTO "{table}" ({columns}) SELECT {columns} FROM "{old_table}"')
+        moved = cursor.rowcount
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence('\"{table}\"', 'id'), "
+            f'COALESCE((SELECT max("id") FROM "{table}"), 0) + 1, false)'
+        )
+        if drop_old:
+            cursor.execute(f'DROP TABLE "{old_table}"')
+    return moved
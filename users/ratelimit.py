@@ -0,0 +1,384 @@
+"""
+Ограничение частоты запросов (token bucket, скользящее окно для throttle DRF)
+и объединение одинаковых запросов к Stripe.
+
+Если задан REDIS_URL, состояние хранится в Redis и общее для всех воркеров,
+иначе используется хранилище в памяти процесса (для тестов и разработки).
+Записи в памяти, как и ключи в Redis, имеют срок жизни: истекшие удаляются
+периодическим проходом, поэтому память не растет с числом пользователей и IP.
+"""
+import json
+import math
+import threading
+import time
+from collections.abc import Mapping
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle, SimpleRateThrottle
+
+
+_redis_client = None
+
+
+def get_redis_client():
+    """Возвращает клиент Redis или None, если REDIS_URL не задан"""
+    global _redis_client
+    if not settings.REDIS_URL:
+        return None
+    if _redis_client is None:
+        import redis
+        _redis_client = redis.Redis.from_url(settings.REDIS_URL)
+    return _redis_client
+
+
+class ExpiringDict:
+    """
+    Словарь состояния в памяти процесса со сроком жизни записей.
+    Истекшие записи не возвращаются и удаляются проходом не чаще раза
+    в sweep_interval секунд (время передается вызывающим, часы любые).
+    Не потокобезопасен: вызывается под блокировкой владельца.
+    """
+
+    def __init__(self, sweep_interval: float = 60.0):
+        self.sweep_interval = sweep_interval
+        # ключ -> (время истечения, значение)
+        self._data = {}
+        self._next_sweep = None
+
+    def get(self, key, now, default=None):
+        item = self._data.get(key)
+        if item is None or item[0] <= now:
+            return default
+        return item[1]
+
+    def set(self, key, value, expires_at, now):
+        if self._next_sweep is None or now >= self._next_sweep:
+            self._data = {k: item for k, item in self._data.items() if item[0] > now}
+            self._next_sweep = now + self.sweep_interval
+        self._data[key] = (expires_at, value)
+
+    def __len__(self):
+        return len(self._data)
+
+    def clear(self):
+        self._data.clear()
+        self._next_sweep = None
+
+
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local data = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(data[1]) or capacity
+local ts = tonumber(data[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return allowed
+"""
+
+
+class TokenBucket:
+    """
+    Token bucket: rate токенов в секунду, не больше capacity токенов в запасе.
+    В Redis проверка выполняется одним атомарным Lua-скриптом.
+    """
+
+    def __init__(self, namespace: str, rate: float, capacity: int):
+        if rate <= 0:
+            raise ImproperlyConfigured(f'Скорость пополнения {namespace} должна быть больше нуля, задано {rate}')
+        if capacity < 1:
+            raise ImproperlyConfigured(f'Запас токенов {namespace} должен быть не меньше 1, задано {capacity}')
+        self.namespace = namespace
+        self.rate = rate
+        self.capacity = capacity
+        # ключ -> (токены, время); запись истекает, когда корзина снова полная
+        self._buckets = ExpiringDict()
+        self._lock = threading.Lock()
+        self._script = None
+
+    def consume(self, key) -> bool:
+        """Забирает один токен; возвращает False, если лимит исчерпан"""
+        now = time.time()
+        client = get_redis_client()
+        if client is not None:
+            if self._script is None:
+                self._script = client.register_script(TOKEN_BUCKET_SCRIPT)
+            return bool(self._script(keys=[f'{self.namespace}:{key}'], args=[self.rate, self.capacity, now]))
+
+        with self._lock:
+            tokens, ts = self._buckets.get(key, now, (self.capacity, now))
+            tokens = min(self.capacity, tokens + max(0.0, now - ts) * self.rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets.set(key, (tokens, now), now + (self.capacity - tokens) / self.rate, now)
+            return allowed
+
+    def clear(self):
+        """Сбрасывает состояние в памяти процесса"""
+        with self._lock:
+            self._buckets.clear()
+
+
+SLIDING_WINDOW_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local elapsed = tonumber(ARGV[3])
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+if previous * (window - elapsed) / window + current >= limit then
+    local wait = window - elapsed
+    if current < limit and previous > 0 then
+        wait = math.max(0, window - elapsed - (limit - current) * window / previous)
+    end
+    return tostring(wait)
+end
+redis.call('INCR', KEYS[1])
+redis.call('EXPIRE', KEYS[1], math.ceil(window * 2))
+return false
+"""
+
+
+def sliding_window_wait(limit, window, elapsed, current, previous):
+    """
+    Сколько ждать до следующего разрешенного запроса (None - запрос разрешен)
+
+    Число запросов за последние window секунд оценивается как current
+    (текущее окно) плюс часть previous (предыдущее окно), которая еще
+    попадает в скользящее окно.
+    """
+    if previous * (window - elapsed) / window + current < limit:
+        return None
+    if current < limit and previous > 0:
+        return max(0.0, window - elapsed - (limit - current) * window / previous)
+    return window - elapsed
+
+
+class SlidingWindow:
+    """
+    Скользящее окно (sliding window counter): два счетчика на ключ вместо
+    журнала запросов. В Redis проверка и увеличение счетчика выполняются
+    одним атомарным Lua-скриптом - один сетевой запрос на решение.
+    """
+
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+        # ключ -> (начало текущего окна, счетчик предыдущего окна, счетчик текущего);
+        # запись истекает, когда оба окна вышли из скользящего
+        self._counters = ExpiringDict()
+        self._lock = threading.Lock()
+        self._script = None
+
+    def hit(self, key, limit: int, window: int):
+        """
+        Засчитывает запрос, если лимит не исчерпан
+
+        Returns:
+            float | None: None, если запрос разрешен, иначе сколько секунд ждать
+        """
+        now = time.time()
+        window_start = math.floor(now / window) * window
+        elapsed = now - window_start
+        client = get_redis_client()
+        if client is not None:
+            if self._script is None:
+                self._script = client.register_script(SLIDING_WINDOW_SCRIPT)
+            keys = [f'{self.namespace}:{key}:{window_start}', f'{self.namespace}:{key}:{window_start - window}']
+            wait = self._script(keys=keys, args=[limit, window, elapsed])
+            return None if wait is None else float(wait)
+
+        with self._lock:
+            start, previous, current = self._counters.get(key, now, (window_start, 0, 0))
+            if start != window_start:
+                previous = current if start == window_start - window else 0
+                current = 0
+            wait = sliding_window_wait(limit, window, elapsed, current, previous)
+            if wait is None:
+                current += 1
+            self._counters.set(key, (window_start, previous, current), window_start + 2 * window, now)
+            return wait
+
+    def clear(self):
+        """Сбрасывает состояние в памяти процесса"""
+        with self._lock:
+            self._counters.clear()
+
+
+class SingleFlight:
+    """
+    Объединяет одинаковые запросы: в течение window секунд для ключа
+    выполняется не более одного вызова, остальные ждут и получают его результат.
+    Результат должен сериализоваться в JSON.
+    """
+
+    def __init__(self, namespace: str, window: float, wait_timeout: float = 10.0, poll_interval: float = 0.05):
+        self.namespace = namespace
+        self.window = window
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self._results = ExpiringDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func):
+        """Возвращает результат func() для ключа, вызывая func не чаще раза в окно"""
+        client = get_redis_client()
+        if client is not None:
+            return self._do_redis(client, key, func)
+        return self._do_local(key, func)
+
+    def _do_redis(self, client, key, func):
+        result_key = f'{self.namespace}:result:{key}'
+        lock_key = f'{self.namespace}:lock:{key}'
+        lock_ttl = int(self.wait_timeout * 1000)
+        deadline = time.monotonic() + self.wait_timeout
+
+        while True:
+            cached = client.get(result_key)
+            if cached is not None:
+                return json.loads(cached)
+            if client.set(lock_key, '1', nx=True, px=lock_ttl):
+                try:
+                    result = func()
+                    client.set(result_key, json.dumps(result), px=int(self.window * 1000))
+                    return result
+                finally:
+                    client.delete(lock_key)
+            if time.monotonic() >= deadline:
+                # Лидер завис: выполняем запрос сами
+                return func()
+            time.sleep(self.poll_interval)
+
+    def _do_local(self, key, func):
+        while True:
+            with self._lock:
+                cached = self._results.get(key, time.monotonic())
+                if cached is not None:
+                    return cached[0]
+                event = self._inflight.get(key)
+                if event is None:
+                    event = threading.Event()
+                    self._inflight[key] = event
+                    is_leader = True
+                else:
+                    is_leader = False
+
+            if not is_leader:
+                # Ждем лидера и перечитываем результат (или становимся лидером сами)
+                if not event.wait(self.wait_timeout):
+                    return func()
+                continue
+
+            try:
+                result = func()
+                with self._lock:
+                    now = time.monotonic()
+                    # Значение в кортеже: результат None тоже кешируется
+                    self._results.set(key, (result,), now + self.window, now)
+                return result
+            finally:
+                with self._lock:
+                    self._inflight.pop(key, None)
+                event.set()
+
+    def clear(self):
+        """Сбрасывает состояние в памяти процесса"""
+        with self._lock:
+            self._results.clear()
+            self._inflight.clear()
+
+
+payment_status_bucket = TokenBucket(
+    'ratelimit:payment-status',
+    rate=settings.PAYMENT_STATUS_RATE,
+    capacity=settings.PAYMENT_STATUS_BURST,
+)
+stripe_session_flight = SingleFlight(
+    'singleflight:stripe-session',
+    window=settings.PAYMENT_STATUS_COALESCE_WINDOW,
+)
+
+
+class PaymentStatusThrottle(BaseThrottle):
+    """Ограничение частоты проверок статуса платежа для каждого пользователя"""
+
+    def allow_request(self, request, view):
+        if not request.user or not request.user.is_authenticated:
+            return True
+        return payment_status_bucket.consume(request.user.pk)
+
+    def wait(self):
+        return 1 / payment_status_bucket.rate
+
+
+throttle_window = SlidingWindow('throttle')
+
+
+class SlidingWindowThrottle(SimpleRateThrottle):
+    """
+    Throttle DRF со скользящим окном в Redis (или в памяти процесса).
+    Лимит считается для пользователя, для анонимных запросов - для IP.
+    Частоты берутся из REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'] по scope.
+    """
+
+    def get_rate(self):
+        return api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        key = self.get_cache_key(request, view)
+        if key is None:
+            return True
+        self.wait_seconds = throttle_window.hit(key, self.num_requests, self.duration)
+        return self.wait_seconds is None
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class ReadWriteThrottle(SlidingWindowThrottle):
+    """Отдельные лимиты на чтение (scope read) и изменение (scope write)"""
+
+    def __init__(self):
+        # scope зависит от метода запроса и выбирается в allow_request
+        pass
+
+    def allow_request(self, request, view):
+        self.scope = 'read' if request.method in SAFE_METHODS else 'write'
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        return super().allow_request(request, view)
+
+
+class PaymentCreateThrottle(SlidingWindowThrottle):
+    """Создание платежей (запросы к Stripe)"""
+    scope = 'payment_create'
+
+
+class SubscriptionToggleThrottle(SlidingWindowThrottle):
+    """Переключение подписок: лимит на пару пользователь-курс"""
+    scope = 'subscription'
+
+    def get_cache_key(self, request, view):
+        key = super().get_cache_key(request, view)
+        # Тело может быть не объектом (например, списком) - тогда курс не указан
+        course = request.data.get('course', '') if isinstance(request.data, Mapping) else ''
+        return f'{key}_{course}'
@@ -0,0 +1,13 @@
+"""
+Расширения drf-spectacular для приложения users.
+
+Импортируются только при генерации схемы (eigth_module.openapi),
+чтобы не загружать drf-spectacular при старте воркера.
+"""
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+
+
+class CachedJWTScheme(SimpleJWTScheme):
+    """Схема Bearer JWT для CachedJWTAuthentication"""
+
+    target_class = 'users.authentication.CachedJWTAuthentication'
@@ -1,6 +1,13 @@
+from django.contrib.auth.hashers import make_password
 from rest_framework import serializers
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
 from lms.models import Course, Lesson
+from .authentication import VERSION_CLAIM, add_user_claims
 from .models import Payment, User
+from .token_store import refresh_token_store
 
 
 class PaymentSerializer(serializers.ModelSerializer):
@@ -46,7 +53,10 @@ class UserSerializer(serializers.ModelSerializer):
     """Сериализатор для пользователя (CRUD)"""
     class Meta:
         model = User
-        fields = ('id', 'email', 'first_name', 'last_name', 'phone', 'city', 'avatar', 'is_active', 'date_joined')
+        fields = (
+            'id', 'email', 'first_name', 'last_name', 'phone', 'city', 'avatar', 'avatar_thumbnail',
+            'email_digest', 'is_active', 'date_joined',
+        )
         read_only_fields = ('id', 'date_joined')
 
 
@@ -66,16 +76,47 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         validated_data.pop('password_confirm')
-        password = validated_data.pop('password')
-        user = User.objects.create(**validated_data)
-        user.set_password(password)
-        user.save()
-        return user
+        # Пароль хешируется до вставки: одна запись в БД вместо create + save
+        validated_data['password'] = make_password(validated_data.pop('password'))
+        return User.objects.create(**validated_data)
 
 
 class UserDetailSerializer(serializers.ModelSerializer):
     """Сериализатор для детального представления пользователя"""
     class Meta:
         model = User
-        fields = ('id', 'email', 'first_name', 'last_name', 'phone', 'city', 'avatar', 'is_active', 'date_joined', 'last_login')
+        fields = (
+            'id', 'email', 'first_name', 'last_name', 'phone', 'city', 'avatar', 'avatar_thumbnail',
+            'email_digest', 'is_active', 'date_joined', 'last_login',
+        )
         read_only_fields = ('id', 'date_joined', 'last_login')
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Выдача токенов с версией и правами пользователя (см. users.authentication)"""
+
+    @classmethod
+    def get_token(cls, user):
+        return add_user_claims(super().get_token(user), user)
+
+
+class VersionedTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Обновление токена: отклоняется отозванный refresh-токен (старая версия)
+    и уже использованный (его JTI есть в хранилище ротации)
+    """
+
+    def validate(self, attrs):
+        refresh = RefreshToken(attrs['refresh'])
+        if VERSION_CLAIM in refresh:
+            current_version = (
+                User.objects
+                .filter(**{api_settings.USER_ID_FIELD: refresh[api_settings.USER_ID_CLAIM]})
+                .values_list('token_version', flat=True)
+                .first()
+            )
+            if refresh[VERSION_CLAIM] != current_version:
+                raise InvalidToken('Токен отозван')
+        if not refresh_token_store.claim(refresh[api_settings.JTI_CLAIM], refresh['exp']):
+            raise InvalidToken('Токен уже использован')
+        return super().validate(attrs)
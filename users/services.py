@@ -1,12 +1,25 @@
 """
 Сервисные функции для работы с Stripe API
+
+SDK Stripe импортируется при первом обращении к API (get_stripe), а не при
+загрузке модуля: импорт занимает сотни миллисекунд и замедлял бы старт
+каждого воркера и каждой management-команды.
 """
-import stripe
 from django.conf import settings
 from decimal import Decimal
 
-# Настройка Stripe API ключа
-stripe.api_key = settings.STRIPE_SECRET_KEY
+# Модуль stripe после первой настройки (в тестах подменяется фейком)
+stripe = None
+
+
+def get_stripe():
+    """Возвращает настроенный модуль stripe, импортируя его при первом вызове"""
+    global stripe
+    if stripe is None:
+        import stripe as stripe_module
+        stripe_module.api_key = settings.STRIPE_SECRET_KEY
+        stripe = stripe_module
+    return stripe
 
 
 def create_stripe_product(name: str, description: str = None) -> dict:
@@ -20,6 +33,7 @@ def create_stripe_product(name: str, description: str = None) -> dict:
     Returns:
         dict: Данные созданного продукта
     """
+    client = get_stripe()
     try:
         product_data = {
             'name': name,
@@ -27,13 +41,13 @@ def create_stripe_product(name: str, description: str = None) -> dict:
         if description:
             product_data['description'] = description
         
-        product = stripe.Product.create(**product_data)
+        product = client.Product.create(**product_data)
         return {
             'id': product.id,
             'name': product.name,
             'description': product.description,
         }
-    except stripe.error.StripeError as e:
+    except client.error.StripeError as e:
         raise Exception(f"Ошибка при создании продукта в Stripe: {str(e)}")
 
 
@@ -49,11 +63,12 @@ def create_stripe_price(product_id: str, amount: Decimal, currency: str = 'rub')
     Returns:
         dict: Данные созданной цены
     """
+    client = get_stripe()
     try:
         # Конвертируем рубли в копейки для Stripe
         amount_in_cents = int(float(amount) * 100)
         
-        price = stripe.Price.create(
+        price = client.Price.create(
             unit_amount=amount_in_cents,
             currency=currency,
             product=product_id,
@@ -64,7 +79,7 @@ def create_stripe_price(product_id: str, amount: Decimal, currency: str = 'rub')
             'currency': price.currency,
             'product_id': price.product,
         }
-    except stripe.error.StripeError as e:
+    except client.error.StripeError as e:
         raise Exception(f"Ошибка при создании цены в Stripe: {str(e)}")
 
 
@@ -80,8 +95,9 @@ def create_stripe_checkout_session(price_id: str, success_url: str, cancel_url:
     Returns:
         dict: Данные созданной сессии
     """
+    client = get_stripe()
     try:
-        session = stripe.checkout.Session.create(
+        session = client.checkout.Session.create(
             payment_method_types=['card'],
             line_items=[{
                 'price': price_id,
@@ -96,7 +112,7 @@ def create_stripe_checkout_session(price_id: str, success_url: str, cancel_url:
             'url': session.url,
             'payment_status': session.payment_status,
         }
-    except stripe.error.StripeError as e:
+    except client.error.StripeError as e:
         raise Exception(f"Ошибка при создании сессии оплаты в Stripe: {str(e)}")
 
 
@@ -110,14 +126,58 @@ def retrieve_stripe_session(session_id: str) -> dict:
     Returns:
         dict: Данные сессии
     """
+    client = get_stripe()
     try:
-        session = stripe.checkout.Session.retrieve(session_id)
+        session = client.checkout.Session.retrieve(session_id)
         return {
             'id': session.id,
             'payment_status': session.payment_status,
             'payment_intent': session.payment_intent,
             'customer_email': session.customer_details.email if session.customer_details else None,
         }
-    except stripe.error.StripeError as e:
+    except client.error.StripeError as e:
         raise Exception(f"Ошибка при получении сессии из Stripe: {str(e)}")
 
+
+def get_payment_product_info(payment) -> tuple:
+    """
+    Определяет название и описание продукта Stripe для платежа
+
+    Args:
+        payment: Платеж за курс или урок
+
+    Returns:
+        tuple: Название и описание продукта
+    """
+    if payment.course:
+        return payment.course.title, payment.course.description or f'Курс: {payment.course.title}'
+    if payment.lesson:
+        return payment.lesson.title, payment.lesson.description or f'Урок: {payment.lesson.title}'
+    return 'Платеж', 'Платеж за обучение'
+
+
+def create_stripe_checkout_for_payment(payment, success_url: str, cancel_url: str):
+    """
+    Создает продукт, цену и сессию оплаты в Stripe и сохраняет их в платеже
+
+    Args:
+        payment: Платеж, для которого создается сессия
+        success_url: URL для перенаправления после успешной оплаты
+        cancel_url: URL для перенаправления при отмене оплаты
+
+    Returns:
+        Payment: Обновленный платеж со ссылкой на оплату
+    """
+    product_name, product_description = get_payment_product_info(payment)
+
+    product_data = create_stripe_product(product_name, product_description)
+    payment.stripe_product_id = product_data['id']
+
+    price_data = create_stripe_price(product_data['id'], payment.amount)
+    payment.stripe_price_id = price_data['id']
+
+    session_data = create_stripe_checkout_session(price_data['id'], success_url, cancel_url)
+    payment.stripe_session_id = session_data['id']
+    payment.payment_url = session_data['url']
+    payment.save()
+    return payment
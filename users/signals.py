@@ -0,0 +1,53 @@
+"""
+Сигналы приложения users: постановка задачи на уменьшенную аватарку,
+отзыв токенов при блокировке и смене групп
+"""
+from django.db.models.signals import m2m_changed, post_save, pre_save
+from django.dispatch import receiver
+
+from eigth_module.images import schedule_thumbnail
+from .authentication import bump_token_version, evict_cached_user
+from .models import User
+
+
+@receiver(post_save, sender=User)
+def schedule_avatar_thumbnail(sender, instance, **kwargs):
+    from .tasks import generate_avatar_thumbnail
+
+    schedule_thumbnail(instance, 'avatar', 'avatar_thumbnail', generate_avatar_thumbnail, instance.pk)
+
+
+@receiver(pre_save, sender=User)
+def remember_deactivation(sender, instance, update_fields=None, **kwargs):
+    """Запоминает, что сохранение блокирует активного пользователя"""
+    instance._deactivated = bool(
+        instance.pk is not None
+        and not instance.is_active
+        and (update_fields is None or 'is_active' in update_fields)
+        and User.objects.filter(pk=instance.pk, is_active=True).exists()
+    )
+
+
+@receiver(post_save, sender=User)
+def revoke_tokens_on_deactivation(sender, instance, **kwargs):
+    """Блокировка пользователя отзывает его токены"""
+    evict_cached_user(instance.pk)
+    if getattr(instance, '_deactivated', False):
+        instance._deactivated = False
+        bump_token_version([instance.pk])
+        # Иначе следующее полное сохранение объекта вернуло бы старую версию
+        instance.refresh_from_db(fields=['token_version'])
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def revoke_tokens_on_group_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """Роль модератора записана в токене, поэтому смена групп отзывает токены"""
+    if reverse:
+        # Изменены участники группы: instance - группа
+        if action in ('post_add', 'post_remove') and pk_set:
+            bump_token_version(pk_set)
+        elif action == 'pre_clear':
+            bump_token_version(instance.user_set.values_list('pk', flat=True))
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        bump_token_version([instance.pk])
+        instance.refresh_from_db(fields=['token_version'])
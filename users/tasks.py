@@ -2,39 +2,102 @@
 Задачи Celery для приложения users
 """
 from celery import shared_task
+from django.conf import settings
 from django.utils import timezone
 from datetime import timedelta
+
+from eigth_module.images import update_thumbnail
+from eigth_module.task_metrics import task_result
 from .models import User
+from .partitioning import archive_partitions, ensure_partitions
 
 
-@shared_task
+@shared_task(acks_late=True)
 def block_inactive_users():
     """
     Блокирует пользователей, которые не заходили более месяца
     Устанавливает is_active=False для таких пользователей
     Включает пользователей, которые никогда не входили (last_login=None)
     """
+    from django.db.models import F, Q
+
+    one_month_ago = timezone.now() - timedelta(days=30)
+
+    # Находим пользователей, которые не заходили более месяца
+    # или никогда не входили (last_login=None).
+    # Условие is_active=True совпадает с частичным индексом users_user_active_login_idx
+    inactive_users = User.objects.filter(
+        Q(last_login__lt=one_month_ago) | Q(last_login__isnull=True),
+        is_active=True,  # Исключаем уже заблокированных
+    )
+
+    count = inactive_users.count()
+
+    if count > 0:
+        # Увеличение версии отзывает выданные пользователям токены
+        inactive_users.update(is_active=False, token_version=F('token_version') + 1)
+        return task_result('blocked', f"Заблокировано {count} неактивных пользователей", blocked=count)
+    return task_result('nothing_to_do', "Нет неактивных пользователей для блокировки", blocked=0)
+
+
+@shared_task(acks_late=True)
+def create_stripe_checkout_task(payment_id, success_url, cancel_url):
+    """
+    Создает продукт, цену и сессию оплаты в Stripe для ожидающего платежа.
+    Клиент получает ссылку на оплату через эндпоинт статуса платежа.
+
+    Args:
+        payment_id: ID платежа
+        success_url: URL для перенаправления после успешной оплаты
+        cancel_url: URL для перенаправления при отмене оплаты
+    """
+    from .models import Payment
+    from .services import create_stripe_checkout_for_payment
+
     try:
-        one_month_ago = timezone.now() - timedelta(days=30)
-        
-        # Находим пользователей, которые не заходили более месяца
-        # или никогда не входили (last_login=None)
-        from django.db.models import Q
-        
-        inactive_users = User.objects.filter(
-            Q(last_login__lt=one_month_ago) | Q(last_login__isnull=True)
-        ).exclude(
-            is_active=False  # Исключаем уже заблокированных
-        )
-        
-        count = inactive_users.count()
-        
-        if count > 0:
-            inactive_users.update(is_active=False)
-            return f"Заблокировано {count} неактивных пользователей"
-        else:
-            return "Нет неактивных пользователей для блокировки"
-            
-    except Exception as e:
-        return f"Ошибка при блокировке неактивных пользователей: {str(e)}"
+        payment = Payment.objects.select_related('course', 'lesson').get(id=payment_id)
+    except Payment.DoesNotExist:
+        return task_result('not_found', f"Платеж с ID {payment_id} не найден")
 
+    if payment.stripe_session_id:
+        # Сессия уже создана (повторный запуск задачи)
+        return task_result('duplicate', f"Сессия оплаты для платежа {payment_id} уже создана")
+
+    try:
+        create_stripe_checkout_for_payment(payment, success_url, cancel_url)
+    except Exception:
+        # Клиент увидит ошибку в статусе платежа; задача завершается FAILURE
+        payment.payment_status = 'failed'
+        payment.save(update_fields=['payment_status'])
+        raise
+    return task_result('created', f"Сессия оплаты для платежа {payment_id} создана")
+
+
+@shared_task(acks_late=True)
+def generate_avatar_thumbnail(user_id):
+    """
+    Строит уменьшенную аватарку пользователя в WebP
+
+    Args:
+        user_id: ID пользователя
+    """
+    name = update_thumbnail(User, user_id, 'avatar', 'avatar_thumbnail', settings.AVATAR_THUMBNAIL_SIZE)
+    if name is None:
+        return task_result('cleared', f"Аватарка пользователя {user_id} отсутствует")
+    return task_result('created', f"Уменьшенная аватарка пользователя {user_id}: {name}")
+
+
+@shared_task(acks_late=True)
+def maintain_payment_partitions():
+    """
+    Создает секции платежей на PAYMENT_PARTITION_MONTHS_AHEAD месяцев вперед
+    и переносит в архив секции старше PAYMENT_PARTITION_RETENTION_MONTHS
+    """
+    created = ensure_partitions()
+    archived = archive_partitions()
+    return task_result(
+        'maintained',
+        f"Создано секций: {len(created)}, перенесено в архив: {len(archived)}",
+        created=created,
+        archived=archived,
+    )
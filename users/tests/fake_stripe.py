@@ -0,0 +1,43 @@
+from types import SimpleNamespace
+
+
+class FakeStripe:
+    """Подменяет модуль stripe: хранит объекты в памяти и считает вызовы"""
+
+    class error:
+        class StripeError(Exception):
+            pass
+
+    def __init__(self):
+        self.calls = []
+        self.sessions = {}
+        self.Product = SimpleNamespace(create=self._create_product)
+        self.Price = SimpleNamespace(create=self._create_price)
+        self.checkout = SimpleNamespace(Session=SimpleNamespace(
+            create=self._create_session,
+            retrieve=self._retrieve_session,
+        ))
+
+    def _create_product(self, name, description=None):
+        self.calls.append('product')
+        return SimpleNamespace(id='prod_1', name=name, description=description)
+
+    def _create_price(self, unit_amount, currency, product):
+        self.calls.append('price')
+        return SimpleNamespace(id='price_1', unit_amount=unit_amount, currency=currency, product=product)
+
+    def _create_session(self, **kwargs):
+        self.calls.append('session')
+        session = SimpleNamespace(
+            id='cs_test_1',
+            url='https://checkout.stripe.com/c/pay/cs_test_1',
+            payment_status='unpaid',
+            payment_intent=None,
+            customer_details=None,
+        )
+        self.sessions[session.id] = session
+        return session
+
+    def _retrieve_session(self, session_id):
+        self.calls.append('retrieve')
+        return self.sessions[session_id]
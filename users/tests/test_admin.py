@@ -0,0 +1,70 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from eigth_module.pagination import EstimatedCountPaginator
+from lms.models import Course, Lesson
+from users.models import Payment
+
+
+User = get_user_model()
+
+
+class AdminChangelistQueriesTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create(email='admin@example.com', is_staff=True, is_superuser=True)
+        self.client.force_login(self.admin)
+        self.course = Course.objects.create(title='Django', owner=self.admin)
+
+    def add_payments(self, count):
+        for i in range(count):
+            user = User.objects.create(email=f'buyer{Payment.objects.count()}@example.com')
+            lesson = Lesson.objects.create(course=self.course, title=f'Lesson {i}')
+            Payment.objects.create(user=user, lesson=lesson, amount='5.00', payment_method='cash')
+            Payment.objects.create(user=user, course=self.course, amount='10.00', payment_method='transfer')
+
+    def count_changelist_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_payment_changelist_queries_do_not_grow_with_rows(self):
+        self.add_payments(2)
+        few = self.count_changelist_queries('/admin/users/payment/')
+        self.add_payments(8)
+        many = self.count_changelist_queries('/admin/users/payment/')
+
+        self.assertEqual(few, many)
+
+    def test_lesson_changelist_queries_do_not_grow_with_rows(self):
+        self.add_payments(2)
+        few = self.count_changelist_queries('/admin/lms/lesson/')
+        self.add_payments(8)
+        many = self.count_changelist_queries('/admin/lms/lesson/')
+
+        self.assertEqual(few, many)
+
+    def test_payment_changelist_filters_by_course_id(self):
+        self.add_payments(1)
+
+        response = self.client.get(f'/admin/users/payment/?course__id__exact={self.course.id}')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['cl'].result_count, 1)
+
+
+class EstimatedCountPaginatorTests(TestCase):
+    def test_uses_estimate_for_unfiltered_large_table(self):
+        with mock.patch('eigth_module.pagination.estimate_table_rows', return_value=5_000_000):
+            paginator = EstimatedCountPaginator(Payment.objects.all(), 25)
+            self.assertEqual(paginator.count, 5_000_000)
+
+    def test_counts_exactly_when_filtered_or_small(self):
+        with mock.patch('eigth_module.pagination.estimate_table_rows', return_value=5_000_000):
+            self.assertEqual(EstimatedCountPaginator(Payment.objects.filter(amount=1), 25).count, 0)
+        with mock.patch('eigth_module.pagination.estimate_table_rows', return_value=10):
+            self.assertEqual(EstimatedCountPaginator(Payment.objects.all(), 25).count, 0)
@@ -0,0 +1,84 @@
+from django.contrib.auth.models import Group
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIRequestFactory, APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from lms.permissions import user_is_moderator
+from users.authentication import CachedJWTAuthentication, clear_user_cache
+from users.models import User
+from users.tasks import block_inactive_users
+
+
+class CachedJWTAuthenticationTests(APITestCase):
+    def setUp(self):
+        clear_user_cache()
+        self.user = User.objects.create(email='student@example.com')
+        self.user.set_password('password123')
+        self.user.save()
+
+    def obtain_tokens(self):
+        response = self.client.post(
+            '/api/token/', {'email': 'student@example.com', 'password': 'password123'}, format='json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def authenticate(self, access):
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {access}')
+        return CachedJWTAuthentication().authenticate(request)
+
+    def test_access_token_carries_version_and_role_claims(self):
+        Group.objects.create(name='Модераторы').user_set.add(self.user)
+
+        token = AccessToken(self.obtain_tokens()['access'])
+
+        self.user.refresh_from_db()
+        self.assertEqual(token['ver'], self.user.token_version)
+        self.assertTrue(token['act'])
+        self.assertFalse(token['su'])
+        self.assertTrue(token['mod'])
+
+    def test_cached_user_and_role_need_no_queries(self):
+        access = self.obtain_tokens()['access']
+        self.authenticate(access)
+
+        with CaptureQueriesContext(connection) as queries:
+            user, _ = self.authenticate(access)
+            is_moderator = user_is_moderator(user)
+
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(user.id, self.user.id)
+        self.assertFalse(is_moderator)
+
+    def test_block_inactive_users_revokes_tokens(self):
+        tokens = self.obtain_tokens()
+        User.objects.filter(id=self.user.id).update(last_login=None)
+
+        block_inactive_users()
+        clear_user_cache()
+
+        response = self.client.get('/api/courses/', HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.client.post('/api/token/refresh/', {'refresh': tokens['refresh']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_group_change_revokes_tokens(self):
+        access = self.obtain_tokens()['access']
+
+        Group.objects.create(name='Модераторы').user_set.add(self.user)
+
+        response = self.client.get('/api/courses/', HTTP_AUTHORIZATION=f'Bearer {access}')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivation_via_save_revokes_tokens(self):
+        access = self.obtain_tokens()['access']
+
+        self.user.is_active = False
+        self.user.save()
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.token_version, 1)
+        response = self.client.get('/api/courses/', HTTP_AUTHORIZATION=f'Bearer {access}')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
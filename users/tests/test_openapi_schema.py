@@ -0,0 +1,48 @@
+import io
+import json
+import tempfile
+from pathlib import Path
+
+from django.core.management import call_command
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+
+class CachedOpenApiSchemaTests(APITestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.schema_file = Path(tmp_dir.name) / 'openapi.json'
+        settings_override = override_settings(OPENAPI_SCHEMA_FILE=self.schema_file)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_cached_schema_matches_live_schema(self):
+        call_command('build_openapi_schema', stdout=io.StringIO())
+
+        cached = self.client.get('/api/schema/')
+        with override_settings(DEBUG=True, OPENAPI_SCHEMA_FILE=self.schema_file.with_name('missing.json')):
+            live = self.client.get('/api/schema/', HTTP_ACCEPT='application/vnd.oai.openapi+json')
+
+        self.assertEqual(cached.status_code, 200)
+        self.assertEqual(json.loads(cached.content), json.loads(live.content))
+        self.assertIn('/api/courses/', json.loads(cached.content)['paths'])
+        self.assertIn('jwtAuth', json.loads(cached.content)['components']['securitySchemes'])
+
+    def test_etag_revalidation_returns_not_modified(self):
+        call_command('build_openapi_schema', stdout=io.StringIO())
+        etag = self.client.get('/api/schema/')['ETag']
+
+        response = self.client.get('/api/schema/', HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_missing_artifact_is_generated_live_only_in_debug(self):
+        self.assertEqual(self.client.get('/api/schema/').status_code, 404)
+
+        with override_settings(DEBUG=True):
+            response = self.client.get('/api/schema/', HTTP_ACCEPT='application/vnd.oai.openapi+json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('/api/courses/', json.loads(response.content)['paths'])
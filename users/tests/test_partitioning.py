@@ -0,0 +1,129 @@
+import datetime
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import NotSupportedError
+from django.test import SimpleTestCase
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from lms.models import Course
+from users.models import Payment
+from users.partitioning import (
+    _create_partition, add_months, archive_partitions, convert_to_partitioned, default_partition_ddl, ensure_partitions,
+    partition_ddl, partition_month, partition_name, partitioned_table_sql,
+)
+from users.tasks import maintain_payment_partitions
+
+
+User = get_user_model()
+
+
+class PartitionDDLTests(SimpleTestCase):
+    def test_partition_bounds_cover_one_month(self):
+        month = datetime.date(2026, 12, 1)
+
+        self.assertEqual(partition_name('users_payment', month), 'users_payment_p2026_12')
+        self.assertEqual(partition_month('users_payment_p2026_12'), month)
+        self.assertIsNone(partition_month('users_payment_default'))
+        self.assertEqual(add_months(month, 1), datetime.date(2027, 1, 1))
+        self.assertEqual(add_months(month, -12), datetime.date(2025, 12, 1))
+        self.assertEqual(
+            partition_ddl('users_payment', month),
+            'CREATE TABLE IF NOT EXISTS "users_payment_p2026_12" PARTITION OF "users_payment" '
+            "FOR VALUES FROM ('2026-12-01 00:00:00+00') TO ('2027-01-01 00:00:00+00')",
+        )
+
+    def test_rows_outside_monthly_partitions_go_to_default_partition(self):
+        self.assertEqual(
+            default_partition_ddl('users_payment'),
+            'CREATE TABLE IF NOT EXISTS "users_payment_default" PARTITION OF "users_payment" DEFAULT',
+        )
+
+    def test_month_rows_are_moved_out_of_default_partition(self):
+        cursor = mock.Mock()
+        cursor.fetchone.return_value = (True,)
+
+        _create_partition(cursor, 'users_payment', 'payment_date', datetime.date(2026, 12, 1))
+
+        statements = [call.args[0] for call in cursor.execute.call_args_list]
+        self.assertEqual(statements[1], (
+            'CREATE TABLE "users_payment_p2026_12" (LIKE "users_payment" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+        ))
+        self.assertTrue(
+            statements[2].startswith('INSERT INTO "users_payment_p2026_12" SELECT * FROM "users_payment_default"')
+        )
+        self.assertTrue(statements[3].startswith('DELETE FROM "users_payment_default"'))
+        self.assertEqual(statements[4], (
+            'ALTER TABLE "users_payment" ATTACH PARTITION "users_payment_p2026_12" '
+            "FOR VALUES FROM ('2026-12-01 00:00:00+00') TO ('2027-01-01 00:00:00+00')"
+        ))
+
+    def archive_statements(self, has_default):
+        connection = mock.MagicMock(vendor='postgresql', pg_version=160000)
+        cursor = connection.cursor.return_value.__enter__.return_value
+        cursor.fetchone.return_value = (has_default,)
+        with mock.patch('users.partitioning.connections', {'default': connection}), \
+                mock.patch('users.partitioning.is_partitioned', return_value=True), \
+                mock.patch('users.partitioning.list_partitions', return_value=['users_payment_p2020_01']):
+            self.assertEqual(archive_partitions(retention_months=12), ['users_payment_p2020_01'])
+        return [call.args[0] for call in cursor.execute.call_args_list]
+
+    def test_archive_detaches_without_concurrently_when_default_partition_exists(self):
+        statements = self.archive_statements(has_default=True)
+
+        self.assertIn('ALTER TABLE "users_payment" DETACH PARTITION "users_payment_p2020_01"', statements)
+        self.assertFalse(any('CONCURRENTLY' in sql for sql in statements))
+
+    def test_archive_detaches_concurrently_without_default_partition(self):
+        statements = self.archive_statements(has_default=False)
+
+        self.assertIn('ALTER TABLE "users_payment" DETACH PARTITION "users_payment_p2020_01" CONCURRENTLY', statements)
+
+    def test_table_ddl_gets_composite_key_and_range_partitioning(self):
+        statements = partitioned_table_sql([
+            'CREATE TABLE "users_payment" ("id" bigint NOT NULL PRIMARY KEY GENERATED BY DEFAULT AS IDENTITY, '
+            '"payment_date" timestamp with time zone NOT NULL);',
+            'CREATE INDEX "users_pay_user_date_idx" ON "users_payment" ("user_id", "payment_date" DESC);',
+        ], 'users_payment', 'payment_date')
+
+        self.assertEqual(statements[0], (
+            'CREATE TABLE "users_payment" ("id" bigint NOT NULL GENERATED BY DEFAULT AS IDENTITY, '
+            '"payment_date" timestamp with time zone NOT NULL, PRIMARY KEY ("id", "payment_date")) '
+            'PARTITION BY RANGE ("payment_date")'
+        ))
+        self.assertEqual(
+            statements[1], 'CREATE INDEX "users_pay_user_date_idx" ON "users_payment" ("user_id", "payment_date" DESC)',
+        )
+
+
+class PaymentPartitionMaintenanceTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(email='payer@example.com')
+        self.course = Course.objects.create(title='Course', owner=self.user)
+        self.client.force_authenticate(self.user)
+
+    def test_maintenance_is_noop_without_postgres(self):
+        self.assertEqual(ensure_partitions(), [])
+        with self.assertRaisesMessage(NotSupportedError, 'только на PostgreSQL'):
+            convert_to_partitioned()
+        result = maintain_payment_partitions.apply().get()
+
+        self.assertEqual(result['created'], [])
+        self.assertEqual(result['archived'], [])
+
+    def test_payments_can_be_filtered_by_date_range(self):
+        now = timezone.now()
+        for days in (1, 40, 400):
+            Payment.objects.create(
+                user=self.user, course=self.course, amount=Decimal('10.00'), payment_method='cash',
+                payment_date=now - datetime.timedelta(days=days),
+            )
+
+        response = self.client.get('/api/payments/', {
+            'payment_date__gte': (now - datetime.timedelta(days=60)).isoformat(),
+            'payment_date__lt': now.isoformat(),
+        })
+
+        self.assertEqual(response.data['count'], 2)
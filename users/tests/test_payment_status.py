@@ -0,0 +1,132 @@
+import threading
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from lms.models import Course
+from users.models import Payment
+from users.ratelimit import ExpiringDict, SingleFlight, TokenBucket, payment_status_bucket, stripe_session_flight
+from users.tests.fake_stripe import FakeStripe
+
+
+User = get_user_model()
+
+
+class PaymentStatusTests(APITestCase):
+    def setUp(self):
+        payment_status_bucket.clear()
+        stripe_session_flight.clear()
+        self.addCleanup(payment_status_bucket.clear)
+        self.addCleanup(stripe_session_flight.clear)
+
+        self.fake_stripe = FakeStripe()
+        patcher = mock.patch('users.services.stripe', self.fake_stripe)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.user = User.objects.create(email='status@example.com')
+        course = Course.objects.create(title='Course', owner=self.user)
+        session = self.fake_stripe.checkout.Session.create()
+        self.payment = Payment.objects.create(
+            user=self.user,
+            course=course,
+            amount='100.00',
+            payment_method='stripe',
+            stripe_session_id=session.id,
+        )
+        self.fake_stripe.calls.clear()
+        self.status_url = reverse('payment-status', args=[self.payment.id])
+        self.client.force_authenticate(self.user)
+
+    def test_repeated_status_checks_share_one_stripe_lookup(self):
+        for _ in range(3):
+            response = self.client.get(self.status_url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(self.fake_stripe.calls, ['retrieve'])
+
+    def test_status_checks_are_rate_limited_per_user(self):
+        with mock.patch.object(payment_status_bucket, 'capacity', 2), \
+                mock.patch.object(payment_status_bucket, 'rate', 0.001):
+            codes = [self.client.get(self.status_url).status_code for _ in range(3)]
+
+        self.assertEqual(codes, [status.HTTP_200_OK, status.HTTP_200_OK, status.HTTP_429_TOO_MANY_REQUESTS])
+
+
+class RateLimitPrimitivesTests(SimpleTestCase):
+    def test_single_flight_runs_one_call_for_concurrent_callers(self):
+        flight = SingleFlight('test', window=5)
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+        results = []
+
+        def slow_lookup():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return {'payment_status': 'paid'}
+
+        threads = [threading.Thread(target=lambda: results.append(flight.do(1, slow_lookup))) for _ in range(5)]
+        threads[0].start()
+        started.wait(5)
+        for thread in threads[1:]:
+            thread.start()
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{'payment_status': 'paid'}] * 5)
+
+    def test_token_bucket_refills_over_time(self):
+        bucket = TokenBucket('test', rate=10, capacity=1)
+
+        with mock.patch('users.ratelimit.time.time', return_value=1000.0):
+            self.assertTrue(bucket.consume('user'))
+            self.assertFalse(bucket.consume('user'))
+        with mock.patch('users.ratelimit.time.time', return_value=1000.2):
+            self.assertTrue(bucket.consume('user'))
+
+    def test_token_bucket_rejects_non_positive_rate(self):
+        for rate in (0, -1):
+            with self.assertRaises(ImproperlyConfigured):
+                TokenBucket('test', rate=rate, capacity=1)
+        with self.assertRaises(ImproperlyConfigured):
+            TokenBucket('test', rate=1, capacity=0)
+
+    def test_token_bucket_forgets_refilled_keys(self):
+        bucket = TokenBucket('test', rate=10, capacity=1)
+
+        with mock.patch('users.ratelimit.time.time', return_value=1000.0):
+            for user_id in range(100):
+                bucket.consume(user_id)
+        with mock.patch('users.ratelimit.time.time', return_value=1100.0):
+            bucket.consume('user')
+
+        self.assertEqual(len(bucket._buckets), 1)
+
+    def test_expiring_dict_sweeps_expired_entries(self):
+        data = ExpiringDict(sweep_interval=10)
+        data.set('old', 1, expires_at=5, now=0)
+        data.set('live', 2, expires_at=100, now=1)
+
+        self.assertIsNone(data.get('old', now=6))
+        self.assertEqual(len(data), 2)
+        data.set('new', 3, expires_at=100, now=11)
+        self.assertEqual(len(data), 2)
+        self.assertEqual(data.get('live', now=11), 2)
+
+    def test_single_flight_clear_resets_inflight_calls(self):
+        flight = SingleFlight('test', window=5)
+        flight._inflight['stuck'] = threading.Event()
+
+        flight.clear()
+
+        self.assertEqual(flight._inflight, {})
+        self.assertEqual(flight.do('stuck', lambda: 'done'), 'done')
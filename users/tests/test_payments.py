@@ -0,0 +1,87 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from eigth_module.task_metrics import clear_metrics, render_prometheus
+from lms.models import Course
+from users.models import Payment
+from users.ratelimit import stripe_session_flight
+from users.tasks import create_stripe_checkout_task
+from users.tests.fake_stripe import FakeStripe
+
+
+User = get_user_model()
+
+
+class PaymentCheckoutTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(email='payer@example.com')
+        self.course = Course.objects.create(title='Paid Course', description='Test', owner=self.user)
+        self.payments_url = reverse('payment-list')
+        stripe_session_flight.clear()
+        self.addCleanup(stripe_session_flight.clear)
+        self.fake_stripe = FakeStripe()
+        patcher = mock.patch('users.services.stripe', self.fake_stripe)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client.force_authenticate(self.user)
+
+    def _create_payment(self):
+        payload = {'course': self.course.id, 'amount': '1000.00', 'payment_method': 'stripe'}
+        return self.client.post(self.payments_url, payload, format='json')
+
+    @override_settings(STRIPE_CHECKOUT_ASYNC=False)
+    def test_sync_checkout_returns_payment_url(self):
+        response = self._create_payment()
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['payment_url'], 'https://checkout.stripe.com/c/pay/cs_test_1')
+        self.assertEqual(self.fake_stripe.calls, ['product', 'price', 'session'])
+
+    @override_settings(STRIPE_CHECKOUT_ASYNC=True)
+    def test_async_checkout_returns_pending_payment_without_stripe_calls(self):
+        with mock.patch('users.views.create_stripe_checkout_task.delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self._create_payment()
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['payment_status'], 'pending')
+        self.assertIsNone(response.data['payment_url'])
+        self.assertEqual(self.fake_stripe.calls, [])
+        delay.assert_called_once()
+
+    @override_settings(STRIPE_CHECKOUT_ASYNC=True)
+    def test_async_checkout_task_fills_payment_url_for_status_endpoint(self):
+        # Выполняем задачу синхронно вместо отправки в брокер
+        with mock.patch.object(create_stripe_checkout_task, 'delay', side_effect=create_stripe_checkout_task):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self._create_payment()
+
+        payment = Payment.objects.get(id=response.data['id'])
+        self.assertEqual(payment.stripe_session_id, 'cs_test_1')
+
+        status_url = reverse('payment-status', args=[payment.id])
+        status_response = self.client.get(status_url, {'wait': 1})
+
+        self.assertEqual(status_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(status_response.data['payment_url'], 'https://checkout.stripe.com/c/pay/cs_test_1')
+        self.assertEqual(status_response.data['payment_status'], 'pending')
+
+    def test_failed_checkout_task_marks_payment_failed_and_fails(self):
+        payment = Payment.objects.create(
+            user=self.user, course=self.course, amount='1000.00', payment_method='stripe'
+        )
+        clear_metrics()
+        self.fake_stripe.Product.create = mock.Mock(side_effect=FakeStripe.error.StripeError('down'))
+
+        result = create_stripe_checkout_task.apply(args=(payment.id, 'https://ok', 'https://cancel'))
+
+        self.assertTrue(result.failed())
+        payment.refresh_from_db()
+        self.assertEqual(payment.payment_status, 'failed')
+        metrics = render_prometheus([create_stripe_checkout_task.name])
+        self.assertIn(f'celery_task_runs_total{{task="{create_stripe_checkout_task.name}",state="failure"}} 1', metrics)
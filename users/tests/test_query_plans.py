@@ -0,0 +1,68 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Q
+from django.test import TestCase
+from django.utils import timezone
+
+from lms.models import Course, Lesson
+from lms.services import get_recently_updated_lessons
+from users.models import Payment
+
+
+User = get_user_model()
+
+
+class HotQueryIndexTests(TestCase):
+    """Проверяет по EXPLAIN, что горячие запросы используют индексы"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(email='plans@example.com')
+        cls.course = Course.objects.create(title='Course', owner=cls.user)
+        cls.since = timezone.now() - timedelta(hours=4)
+
+    def assertUsesIndex(self, queryset, index_name):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                # На маленьких тестовых таблицах планировщик предпочитает Seq Scan
+                cursor.execute('SET enable_seqscan = off')
+            try:
+                plan = queryset.explain()
+            finally:
+                if connection.vendor == 'postgresql':
+                    cursor.execute('RESET enable_seqscan')
+        self.assertIn(index_name, plan)
+
+    def test_recent_lessons_of_course(self):
+        # Запрос задачи check_and_send_lesson_update_notification
+        lesson = Lesson.objects.create(course=self.course, title='Lesson', owner=self.user)
+        queryset = get_recently_updated_lessons(self.course, self.since, exclude_lesson_id=lesson.id)
+        self.assertUsesIndex(queryset, 'lms_lesson_course_upd_idx')
+
+    def test_user_payment_history(self):
+        queryset = Payment.objects.filter(user=self.user).order_by('-payment_date')
+        self.assertUsesIndex(queryset, 'users_pay_user_date_idx')
+
+    def test_payments_by_status(self):
+        queryset = Payment.objects.filter(payment_status='paid').order_by('-payment_date')
+        self.assertUsesIndex(queryset, 'users_pay_status_date_idx')
+
+    def test_payments_by_method(self):
+        queryset = Payment.objects.filter(payment_method='stripe').order_by('-payment_date')
+        self.assertUsesIndex(queryset, 'users_pay_method_date_idx')
+
+    def test_paid_payments_of_user(self):
+        if connection.vendor != 'postgresql':
+            self.skipTest('SQLite не применяет частичный индекс к условию с параметром')
+        queryset = Payment.objects.filter(user=self.user, payment_status='paid').values_list('course_id', 'lesson_id')
+        self.assertUsesIndex(queryset, 'users_pay_user_paid_idx')
+
+    def test_inactive_users(self):
+        month_ago = timezone.now() - timedelta(days=30)
+        queryset = User.objects.filter(
+            Q(last_login__lt=month_ago) | Q(last_login__isnull=True),
+            is_active=True,
+        )
+        self.assertUsesIndex(queryset, 'users_user_active_login_idx')
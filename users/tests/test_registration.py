@@ -0,0 +1,41 @@
+from django.contrib.auth.hashers import identify_hasher
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from users.models import User
+
+
+@override_settings(PASSWORD_PBKDF2_ITERATIONS=1000)
+class RegistrationHashingTests(APITestCase):
+    def register(self):
+        return self.client.post('/api/register/', {
+            'email': 'new@example.com',
+            'password': 'password123',
+            'password_confirm': 'password123',
+        }, format='json')
+
+    def test_registration_inserts_user_once_with_hashed_password(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.register()
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        writes = [q['sql'] for q in queries if q['sql'].startswith(('INSERT', 'UPDATE'))]
+        self.assertEqual(len(writes), 1)
+        user = User.objects.get(email='new@example.com')
+        self.assertTrue(user.check_password('password123'))
+        self.assertEqual(identify_hasher(user.password).safe_summary(user.password)['iterations'], 1000)
+
+    def test_login_upgrades_hash_to_configured_cost(self):
+        self.register()
+
+        with override_settings(PASSWORD_PBKDF2_ITERATIONS=2000):
+            response = self.client.post(
+                '/api/token/', {'email': 'new@example.com', 'password': 'password123'}, format='json',
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        user = User.objects.get(email='new@example.com')
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$2000$'))
@@ -0,0 +1,24 @@
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+
+class StartupImportsTests(SimpleTestCase):
+    """Тяжелые зависимости не должны импортироваться при старте воркера"""
+
+    def test_setup_and_urlconf_do_not_import_stripe_or_schema_generator(self):
+        script = (
+            'import sys, django\n'
+            'django.setup()\n'
+            'from django.urls import get_resolver\n'
+            'get_resolver().url_patterns\n'
+            'print(",".join(name for name in ("stripe", "drf_spectacular.generators") if name in sys.modules))\n'
+        )
+        result = subprocess.run(
+            [sys.executable, '-c', script],
+            cwd=settings.BASE_DIR, env=dict(os.environ), capture_output=True, text=True, check=True,
+        )
+        self.assertEqual(result.stdout.strip(), '')
@@ -0,0 +1,20 @@
+from django.test import SimpleTestCase
+
+from eigth_module.celery import app
+
+
+class TaskRoutingTests(SimpleTestCase):
+    def route(self, task_name):
+        return app.amqp.router.route({}, task_name)
+
+    def test_tasks_are_routed_to_dedicated_queues(self):
+        self.assertEqual(self.route('lms.tasks.send_course_update_notification')['queue'].name, 'notifications')
+        self.assertEqual(self.route('users.tasks.create_stripe_checkout_task')['queue'].name, 'payments')
+        self.assertEqual(self.route('users.tasks.block_inactive_users')['queue'].name, 'maintenance')
+
+    def test_payment_tasks_have_high_priority(self):
+        self.assertEqual(self.route('users.tasks.create_stripe_checkout_task')['priority'], 0)
+        # На Redis уровни опрашиваются по возрастанию: оплата раньше задач с приоритетом по умолчанию
+        self.assertLess(
+            self.route('users.tasks.create_stripe_checkout_task')['priority'], app.conf.task_default_priority,
+        )
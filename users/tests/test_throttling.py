@@ -0,0 +1,99 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase
+from rest_framework import status
+from rest_framework.settings import api_settings
+from rest_framework.test import APITestCase
+
+from lms.models import Course
+from users.ratelimit import SlidingWindow, sliding_window_wait, throttle_window
+from users.tests.fake_stripe import FakeStripe
+
+
+User = get_user_model()
+
+
+class SlidingWindowTests(SimpleTestCase):
+    def test_previous_window_is_weighted_by_overlap(self):
+        # Половина предыдущего окна (8 запросов) еще в скользящем окне: 4 + 5 < 10
+        self.assertIsNone(sliding_window_wait(10, 60, 30, current=5, previous=8))
+        # 4 + 7 >= 10: ждать, пока доля предыдущего окна не опустится ниже 3 запросов
+        self.assertAlmostEqual(sliding_window_wait(10, 60, 30, current=7, previous=8), 7.5)
+        self.assertEqual(sliding_window_wait(10, 60, 30, current=6, previous=8), 0)
+        self.assertEqual(sliding_window_wait(10, 60, 15, current=10, previous=0), 45)
+
+    def test_counters_roll_over_to_next_window(self):
+        window = SlidingWindow('test')
+        with mock.patch('users.ratelimit.time.time', return_value=600.0):
+            self.assertIsNone(window.hit('key', 2, 60))
+            self.assertIsNone(window.hit('key', 2, 60))
+            self.assertEqual(window.hit('key', 2, 60), 60)
+
+        # Через 45 секунд следующего окна в скользящем окне четверть прежних запросов: 0.5 + 2 >= 2
+        with mock.patch('users.ratelimit.time.time', return_value=705.0):
+            self.assertIsNone(window.hit('key', 2, 60))
+            self.assertIsNone(window.hit('key', 2, 60))
+            self.assertEqual(window.hit('key', 2, 60), 15)
+
+        with mock.patch('users.ratelimit.time.time', return_value=900.0):
+            self.assertIsNone(window.hit('key', 2, 60))
+
+
+class ScopedThrottleTests(APITestCase):
+    def setUp(self):
+        throttle_window.clear()
+        self.addCleanup(throttle_window.clear)
+        self.user = User.objects.create(email='client@example.com')
+        self.course = Course.objects.create(title='Course', owner=self.user)
+        self.other_course = Course.objects.create(title='Other', owner=self.user)
+        self.client.force_authenticate(self.user)
+
+    def set_rates(self, **rates):
+        patcher = mock.patch.dict(api_settings.DEFAULT_THROTTLE_RATES, rates)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_reads_and_writes_have_separate_limits(self):
+        self.set_rates(read='2/min', write='1/min')
+
+        self.assertEqual(self.client.get('/api/courses/').status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get('/api/courses/').status_code, status.HTTP_200_OK)
+        response = self.client.get('/api/courses/')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', response)
+
+        response = self.client.patch(f'/api/courses/{self.course.id}/', {'title': 'New'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_subscription_toggles_are_limited_per_course(self):
+        self.set_rates(subscription='1/min')
+        url = '/api/courses/subscription/'
+
+        self.assertEqual(self.client.post(url, {'course': self.course.id}, format='json').status_code, 200)
+        self.assertEqual(self.client.post(url, {'course': self.course.id}, format='json').status_code, 429)
+        self.assertEqual(self.client.post(url, {'course': self.other_course.id}, format='json').status_code, 200)
+
+    def test_subscription_toggle_rejects_non_object_body(self):
+        response = self.client.post('/api/courses/subscription/', [self.course.id], format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_in_memory_counters_expire(self):
+        with mock.patch('users.ratelimit.time.time', return_value=600.0):
+            for ident in range(50):
+                throttle_window.hit(ident, 10, 60)
+        with mock.patch('users.ratelimit.time.time', return_value=1000.0):
+            throttle_window.hit('active', 10, 60)
+
+        self.assertEqual(len(throttle_window._counters), 1)
+
+    def test_payment_creation_has_its_own_limit(self):
+        self.set_rates(payment_create='1/min', write='100/min')
+        patcher = mock.patch('users.services.stripe', FakeStripe())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        payload = {'course': self.course.id, 'amount': '10.00', 'payment_method': 'cash'}
+
+        self.assertEqual(self.client.post('/api/payments/', payload, format='json').status_code, 201)
+        self.assertEqual(self.client.post('/api/payments/', payload, format='json').status_code, 429)
@@ -0,0 +1,72 @@
+import time
+from unittest import mock
+
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from users.models import User
+from users.token_store import RefreshTokenStore, refresh_token_store
+
+
+class RefreshTokenStoreTests(APITestCase):
+    def setUp(self):
+        refresh_token_store.clear()
+        self.user = User.objects.create(email='student@example.com')
+        self.user.set_password('password123')
+        self.user.save()
+
+    def refresh(self, token):
+        return self.client.post('/api/token/refresh/', {'refresh': token}, format='json')
+
+    def test_refresh_token_can_be_used_once(self):
+        response = self.client.post(
+            '/api/token/', {'email': 'student@example.com', 'password': 'password123'}, format='json',
+        )
+        refresh = response.data['refresh']
+
+        first = self.refresh(refresh)
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(first.data['refresh'], refresh)
+
+        replay = self.refresh(refresh)
+        self.assertEqual(replay.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        rotated = self.refresh(first.data['refresh'])
+        self.assertEqual(rotated.status_code, status.HTTP_200_OK)
+
+    def test_claim_and_revoke(self):
+        store = RefreshTokenStore('test')
+        exp = time.time() + 60
+
+        self.assertTrue(store.claim('a', exp))
+        self.assertFalse(store.claim('a', exp))
+        self.assertTrue(store.is_revoked('a'))
+
+        store.revoke('b', exp)
+        self.assertFalse(store.claim('b', exp))
+        self.assertFalse(store.is_revoked('c'))
+
+    def test_expired_token_is_not_stored(self):
+        store = RefreshTokenStore('test')
+
+        self.assertFalse(store.claim('old', time.time() - 1))
+        self.assertEqual(len(store), 0)
+
+    @override_settings(REFRESH_TOKEN_PRUNE_BATCH_SIZE=10)
+    def test_claim_prunes_expired_entries_in_batches(self):
+        store = RefreshTokenStore('test')
+        with mock.patch('users.token_store.time.time', return_value=1000.0):
+            for i in range(25):
+                store.claim(f'short-{i}', 1010)
+            store.claim('live', 2000)
+
+        with mock.patch('users.token_store.time.time', return_value=1500.0):
+            store.claim('new-0', 2000)
+            self.assertEqual(len(store), 17)
+            store.claim('new-1', 2000)
+            store.claim('new-2', 2000)
+
+            self.assertEqual(len(store), 4)
+            self.assertTrue(store.is_revoked('live'))
+            self.assertFalse(store.is_revoked('short-0'))
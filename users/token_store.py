@@ -0,0 +1,106 @@
+"""
+Хранилище использованных refresh-токенов (ротация и черный список).
+
+При обновлении токена (ROTATE_REFRESH_TOKENS) JTI старого refresh-токена
+записывается в хранилище до момента истечения токена: повторное
+предъявление того же токена отклоняется. Проверка и запись выполняются одной
+атомарной операцией за O(1) (SET NX в Redis, словарь в памяти процесса).
+
+Если задан REDIS_URL, записи хранятся в Redis с TTL, равным оставшемуся
+времени жизни токена, и удаляются самим Redis. Без Redis используется
+хранилище в памяти процесса (для тестов и разработки): просроченные записи
+удаляются при каждой записи нового токена в том же процессе, поэтому размер
+хранилища ограничен числом токенов, выданных за время жизни refresh-токена.
+"""
+import heapq
+import threading
+import time
+
+from django.conf import settings
+
+from .ratelimit import get_redis_client
+
+
+class RefreshTokenStore:
+    """Множество JTI использованных или отозванных токенов со сроком хранения"""
+
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+        # JTI -> время истечения токена (unix time)
+        self._entries = {}
+        # Куча (время истечения, JTI) для удаления просроченных записей по порядку
+        self._expirations = []
+        self._lock = threading.Lock()
+
+    def _key(self, jti):
+        return f'{self.namespace}:{jti}'
+
+    def claim(self, jti, exp) -> bool:
+        """
+        Отмечает токен использованным
+
+        Args:
+            jti: Идентификатор токена
+            exp: Время истечения токена (unix time)
+
+        Returns:
+            bool: False, если токен уже был использован или отозван
+        """
+        exp = int(exp)
+        now = time.time()
+        # Истекший токен не записывается (как SET EXAT со временем в прошлом)
+        if exp <= now:
+            return False
+        client = get_redis_client()
+        if client is not None:
+            return bool(client.set(self._key(jti), '1', nx=True, exat=exp))
+
+        with self._lock:
+            self._prune_expired(now, settings.REFRESH_TOKEN_PRUNE_BATCH_SIZE)
+            expires_at = self._entries.get(jti)
+            if expires_at is not None and expires_at > now:
+                return False
+            self._entries[jti] = exp
+            heapq.heappush(self._expirations, (exp, jti))
+            return True
+
+    def revoke(self, jti, exp):
+        """Отзывает токен (повторный отзыв ничего не меняет)"""
+        self.claim(jti, exp)
+
+    def is_revoked(self, jti) -> bool:
+        """Проверяет, использован или отозван ли токен"""
+        client = get_redis_client()
+        if client is not None:
+            return bool(client.exists(self._key(jti)))
+
+        with self._lock:
+            expires_at = self._entries.get(jti)
+        return expires_at is not None and expires_at > time.time()
+
+    def _prune_expired(self, now, limit) -> int:
+        """
+        Удаляет не больше limit просроченных записей (вызывается под блокировкой).
+        Каждая запись попадает в кучу один раз, поэтому в среднем на одну
+        запись нового токена приходится не больше одного удаления.
+        """
+        removed = 0
+        while self._expirations and self._expirations[0][0] <= now and removed < limit:
+            exp, jti = heapq.heappop(self._expirations)
+            if self._entries.get(jti) == exp:
+                del self._entries[jti]
+                removed += 1
+        return removed
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def clear(self):
+        """Сбрасывает состояние в памяти процесса"""
+        with self._lock:
+            self._entries.clear()
+            self._expirations.clear()
+
+
+refresh_token_store = RefreshTokenStore('jwt:used-refresh')
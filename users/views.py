@@ -1,3 +1,5 @@
+import time
+
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -10,6 +12,8 @@ from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiRespon
 from drf_spectacular.types import OpenApiTypes
 from django.shortcuts import get_object_or_404
 from django.conf import settings
+from django.db import transaction
+from eigth_module.db_router import ReplicaReadMixin
 from .models import Payment, User
 from .serializers import (
     PaymentSerializer,
@@ -19,20 +23,27 @@ from .serializers import (
     UserDetailSerializer
 )
 from .services import (
-    create_stripe_product,
-    create_stripe_price,
-    create_stripe_checkout_session,
+    create_stripe_checkout_for_payment,
     retrieve_stripe_session,
 )
+from .tasks import create_stripe_checkout_task
+from .ratelimit import PaymentCreateThrottle, PaymentStatusThrottle, stripe_session_flight
 
 
-class PaymentViewSet(viewsets.ModelViewSet):
+class PaymentViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     """ViewSet для платежей с фильтрацией"""
     queryset = Payment.objects.all()
     serializer_class = PaymentSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, OrderingFilter]
-    filterset_fields = ['course', 'lesson', 'payment_method', 'payment_status']
+    # Фильтр по диапазону дат читает только секции нужных месяцев (users.partitioning)
+    filterset_fields = {
+        'course': ['exact'],
+        'lesson': ['exact'],
+        'payment_method': ['exact'],
+        'payment_status': ['exact'],
+        'payment_date': ['gte', 'lt'],
+    }
     ordering_fields = ['payment_date']
     ordering = ['-payment_date']
 
@@ -41,6 +52,12 @@ class PaymentViewSet(viewsets.ModelViewSet):
             return PaymentCreateSerializer
         return PaymentSerializer
 
+    def get_throttles(self):
+        # Создание платежа обращается к Stripe: свой лимит вместо общего лимита на запись
+        if self.action == 'create':
+            return [PaymentCreateThrottle()]
+        return super().get_throttles()
+
     def get_queryset(self):
         """Пользователи видят только свои платежи, кроме суперпользователей"""
         user = self.request.user
@@ -58,7 +75,7 @@ class PaymentViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
-        # Определяем курс или урок для получения названия
+        # Получаем данные платежа
         course = serializer.validated_data.get('course')
         lesson = serializer.validated_data.get('lesson')
         amount = serializer.validated_data.get('amount')
@@ -75,38 +92,19 @@ class PaymentViewSet(viewsets.ModelViewSet):
         
         # Если метод оплаты - Stripe, создаем сессию
         if payment_method == 'stripe':
-            try:
-                # Определяем название продукта
-                if course:
-                    product_name = course.title
-                    product_description = course.description or f'Курс: {course.title}'
-                elif lesson:
-                    product_name = lesson.title
-                    product_description = lesson.description or f'Урок: {lesson.title}'
-                else:
-                    product_name = 'Платеж'
-                    product_description = 'Платеж за обучение'
-                
-                # Создаем продукт в Stripe
-                product_data = create_stripe_product(product_name, product_description)
-                payment.stripe_product_id = product_data['id']
-                
-                # Создаем цену в Stripe
-                price_data = create_stripe_price(product_data['id'], amount)
-                payment.stripe_price_id = price_data['id']
-                
-                # Создаем сессию оплаты
-                success_url = f"{request.scheme}://{request.get_host()}/api/payments/{payment.id}/success/"
-                cancel_url = f"{request.scheme}://{request.get_host()}/api/payments/{payment.id}/cancel/"
-                session_data = create_stripe_checkout_session(
-                    price_data['id'],
-                    success_url,
-                    cancel_url
+            success_url = f"{request.scheme}://{request.get_host()}/api/payments/{payment.id}/success/"
+            cancel_url = f"{request.scheme}://{request.get_host()}/api/payments/{payment.id}/cancel/"
+
+            if settings.STRIPE_CHECKOUT_ASYNC:
+                # Сессия создается в фоне, ссылку клиент получает через эндпоинт статуса
+                transaction.on_commit(
+                    lambda: create_stripe_checkout_task.delay(payment.id, success_url, cancel_url)
                 )
-                payment.stripe_session_id = session_data['id']
-                payment.payment_url = session_data['url']
-                payment.save()
-                
+                response_serializer = PaymentSerializer(payment)
+                return Response(response_serializer.data, status=status.HTTP_202_ACCEPTED)
+
+            try:
+                create_stripe_checkout_for_payment(payment, success_url, cancel_url)
             except Exception as e:
                 payment.payment_status = 'failed'
                 payment.save()
@@ -175,10 +173,14 @@ class UserRegistrationView(CreateAPIView):
 class PaymentStatusAPIView(APIView):
     """Проверка статуса платежа через Stripe"""
     permission_classes = [IsAuthenticated]
+    throttle_classes = [PaymentStatusThrottle]
 
     @extend_schema(
         summary='Проверить статус платежа',
-        description='Проверяет статус платежа в Stripe по ID сессии',
+        description=(
+            'Проверяет статус платежа в Stripe по ID сессии. '
+            'С параметром wait ожидает создания сессии оплаты (long-poll).'
+        ),
         parameters=[
             OpenApiParameter(
                 name='payment_id',
@@ -186,6 +188,13 @@ class PaymentStatusAPIView(APIView):
                 location=OpenApiParameter.PATH,
                 description='ID платежа'
             ),
+            OpenApiParameter(
+                name='wait',
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+                required=False,
+                description='Сколько секунд ждать появления ссылки на оплату'
+            ),
         ],
         responses={
             200: OpenApiResponse(
@@ -197,21 +206,31 @@ class PaymentStatusAPIView(APIView):
     )
     def get(self, request, payment_id):
         payment = get_object_or_404(Payment, id=payment_id, user=request.user)
+
+        wait = self._get_wait_seconds(request)
+        if wait:
+            self._wait_for_checkout_session(payment, wait)
         
         # Если платеж через Stripe, проверяем статус
         if payment.payment_method == 'stripe' and payment.stripe_session_id:
             try:
-                session_data = retrieve_stripe_session(payment.stripe_session_id)
+                # Одновременные запросы по одному платежу делят один запрос к Stripe
+                session_data = stripe_session_flight.do(
+                    payment.id,
+                    lambda: retrieve_stripe_session(payment.stripe_session_id),
+                )
                 
                 # Обновляем статус платежа
                 if session_data['payment_status'] == 'paid':
-                    payment.payment_status = 'paid'
+                    new_status = 'paid'
                 elif session_data['payment_status'] == 'unpaid':
-                    payment.payment_status = 'pending'
+                    new_status = 'pending'
                 else:
-                    payment.payment_status = 'failed'
+                    new_status = 'failed'
                 
-                payment.save()
+                if new_status != payment.payment_status:
+                    payment.payment_status = new_status
+                    payment.save(update_fields=['payment_status'])
             except Exception as e:
                 return Response(
                     {'error': f'Ошибка при проверке статуса: {str(e)}'},
@@ -221,3 +240,24 @@ class PaymentStatusAPIView(APIView):
         serializer = PaymentSerializer(payment)
         return Response(serializer.data)
 
+    @staticmethod
+    def _get_wait_seconds(request):
+        """Возвращает время ожидания из параметра wait, ограниченное настройками"""
+        try:
+            wait = int(request.query_params.get('wait', 0))
+        except (TypeError, ValueError):
+            return 0
+        return max(0, min(wait, settings.PAYMENT_STATUS_MAX_WAIT))
+
+    @staticmethod
+    def _wait_for_checkout_session(payment, wait):
+        """Ожидает, пока фоновая задача создаст сессию оплаты или пометит платеж ошибкой"""
+        deadline = time.monotonic() + wait
+        while (
+            payment.payment_method == 'stripe'
+            and not payment.stripe_session_id
+            and payment.payment_status == 'pending'
+            and time.monotonic() < deadline
+        ):
+            time.sleep(settings.PAYMENT_STATUS_POLL_INTERVAL)
+            payment.refresh_from_db()